@@ -1,45 +1,74 @@
 import logging
-from flask import Flask
+import click
+from flask import Flask, request, jsonify, flash, redirect
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
-from flask_login import LoginManager
-from flask_bcrypt import Bcrypt
+from flask_login import LoginManager, login_url
 from flask_mail import Mail  # Pastikan ini diimpor
 from config import Config
+from app.logging_setup import configure_logging
+from app.database import configure_sqlite, pool_metrics
+from app.instrumentation import instrumentation
 
 
 # Inisialisasi objek
 db = SQLAlchemy()
 migrate = Migrate()
 login_manager = LoginManager()
-bcrypt = Bcrypt()
 mail = Mail()
 
-# Konfigurasi Logging
-logging.basicConfig(level=logging.INFO,  # Atur level log yang diinginkan (INFO, ERROR, DEBUG, dsb)
-                    format='%(asctime)s - %(levelname)s - %(message)s',
-                    handlers=[
-                        logging.StreamHandler(),  # Output log ke konsol
-                        logging.FileHandler('app.log')  # Simpan log ke file app.log
-                    ])
+# Konfigurasi Logging: satu pipeline QueueHandler/QueueListener untuk seluruh aplikasi
+configure_logging(Config)
+logger = logging.getLogger(__name__)
+logger.info("Config loaded successfully")
 
 def create_app():
     app = Flask(__name__)
-    mail = Mail(app)  # Inisialisasi Flask-Mail dengan aplikasi
     app.config.from_object(Config)
     
-    # Inisialisasi db, migrate, login_manager, bcrypt
+    # Inisialisasi db, migrate, login_manager
     db.init_app(app)
+    instrumentation.init_app(app)
+    with app.app_context():
+        configure_sqlite(db.engine, app.config['SQLITE_PRAGMAS'])
+        pool_metrics.instrument(db.engine)
+        instrumentation.instrument(db.engine)
+
+    from app.write_queue import write_queue
+    write_queue.init_app(app)
     migrate.init_app(app, db)
     login_manager.init_app(app)
     
-    mail.init_app(app)
+    mail.init_app(app)  # Satu-satunya inisialisasi Flask-Mail, setelah konfigurasi dimuat
+
+    from app.mail_outbox import mail_outbox
+    mail_outbox.init_app(app)
+
+    from app.passwords import password_hasher
+    password_hasher.init_app(app)
+
+    from app.photo_storage import photo_storage
+    from app.photo_ingest import photo_ingestor
+    photo_storage.init_app(app)
+    photo_ingestor.init_app(app)
+
+    from app.geofence import geofence
+    geofence.init_app(app)
+
+    from app.identity_cache import identity_cache
+    identity_cache.init_app(app)
+
+    from app.tokens import token_service, bearer_token
+    token_service.init_app(app)
+
+    from app.rate_limit import rate_limiter
+    rate_limiter.init_app(app)
 
     # Konfigurasi LoginManager
     login_manager.login_view = 'auth_bp.login'  # Ganti dengan nama blueprint dan endpoint login Anda
     login_manager.login_message = "Please log in to access this page."  # Pesan yang ditampilkan saat pengguna tidak terautentikasi
     
-    logging.info("Application started.")  # Logging ketika aplikasi mulai dijalankan
+    logger.info("Application started.")  # Logging ketika aplikasi mulai dijalankan
 
     @app.context_processor
     def utility_processor():
@@ -47,33 +76,63 @@ def create_app():
         from app.utils import get_attendance_for_today
         return dict(get_attendance_for_today=get_attendance_for_today, AttendanceStatus=AttendanceStatus)
 
-    # User loader function
+    # User loader function: User + Employee diambil dari cache identitas per proses
     @login_manager.user_loader
     def load_user(user_id):
-        from app.models import User  # Lazy import untuk menghindari circular import
-        logging.info(f"Loading user with ID: {user_id}")  # Logging saat memuat user
-        return User.query.get(int(user_id))
+        return identity_cache.get(int(user_id))
+
+    # Klien API dengan header Authorization: Bearer <access token>: identitas dari klaim token, tanpa query
+    @login_manager.request_loader
+    def load_user_from_request(request):
+        token = bearer_token(request)
+        return token_service.authenticate(token) if token else None
+
+    @login_manager.unauthorized_handler
+    def unauthorized():
+        if bearer_token(request) is not None:
+            return jsonify({"code": 401, "status": "Unauthorized", "message": "Token tidak valid atau telah kedaluwarsa."}), \
+                401, {'WWW-Authenticate': 'Bearer error="invalid_token"'}
+        flash(login_manager.login_message, category=login_manager.login_message_category)
+        return redirect(login_url(login_manager.login_view, next_url=request.url))
+
+    @app.cli.command('rebuild-daily-summary')
+    def rebuild_daily_summary_command():
+        """Bangun ulang tabel attendance_daily_summary dari data attendance."""
+        from app.utils import rebuild_daily_summary
+        total = rebuild_daily_summary()
+        click.echo(f"Rebuilt {total} daily summary rows.")
+
+    @app.cli.command('send-outbox')
+    def send_outbox_command():
+        """Kirim semua email outbox yang sudah jatuh tempo lalu keluar."""
+        total = 0
+        while True:
+            processed = mail_outbox.process_batch()
+            if not processed:
+                break
+            total += processed
+        click.echo(f"Processed {total} outbox emails.")
 
     # Daftarkan blueprint
     from .routes.auth_routes import auth_bp
     app.register_blueprint(auth_bp, url_prefix='/auth')
-    logging.info("Registered 'auth_bp' blueprint.")  # Logging saat blueprint auth didaftarkan
+    logger.info("Registered 'auth_bp' blueprint.")  # Logging saat blueprint auth didaftarkan
 
     from .routes.admin_routes import admin_bp
     app.register_blueprint(admin_bp, url_prefix='/')
-    logging.info("Registered 'admin_bp' blueprint.")  # Logging saat blueprint admin didaftarkan
+    logger.info("Registered 'admin_bp' blueprint.")  # Logging saat blueprint admin didaftarkan
 
     from .routes.user_routes import user_bp
     app.register_blueprint(user_bp, url_prefix='/user')
-    logging.info("Registered 'user_bp' blueprint.")  # Logging saat blueprint user didaftarkan
+    logger.info("Registered 'user_bp' blueprint.")  # Logging saat blueprint user didaftarkan
 
     from .routes.employee_routes import home_bp, employee_bp
     app.register_blueprint(home_bp)
     app.register_blueprint(employee_bp, url_prefix='/employee')
-    logging.info("Registered 'employee_bp' blueprint.")  # Logging saat blueprint employee didaftarkan
+    logger.info("Registered 'employee_bp' blueprint.")  # Logging saat blueprint employee didaftarkan
 
     from .routes.attendance_routes import attendance_bp
     app.register_blueprint(attendance_bp, url_prefix='/attendance')
-    logging.info("Registered 'attendance_bp' blueprint.")  # Logging saat blueprint attendance didaftarkan
+    logger.info("Registered 'attendance_bp' blueprint.")  # Logging saat blueprint attendance didaftarkan
 
     return app
@@ -0,0 +1,49 @@
+import datetime
+import threading
+
+
+class ClockInBitmap:
+    """Bitmap per proses berisi karyawan yang sudah clock in hari ini.
+
+    Dicek sebelum foto di-spool maupun write ke database, sehingga retry dari
+    jaringan seluler yang tidak stabil langsung ditolak. Bitmap dikosongkan
+    otomatis saat tanggal berganti. Sumber kebenaran tetap unique constraint
+    (employee_id, date) di tabel attendance; bitmap hanya jalan pintas.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._date = None
+        self._bits = bytearray()
+
+    def _reset_if_new_day(self):
+        today = datetime.date.today()
+        if self._date != today:
+            self._date = today
+            self._bits = bytearray()
+
+    def is_set(self, employee_id):
+        with self._lock:
+            self._reset_if_new_day()
+            index, bit = divmod(employee_id, 8)
+            return index < len(self._bits) and bool(self._bits[index] & (1 << bit))
+
+    def mark(self, employee_id):
+        with self._lock:
+            self._reset_if_new_day()
+            index, bit = divmod(employee_id, 8)
+            if index >= len(self._bits):
+                self._bits.extend(bytes(index - len(self._bits) + 1))
+            self._bits[index] |= 1 << bit
+
+    def clear(self, employee_id=None):
+        with self._lock:
+            if employee_id is None:
+                self._bits = bytearray()
+                return
+            index, bit = divmod(employee_id, 8)
+            if index < len(self._bits):
+                self._bits[index] &= ~(1 << bit)
+
+
+clocked_in_today = ClockInBitmap()
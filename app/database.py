@@ -1,4 +1,78 @@
+import logging
+import threading
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event
 
 # Inisialisasi objek SQLAlchemy
 db = SQLAlchemy()
+
+logger = logging.getLogger(__name__)
+
+
+def configure_sqlite(engine, pragmas):
+    """Pasang PRAGMA SQLite (WAL, synchronous, mmap, cache) di setiap koneksi baru.
+
+    Dengan WAL pembaca tidak lagi diblokir oleh penulis, dan synchronous=NORMAL
+    cukup aman untuk WAL sambil menghemat fsync di setiap commit.
+    """
+    if engine.dialect.name != 'sqlite':
+        return
+
+    @event.listens_for(engine, 'connect')
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f'PRAGMA {name}={value}')
+        finally:
+            cursor.close()
+
+    logger.info(f"SQLite pragmas configured: {pragmas}")
+
+
+class PoolMetrics:
+    """Penghitung event pool koneksi SQLAlchemy untuk memantau dan menyetel pool."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters = {'connects': 0, 'checkouts': 0, 'checkins': 0, 'invalidations': 0}
+        self.engine = None
+
+    def instrument(self, engine):
+        self.engine = engine
+
+        @event.listens_for(engine, 'connect')
+        def on_connect(dbapi_connection, connection_record):
+            self._increment('connects')
+
+        @event.listens_for(engine, 'checkout')
+        def on_checkout(dbapi_connection, connection_record, connection_proxy):
+            self._increment('checkouts')
+
+        @event.listens_for(engine, 'checkin')
+        def on_checkin(dbapi_connection, connection_record):
+            self._increment('checkins')
+
+        @event.listens_for(engine, 'invalidate')
+        def on_invalidate(dbapi_connection, connection_record, exception):
+            self._increment('invalidations')
+
+    def _increment(self, name):
+        with self._lock:
+            self.counters[name] += 1
+
+    def stats(self):
+        with self._lock:
+            snapshot = dict(self.counters)
+        pool = self.engine.pool if self.engine is not None else None
+        if pool is not None:
+            snapshot['pool_class'] = type(pool).__name__
+            snapshot['status'] = pool.status()
+            # Hanya QueuePool yang punya ukuran, overflow dan jumlah koneksi dipinjam
+            for name in ('size', 'checkedout', 'overflow', 'checkedin'):
+                if hasattr(pool, name):
+                    snapshot[name] = getattr(pool, name)()
+        return snapshot
+
+
+pool_metrics = PoolMetrics()
@@ -0,0 +1,157 @@
+import math
+import time
+import logging
+import threading
+
+try:
+    import numpy as np
+except ImportError:  # numpy opsional: tanpa numpy jarak dihitung satu per satu
+    np = None
+
+logger = logging.getLogger(__name__)
+
+EARTH_RADIUS_M = 6371000.0
+METERS_PER_DEGREE = 111320.0
+VECTORIZE_THRESHOLD = 16  # Di bawah jumlah kandidat ini, loop biasa lebih cepat dari numpy
+
+
+def haversine(lat1, lon1, lat2, lon2):
+    """Jarak dua titik di permukaan bumi dalam meter."""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(math.sqrt(a))
+
+
+class Fence:
+    __slots__ = ('id', 'latitude', 'longitude', 'radius')
+
+    def __init__(self, id, latitude, longitude, radius):
+        self.id = id
+        self.latitude = latitude
+        self.longitude = longitude
+        self.radius = radius
+
+
+class FenceGroup:
+    """Sekumpulan fence dalam satu sel; array numpy disiapkan sekali saat build."""
+    __slots__ = ('fences', 'lats', 'lons', 'cos_lats', 'radii')
+
+    def __init__(self, fences):
+        self.fences = tuple(fences)
+        self.lats = None
+        if np is not None and len(self.fences) >= VECTORIZE_THRESHOLD:
+            self.lats = np.radians([fence.latitude for fence in self.fences])
+            self.lons = np.radians([fence.longitude for fence in self.fences])
+            self.cos_lats = np.cos(self.lats)
+            self.radii = np.array([fence.radius for fence in self.fences])
+
+    def nearest(self, latitude, longitude):
+        """Fence terdekat yang memuat titik beserta jaraknya, atau (None, None)."""
+        if self.lats is not None:
+            phi, lam = math.radians(latitude), math.radians(longitude)
+            a = np.sin((self.lats - phi) / 2) ** 2 + math.cos(phi) * self.cos_lats * np.sin((self.lons - lam) / 2) ** 2
+            distances = 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(a))
+            inside = np.flatnonzero(distances <= self.radii)
+            if inside.size == 0:
+                return None, None
+            index = int(inside[np.argmin(distances[inside])])
+            return self.fences[index], float(distances[index])
+
+        best, best_distance = None, None
+        for fence in self.fences:
+            distance = haversine(latitude, longitude, fence.latitude, fence.longitude)
+            if distance <= fence.radius and (best_distance is None or distance < best_distance):
+                best, best_distance = fence, distance
+        return best, best_distance
+
+
+EMPTY_GROUP = FenceGroup(())
+
+
+class GeofenceIndex:
+    """Indeks spasial in-memory (grid bucket) atas semua LocationSetting.
+
+    Setiap fence dimasukkan ke semua sel grid yang bersinggungan dengan bounding
+    box radiusnya, sehingga query titik hanya memeriksa fence di sel titik itu.
+    Indeks dimuat ulang setelah admin menyimpan lokasi baru, dan secara berkala
+    (GEOFENCE_REFRESH_SECONDS) agar worker lain ikut melihat perubahan.
+    """
+
+    def __init__(self, app=None):
+        self.cell_size = 0.01  # derajat, kira-kira 1.1 km
+        self.max_cells_per_fence = 400
+        self.refresh_seconds = 60
+        self._cells = {}
+        self._wide = EMPTY_GROUP  # Fence dengan radius sangat besar, selalu diperiksa
+        self._fences = []
+        self._loaded_at = None
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.cell_size = app.config.get('GEOFENCE_CELL_SIZE', self.cell_size)
+        self.refresh_seconds = app.config.get('GEOFENCE_REFRESH_SECONDS', self.refresh_seconds)
+        if np is None:
+            logger.warning("numpy is not installed: geofence distances are computed one fence at a time.")
+        app.extensions['geofence'] = self
+
+    def _cell(self, latitude, longitude):
+        return (math.floor(latitude / self.cell_size), math.floor(longitude / self.cell_size))
+
+    def build(self, fences):
+        """Bangun ulang indeks dari daftar Fence."""
+        cells = {}
+        wide = []
+        for fence in fences:
+            dlat = fence.radius / METERS_PER_DEGREE
+            dlon = fence.radius / (METERS_PER_DEGREE * max(math.cos(math.radians(fence.latitude)), 1e-6))
+            lat_min, lon_min = self._cell(fence.latitude - dlat, fence.longitude - dlon)
+            lat_max, lon_max = self._cell(fence.latitude + dlat, fence.longitude + dlon)
+            if (lat_max - lat_min + 1) * (lon_max - lon_min + 1) > self.max_cells_per_fence:
+                wide.append(fence)
+                continue
+            for lat_cell in range(lat_min, lat_max + 1):
+                for lon_cell in range(lon_min, lon_max + 1):
+                    cells.setdefault((lat_cell, lon_cell), []).append(fence)
+
+        with self._lock:
+            self._cells = {key: FenceGroup(value) for key, value in cells.items()}
+            self._wide = FenceGroup(wide)
+            self._fences = tuple(fences)
+            self._loaded_at = time.monotonic()
+
+    def refresh(self):
+        """Muat ulang semua LocationSetting dari database."""
+        from app import db
+        from app.models import LocationSetting
+
+        rows = db.session.execute(db.select(
+            LocationSetting.id, LocationSetting.latitude, LocationSetting.longitude, LocationSetting.radius
+        )).all()
+        self.build([Fence(row.id, row.latitude, row.longitude, row.radius) for row in rows])
+        logger.info(f"Geofence index refreshed with {len(rows)} locations.")
+
+    def _ensure_fresh(self):
+        if self._loaded_at is None or time.monotonic() - self._loaded_at > self.refresh_seconds:
+            self.refresh()
+
+    @property
+    def fences(self):
+        self._ensure_fresh()
+        return self._fences
+
+    def locate(self, latitude, longitude):
+        """Kembalikan fence terdekat yang memuat titik, atau None jika di luar semua fence."""
+        self._ensure_fresh()
+        fence, distance = self._cells.get(self._cell(latitude, longitude), EMPTY_GROUP).nearest(latitude, longitude)
+        if self._wide.fences:
+            wide_fence, wide_distance = self._wide.nearest(latitude, longitude)
+            if wide_fence is not None and (fence is None or wide_distance < distance):
+                fence = wide_fence
+        return fence
+
+
+geofence = GeofenceIndex()
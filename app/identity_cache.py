@@ -0,0 +1,130 @@
+import time
+import logging
+import threading
+from collections import OrderedDict
+from flask_login import UserMixin
+
+logger = logging.getLogger(__name__)
+
+
+class EmployeeSnapshot:
+    """Salinan ringan kolom Employee yang dipakai dashboard dan profil."""
+    __slots__ = ('id', 'name', 'gender', 'email', 'phone_number', 'photo_profile', 'user_id')
+
+    def __init__(self, id, name, gender, email, phone_number, photo_profile, user_id):
+        self.id = id
+        self.name = name
+        self.gender = gender
+        self.email = email
+        self.phone_number = phone_number
+        self.photo_profile = photo_profile
+        self.user_id = user_id
+
+
+class Identity(UserMixin):
+    """Objek current_user yang di-cache: kolom User plus Employee miliknya.
+
+    Bukan objek ORM, jadi aman dipakai lintas request dan thread tanpa session.
+    Hash password sengaja tidak ikut disimpan.
+    """
+
+    def __init__(self, id, email, status, employee=None):
+        self.id = id
+        self.email = email
+        self.status = status
+        self.employee = employee
+
+    def __repr__(self):
+        return f"<Identity {self.id} {self.email}>"
+
+
+class IdentityCache:
+    """Cache LRU ber-TTL per proses untuk user_loader Flask-Login.
+
+    Request yang sudah hangat tidak menjalankan query identitas sama sekali.
+    Entri dibuang saat data user/employee diubah lewat edit_employee,
+    delete_employee dan reset_password; proses lain melihat perubahan paling
+    lambat setelah IDENTITY_CACHE_TTL detik.
+    """
+
+    def __init__(self, app=None):
+        self.max_size = 1024
+        self.ttl = 60
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.max_size = app.config.get('IDENTITY_CACHE_SIZE', self.max_size)
+        self.ttl = app.config.get('IDENTITY_CACHE_TTL', self.ttl)
+        app.extensions['identity_cache'] = self
+
+    def get(self, user_id):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(user_id)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        identity = self._load(user_id)
+        if identity is not None:
+            with self._lock:
+                self._entries[user_id] = (now + self.ttl, identity)
+                self._entries.move_to_end(user_id)
+                while len(self._entries) > self.max_size:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+        return identity
+
+    def _load(self, user_id):
+        from app import db
+        from app.models import User, Employee
+
+        logger.info(f"Loading user with ID: {user_id}")  # Hanya saat cache miss
+        row = db.session.execute(
+            db.select(
+                User.id, User.email, User.status,
+                Employee.id.label('employee_id'), Employee.name, Employee.gender, Employee.email.label('employee_email'),
+                Employee.phone_number, Employee.photo_profile
+            ).outerjoin(Employee, Employee.user_id == User.id).where(User.id == user_id).limit(1)
+        ).first()
+        if row is None:
+            return None
+
+        employee = None
+        if row.employee_id is not None:
+            employee = EmployeeSnapshot(row.employee_id, row.name, row.gender, row.employee_email,
+                                        row.phone_number, row.photo_profile, row.id)
+        return Identity(row.id, row.email, row.status, employee)
+
+    def invalidate(self, user_id):
+        with self._lock:
+            if self._entries.pop(user_id, None) is not None:
+                self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+            }
+
+
+identity_cache = IdentityCache()
@@ -0,0 +1,275 @@
+import re
+import sys
+import time
+import logging
+import threading
+from collections import Counter, deque
+from contextlib import contextmanager
+from flask import g, request, has_request_context
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+
+# Batas bucket histogram latensi (detik), mengikuti default klien Prometheus
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _thread_label():
+    # Thread latar belakang dikelompokkan per jenis: photo-ingest-0..3 -> photo-ingest
+    return 'thread:' + re.sub(r'-\d+$', '', threading.current_thread().name)
+
+
+class EndpointStats:
+    __slots__ = ('requests', 'buckets', 'latency_sum', 'sql_statements', 'sql_seconds', 'file_io_seconds')
+
+    def __init__(self):
+        self.requests = Counter()  # status HTTP -> jumlah
+        self.buckets = [0] * len(LATENCY_BUCKETS)
+        self.latency_sum = 0.0
+        self.sql_statements = 0
+        self.sql_seconds = 0.0
+        self.file_io_seconds = 0.0
+
+
+class StackSampler:
+    """Profiler sampling untuk request lambat.
+
+    Satu thread latar belakang membaca stack semua thread request yang sedang
+    berjalan (sys._current_frames) setiap ``interval`` detik. Sampel disimpan
+    per request; jika request ternyata lebih lambat dari ``threshold``, stack
+    yang paling sering muncul disimpan di ``reports``, jika tidak dibuang.
+    """
+
+    def __init__(self, interval, threshold, max_reports):
+        self.interval = interval
+        self.threshold = threshold
+        self.reports = deque(maxlen=max_reports)
+        self._active = {}  # thread ident -> Counter stack
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def _ensure_thread(self):
+        # Thread dibuat saat pertama kali dibutuhkan agar aman jika app di-fork (preload)
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name='stack-sampler', daemon=True)
+            self._thread.start()
+
+    def start(self):
+        self._ensure_thread()
+        with self._lock:
+            self._active[threading.get_ident()] = Counter()
+
+    def stop(self, endpoint, duration):
+        with self._lock:
+            samples = self._active.pop(threading.get_ident(), None)
+        if samples is None or duration < self.threshold:
+            return
+        self.reports.append({
+            'endpoint': endpoint,
+            'duration_seconds': round(duration, 4),
+            'samples': sum(samples.values()),
+            'stacks': [{'stack': stack, 'count': count} for stack, count in samples.most_common(10)],
+        })
+        logger.warning(f"Slow request {endpoint} took {duration:.3f}s; profile captured.")
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            frames = sys._current_frames()
+            with self._lock:
+                for ident, samples in self._active.items():
+                    frame = frames.get(ident)
+                    if frame is not None:
+                        samples[self._collapse(frame)] += 1
+
+    @staticmethod
+    def _collapse(frame, limit=40):
+        # Format "collapsed stack" (luar;...;dalam) yang bisa langsung dipakai flamegraph
+        names = []
+        while frame is not None and len(names) < limit:
+            code = frame.f_code
+            names.append(f'{code.co_name} ({code.co_filename.rsplit("/", 1)[-1]}:{frame.f_lineno})')
+            frame = frame.f_back
+        return ';'.join(reversed(names))
+
+
+class Instrumentation:
+    """Metrik per endpoint: histogram latensi, jumlah/waktu SQL dan waktu file I/O.
+
+    Waktu SQL dicatat lewat event engine SQLAlchemy (before/after_cursor_execute)
+    dan waktu file I/O lewat ``track_file_io()``. Keduanya dijumlahkan per
+    request di ``flask.g`` lalu digabung ke statistik endpoint saat request
+    selesai. SQL yang dijalankan thread latar belakang (mis. db-writer) dicatat
+    dengan label ``thread:<nama>``. Metrik bersifat per proses worker.
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self.enabled = False
+        self.sampler = None
+        self._stats = {}
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        self.enabled = app.config.get('INSTRUMENTATION_ENABLED', True)
+        if app.config.get('PROFILE_SLOW_REQUESTS', False):
+            self.sampler = StackSampler(app.config.get('PROFILE_INTERVAL_SECONDS', 0.005),
+                                        app.config.get('SLOW_REQUEST_SECONDS', 1.0),
+                                        app.config.get('PROFILE_MAX_REPORTS', 50))
+        app.extensions['instrumentation'] = self
+        if not self.enabled:
+            return
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        app.teardown_request(self._teardown_request)
+
+    def instrument(self, engine):
+        """Pasang event hitung-dan-waktu SQL di engine."""
+        if not self.enabled:
+            return
+
+        @event.listens_for(engine, 'before_cursor_execute')
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            conn.info.setdefault('instrumentation_started', []).append(time.perf_counter())
+
+        @event.listens_for(engine, 'after_cursor_execute')
+        def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            started = conn.info['instrumentation_started'].pop()
+            self._add_sql(time.perf_counter() - started)
+
+        @event.listens_for(engine, 'handle_error')
+        def handle_error(context):
+            # Statement gagal tidak memanggil after_cursor_execute: buang waktu mulainya
+            started = context.connection.info.get('instrumentation_started') if context.connection else None
+            if started:
+                started.pop()
+
+    def _add_sql(self, seconds):
+        if has_request_context() and 'instrumentation' in g:
+            totals = g.instrumentation
+            totals[0] += 1
+            totals[1] += seconds
+            return
+        with self._lock:
+            stats = self._stats_for(_thread_label())
+            stats.sql_statements += 1
+            stats.sql_seconds += seconds
+
+    def add_file_io(self, seconds):
+        if has_request_context() and 'instrumentation' in g:
+            g.instrumentation[2] += seconds
+            return
+        with self._lock:
+            self._stats_for(_thread_label()).file_io_seconds += seconds
+
+    def _stats_for(self, endpoint):
+        stats = self._stats.get(endpoint)
+        if stats is None:
+            stats = self._stats[endpoint] = EndpointStats()
+        return stats
+
+    def _before_request(self):
+        g.instrumentation = [0, 0.0, 0.0, time.perf_counter()]  # statement, detik SQL, detik file I/O, mulai
+        if self.sampler is not None:
+            self.sampler.start()
+
+    def _teardown_request(self, exception=None):
+        totals = g.pop('instrumentation', None)
+        if totals is None:
+            return
+        statements, sql_seconds, io_seconds, started = totals
+        duration = time.perf_counter() - started
+        endpoint = request.endpoint or 'unmatched'
+        status = 500 if exception is not None else getattr(g, 'instrumentation_status', 200)
+
+        with self._lock:
+            stats = self._stats_for(endpoint)
+            stats.requests[status] += 1
+            stats.latency_sum += duration
+            for index, bound in enumerate(LATENCY_BUCKETS):
+                if duration <= bound:
+                    stats.buckets[index] += 1
+            stats.sql_statements += statements
+            stats.sql_seconds += sql_seconds
+            stats.file_io_seconds += io_seconds
+
+        if self.sampler is not None:
+            self.sampler.stop(endpoint, duration)
+
+    def _after_request(self, response):
+        # Status HTTP disimpan di sini; pencatatan di teardown agar response streaming ikut terukur
+        if 'instrumentation' in g:
+            g.instrumentation_status = response.status_code
+        return response
+
+    def slow_requests(self):
+        return list(self.sampler.reports) if self.sampler is not None else []
+
+    def render_prometheus(self, gauges=None):
+        """Semua metrik dalam format teks Prometheus (version 0.0.4)."""
+        with self._lock:
+            stats = {endpoint: (Counter(s.requests), list(s.buckets), s.latency_sum, s.sql_statements,
+                                s.sql_seconds, s.file_io_seconds)
+                     for endpoint, s in self._stats.items()}
+
+        lines = [
+            '# HELP presensi_requests_total Request HTTP per endpoint dan status.',
+            '# TYPE presensi_requests_total counter',
+        ]
+        for endpoint, (requests, *_) in sorted(stats.items()):
+            for status, count in sorted(requests.items()):
+                lines.append(f'presensi_requests_total{{endpoint="{endpoint}",status="{status}"}} {count}')
+
+        lines += [
+            '# HELP presensi_request_duration_seconds Latensi request per endpoint.',
+            '# TYPE presensi_request_duration_seconds histogram',
+        ]
+        for endpoint, (requests, buckets, latency_sum, *_) in sorted(stats.items()):
+            total = sum(requests.values())
+            if not total:
+                continue
+            for bound, count in zip(LATENCY_BUCKETS, buckets):
+                lines.append(f'presensi_request_duration_seconds_bucket{{endpoint="{endpoint}",le="{bound}"}} {count}')
+            lines.append(f'presensi_request_duration_seconds_bucket{{endpoint="{endpoint}",le="+Inf"}} {total}')
+            lines.append(f'presensi_request_duration_seconds_sum{{endpoint="{endpoint}"}} {latency_sum}')
+            lines.append(f'presensi_request_duration_seconds_count{{endpoint="{endpoint}"}} {total}')
+
+        for name, index, help_text in (
+            ('presensi_sql_statements_total', 3, 'Jumlah statement SQL per endpoint.'),
+            ('presensi_sql_seconds_total', 4, 'Waktu eksekusi SQL per endpoint.'),
+            ('presensi_file_io_seconds_total', 5, 'Waktu file I/O (upload dan penyimpanan foto) per endpoint.'),
+        ):
+            lines += [f'# HELP {name} {help_text}', f'# TYPE {name} counter']
+            for endpoint, values in sorted(stats.items()):
+                lines.append(f'{name}{{endpoint="{endpoint}"}} {values[index]}')
+
+        # Metrik komponen lain (write queue, pool, photo ingest, ...) sebagai gauge
+        for prefix, values in (gauges or {}).items():
+            for key, value in sorted(values.items()):
+                if isinstance(value, bool) or not isinstance(value, (int, float)):
+                    continue
+                name = f'presensi_{prefix}_{key}'
+                lines += [f'# TYPE {name} gauge', f'{name} {value}']
+
+        return '\n'.join(lines) + '\n'
+
+
+instrumentation = Instrumentation()
+
+
+@contextmanager
+def track_file_io():
+    """Catat waktu blok file I/O ke request (atau thread latar belakang) yang sedang berjalan."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        if instrumentation.enabled:
+            instrumentation.add_file_io(time.perf_counter() - started)
@@ -0,0 +1,104 @@
+import os
+import queue
+import atexit
+import logging
+import threading
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+LOG_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+
+_listener = None
+_queue_handler = None
+_lock = threading.Lock()
+
+
+class SamplingFilter(logging.Filter):
+    """Loloskan hanya 1 dari N record INFO untuk logger yang volumenya tinggi.
+
+    ``rates`` memetakan nama logger (modul) atau ``modul:fungsi`` ke N.
+    WARNING ke atas selalu lolos.
+    Sampling dilakukan sebelum record masuk antrian, jadi record yang dibuang
+    tidak pernah diformat maupun ditulis ke file.
+    """
+
+    def __init__(self, rates):
+        super().__init__()
+        self.rates = dict(rates or {})
+        self._counters = {}
+
+    def filter(self, record):
+        if record.levelno != logging.INFO:
+            return True
+        key = f'{record.name}:{record.funcName}'
+        rate = self.rates.get(key)
+        if rate is None:
+            key = record.name
+            rate = self.rates.get(key)
+        if not rate or rate <= 1:
+            return True
+        count = self._counters.get(key, 0)
+        self._counters[key] = count + 1
+        return count % rate == 0
+
+
+def configure_logging(config):
+    """Pasang satu pipeline logging non-blocking untuk seluruh aplikasi.
+
+    Handler di thread request hanya memasukkan record ke antrian
+    (QueueHandler); QueueListener di thread latar belakang yang menulis ke
+    konsol dan ke file dengan rotasi berdasarkan ukuran. Aman dipanggil
+    berkali-kali: pemanggilan berikutnya tidak memasang handler baru.
+    """
+    global _listener, _queue_handler
+    with _lock:
+        if _listener is not None:
+            return _listener
+
+        formatter = logging.Formatter(LOG_FORMAT)
+        stream_handler = logging.StreamHandler()  # Output log ke konsol
+        stream_handler.setFormatter(formatter)
+        file_handler = RotatingFileHandler(
+            getattr(config, 'LOG_FILE', 'app.log'),
+            maxBytes=getattr(config, 'LOG_MAX_BYTES', 10 * 1024 * 1024),
+            backupCount=getattr(config, 'LOG_BACKUP_COUNT', 5)
+        )
+        file_handler.setFormatter(formatter)
+
+        log_queue = queue.Queue(-1)
+        queue_handler = QueueHandler(log_queue)
+        queue_handler.addFilter(SamplingFilter(getattr(config, 'LOG_SAMPLE_RATES', {})))
+
+        root = logging.getLogger()
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+        root.addHandler(queue_handler)
+        root.setLevel(getattr(config, 'LOG_LEVEL', 'INFO'))
+
+        _queue_handler = queue_handler
+        _listener = QueueListener(log_queue, stream_handler, file_handler, respect_handler_level=True)
+        _listener.start()
+        atexit.register(shutdown_logging)
+        os.register_at_fork(after_in_child=_restart_after_fork)
+        return _listener
+
+
+def _restart_after_fork():
+    # Thread listener tidak ikut ter-fork (mis. gunicorn dengan preload_app):
+    # buat antrian dan listener baru di proses anak dengan handler yang sama.
+    global _listener, _lock
+    _lock = threading.Lock()
+    if _listener is None:
+        return
+    log_queue = queue.Queue(-1)
+    _queue_handler.queue = log_queue
+    _listener = QueueListener(log_queue, *_listener.handlers, respect_handler_level=True)
+    _listener.start()
+
+
+def shutdown_logging():
+    """Hentikan listener dan tulis semua record yang masih ada di antrian."""
+    global _listener
+    with _lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
@@ -0,0 +1,308 @@
+import random
+import smtplib
+import logging
+import threading
+import time
+import uuid
+import datetime
+from email.message import EmailMessage
+
+logger = logging.getLogger(__name__)
+
+MAX_RETRY_DELAY_SECONDS = 3600
+
+
+class SMTPConnectionPool:
+    """Pool koneksi SMTP yang dipakai ulang antar batch.
+
+    Membuka sesi SMTP (TCP, STARTTLS, AUTH) ke server seperti smtp.gmail.com
+    bisa memakan ratusan milidetik sampai beberapa detik. Koneksi yang masih
+    hidup dikembalikan ke pool dan dipinjamkan ke batch berikutnya; koneksi
+    yang idle lebih lama dari ``idle_seconds`` ditutup.
+    """
+
+    def __init__(self, config, size):
+        self.host = config.get('MAIL_SERVER', 'localhost')
+        self.port = config.get('MAIL_PORT', 25)
+        self.use_tls = config.get('MAIL_USE_TLS', False)
+        self.use_ssl = config.get('MAIL_USE_SSL', False)
+        self.username = config.get('MAIL_USERNAME')
+        self.password = config.get('MAIL_PASSWORD')
+        self.timeout = config.get('MAIL_TIMEOUT', 30)
+        self.idle_seconds = config.get('MAIL_SMTP_IDLE_SECONDS', 60)
+        self.size = size
+        self._idle = []
+        self._lock = threading.Lock()
+        self.opened = 0
+
+    def _open(self):
+        if self.use_ssl:
+            connection = smtplib.SMTP_SSL(self.host, self.port, timeout=self.timeout)
+        else:
+            connection = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+            if self.use_tls:
+                connection.starttls()
+        if self.username:
+            connection.login(self.username, self.password)
+        with self._lock:
+            self.opened += 1
+        return connection
+
+    def acquire(self):
+        """Pinjam koneksi idle yang masih segar, atau buka koneksi baru."""
+        now = time.monotonic()
+        while True:
+            with self._lock:
+                if not self._idle:
+                    break
+                connection, last_used = self._idle.pop()
+            if now - last_used <= self.idle_seconds:
+                return connection
+            self.discard(connection)
+        return self._open()
+
+    def release(self, connection):
+        with self._lock:
+            if len(self._idle) < self.size:
+                self._idle.append((connection, time.monotonic()))
+                return
+        self.discard(connection)
+
+    def discard(self, connection):
+        try:
+            connection.quit()
+        except (smtplib.SMTPException, OSError):
+            connection.close()
+
+    def close_all(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for connection, _ in idle:
+            self.discard(connection)
+
+
+class MailOutbox:
+    """Antrian email keluar yang persisten (tabel email_outbox).
+
+    Request hanya menulis baris outbox lalu kembali; pengiriman SMTP yang bisa
+    memakan beberapa detik dilakukan worker thread di latar belakang. Setiap
+    worker mengklaim satu batch email yang jatuh tempo dengan UPDATE bersyarat
+    (aman untuk banyak worker/proses), mengirimnya lewat satu koneksi SMTP dari
+    pool, lalu mencatat hasilnya. Kegagalan sementara dijadwalkan ulang dengan
+    backoff eksponensial; penolakan permanen (kode 5xx) atau percobaan yang
+    habis menandai email FAILED.
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self.pool = None
+        self._workers = []
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._metrics = {'queued': 0, 'batches': 0, 'sent': 0, 'retried': 0, 'failed': 0}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        self.workers = app.config.get('MAIL_OUTBOX_WORKERS', 2)
+        self.batch_size = app.config.get('MAIL_OUTBOX_BATCH_SIZE', 20)
+        self.max_attempts = app.config.get('MAIL_OUTBOX_MAX_ATTEMPTS', 6)
+        self.retry_seconds = app.config.get('MAIL_OUTBOX_RETRY_SECONDS', 30)
+        self.poll_seconds = app.config.get('MAIL_OUTBOX_POLL_SECONDS', 10)
+        self.sender = app.config.get('MAIL_DEFAULT_SENDER')
+        # Klaim yang tidak selesai (worker mati di tengah batch) boleh diambil ulang setelah ini
+        self.claim_timeout = app.config.get('MAIL_TIMEOUT', 30) * (self.batch_size + 1)
+        self.pool = SMTPConnectionPool(app.config, self.workers)
+        # Email PENDING/retry dari sebelum restart harus tetap terkirim walau belum ada email baru
+        app.before_request(self._ensure_workers)
+        app.extensions['mail_outbox'] = self
+
+    def _ensure_workers(self):
+        # Worker dibuat saat pertama kali dibutuhkan agar aman jika app di-fork (preload)
+        if self._workers or not self.workers:
+            return
+        with self._lock:
+            if self._workers:
+                return
+            for index in range(self.workers):
+                worker = threading.Thread(target=self._run, name=f'mail-outbox-{index}', daemon=True)
+                worker.start()
+                self._workers.append(worker)
+
+    def queue(self, recipient, subject, body, html=None):
+        """Tambahkan email ke outbox dalam session yang sedang berjalan (tanpa commit)."""
+        from app import db
+        from app.models import EmailOutbox
+
+        email = EmailOutbox(recipient=recipient, subject=subject, body=body, html=html,
+                            status=EmailOutbox.PENDING, attempts=0, next_attempt_at=datetime.datetime.now())
+        db.session.add(email)
+        return email
+
+    def send(self, recipient, subject, body, html=None):
+        """Simpan email ke outbox, bangunkan worker, dan kembalikan id outbox-nya."""
+        from app import db
+        from app.write_queue import write_queue
+
+        def write():
+            email = self.queue(recipient, subject, body, html)
+            db.session.flush()
+            return email.id
+
+        email_id = write_queue.run(write)
+        with self._lock:
+            self._metrics['queued'] += 1
+        self._ensure_workers()
+        self._wake.set()
+        return email_id
+
+    def _run(self):
+        from app import db
+
+        with self.app.app_context():
+            while True:
+                try:
+                    processed = self.process_batch()
+                except Exception as e:
+                    logger.error(f"Mail outbox worker error: {e}")
+                    processed = 0
+                finally:
+                    db.session.remove()
+                if not processed:
+                    self._wake.wait(self.poll_seconds)
+                    self._wake.clear()
+
+    def _claim(self):
+        """Klaim satu batch email yang jatuh tempo untuk worker ini."""
+        from app import db
+        from app.models import EmailOutbox
+        from app.write_queue import write_queue
+
+        token = uuid.uuid4().hex
+        now = datetime.datetime.now()
+        stale = now - datetime.timedelta(seconds=self.claim_timeout)
+        due = db.or_(
+            db.and_(EmailOutbox.status == EmailOutbox.PENDING, EmailOutbox.next_attempt_at <= now),
+            db.and_(EmailOutbox.status == EmailOutbox.SENDING, EmailOutbox.claimed_at < stale),
+        )
+        candidates = (db.select(EmailOutbox.id).where(due)
+                      .order_by(EmailOutbox.next_attempt_at).limit(self.batch_size))
+
+        def write():
+            # Kondisi "due" diulang di UPDATE agar dua worker tidak mengklaim baris yang sama
+            return db.session.execute(
+                db.update(EmailOutbox)
+                .where(EmailOutbox.id.in_(candidates.scalar_subquery()), due)
+                .values(status=EmailOutbox.SENDING, claimed_by=token, claimed_at=now)
+                .returning(EmailOutbox.id, EmailOutbox.recipient, EmailOutbox.subject,
+                           EmailOutbox.body, EmailOutbox.html, EmailOutbox.attempts)
+                .execution_options(synchronize_session=False)
+            ).all()
+
+        return write_queue.run(write)
+
+    def _build_message(self, row):
+        message = EmailMessage()
+        message['Subject'] = row.subject
+        message['From'] = self.sender
+        message['To'] = row.recipient
+        message.set_content(row.body)
+        if row.html:
+            message.add_alternative(row.html, subtype='html')
+        return message
+
+    def _retry_delay(self, attempts):
+        delay = min(self.retry_seconds * 2 ** (attempts - 1), MAX_RETRY_DELAY_SECONDS)
+        return delay * random.uniform(0.8, 1.2)  # Jitter agar retry tidak serentak
+
+    def process_batch(self):
+        """Kirim satu batch email yang jatuh tempo; kembalikan jumlah email yang diproses."""
+        rows = self._claim()
+        if not rows:
+            return 0
+
+        outcomes = []  # (row, error, permanent)
+        try:
+            connection = self.pool.acquire()
+        except (smtplib.SMTPException, OSError) as e:
+            # Server SMTP tidak bisa dihubungi: seluruh batch dicoba lagi nanti
+            outcomes = [(row, e, False) for row in rows]
+        else:
+            for row in rows:
+                message = self._build_message(row)
+                try:
+                    try:
+                        connection.send_message(message)
+                    except smtplib.SMTPServerDisconnected:
+                        # Koneksi dari pool sudah ditutup server: buka baru dan coba sekali lagi
+                        self.pool.discard(connection)
+                        connection = self.pool.acquire()
+                        connection.send_message(message)
+                    outcomes.append((row, None, False))
+                except smtplib.SMTPRecipientsRefused as e:
+                    outcomes.append((row, e, True))
+                except smtplib.SMTPResponseException as e:
+                    outcomes.append((row, e, 500 <= e.smtp_code < 600))
+                except (smtplib.SMTPException, OSError) as e:
+                    outcomes.append((row, e, False))
+            if all(error is None or permanent for _, error, permanent in outcomes):
+                self.pool.release(connection)
+            else:
+                self.pool.discard(connection)
+
+        self._record(outcomes)
+        return len(rows)
+
+    def _record(self, outcomes):
+        from app import db
+        from app.models import EmailOutbox
+        from app.write_queue import write_queue
+
+        now = datetime.datetime.now()
+        sent_ids = [row.id for row, error, _ in outcomes if error is None]
+        counts = {'sent': len(sent_ids), 'retried': 0, 'failed': 0}
+
+        def write():
+            if sent_ids:
+                db.session.execute(
+                    db.update(EmailOutbox).where(EmailOutbox.id.in_(sent_ids))
+                    .values(status=EmailOutbox.SENT, attempts=EmailOutbox.attempts + 1, sent_at=now,
+                            claimed_by=None, last_error=None)
+                    .execution_options(synchronize_session=False)
+                )
+            for row, error, permanent in outcomes:
+                if error is None:
+                    continue
+                attempts = row.attempts + 1
+                values = {'attempts': attempts, 'claimed_by': None, 'last_error': str(error)[:1000]}
+                if permanent or attempts >= self.max_attempts:
+                    values['status'] = EmailOutbox.FAILED
+                    counts['failed'] += 1
+                    logger.error(f"Giving up on outbox email {row.id} to {row.recipient} after {attempts} attempts: {error}")
+                else:
+                    values['status'] = EmailOutbox.PENDING
+                    values['next_attempt_at'] = now + datetime.timedelta(seconds=self._retry_delay(attempts))
+                    counts['retried'] += 1
+                    logger.warning(f"Outbox email {row.id} to {row.recipient} failed, will retry: {error}")
+                db.session.execute(
+                    db.update(EmailOutbox).where(EmailOutbox.id == row.id).values(**values)
+                    .execution_options(synchronize_session=False)
+                )
+
+        write_queue.run(write)
+        with self._lock:
+            self._metrics['batches'] += 1
+            for key, value in counts.items():
+                self._metrics[key] += value
+
+    def metrics(self):
+        """Snapshot metrik outbox untuk endpoint admin."""
+        with self._lock:
+            snapshot = dict(self._metrics)
+        snapshot['workers'] = self.workers
+        snapshot['smtp_connections_opened'] = self.pool.opened if self.pool else 0
+        return snapshot
+
+
+mail_outbox = MailOutbox()
@@ -13,13 +13,7 @@ Base = declarative_base()
 # Impor db di bagian bawah file
 from . import db
 
-# Konfigurasi Logging
-logging.basicConfig(level=logging.INFO,  # Atur level log yang diinginkan (INFO, ERROR, DEBUG, dsb)
-                    format='%(asctime)s - %(levelname)s - %(message)s',
-                    handlers=[
-                        logging.StreamHandler(),  # Output log ke konsol
-                        logging.FileHandler('app.log')  # Simpan log ke file app.log
-                    ])
+logger = logging.getLogger(__name__)
 
 class User(db.Model, UserMixin):
     __tablename__ = 'users'
@@ -32,7 +26,7 @@ class User(db.Model, UserMixin):
     employees = db.relationship('Employee', back_populates='user', lazy=True, cascade="all, delete-orphan")
 
     def get_reset_token(self, expires_in=600):
-        logging.info(f"Generating reset token for user with ID: {self.id}")  # Log saat token reset dibuat
+        logger.info(f"Generating reset token for user with ID: {self.id}")  # Log saat token reset dibuat
         return jwt.encode({'reset_password': self.id, 'exp': datetime.datetime.utcnow() + datetime.timedelta(seconds=expires_in)},
                            current_app.config['SECRET_KEY'], algorithm='HS256')
 
@@ -40,9 +34,9 @@ class User(db.Model, UserMixin):
     def verify_reset_token(token):
         try:
             user_id = jwt.decode(token, current_app.config['SECRET_KEY'], algorithms=['HS256'])['reset_password']
-            logging.info(f"Token verified for user with ID: {user_id}")  # Log setelah token diverifikasi
+            logger.info(f"Token verified for user with ID: {user_id}")  # Log setelah token diverifikasi
         except Exception as e:
-            logging.error(f"Token verification failed: {str(e)}")  # Log error jika token tidak valid
+            logger.error(f"Token verification failed: {str(e)}")  # Log error jika token tidak valid
             return None
         return User.query.get(user_id)
 
@@ -56,7 +50,10 @@ class Employee(db.Model):
     email = db.Column(db.String(255), nullable=False, unique=True)
     phone_number = db.Column(db.String(15), nullable=False)
     password = db.Column(db.String(255), nullable=False)
-    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    # Unik: attendance.employee_id mereferensikan kolom ini, dan FK harus menunjuk kolom unik
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, unique=True)
+    # Dinaikkan saat baris absensi yang sudah ada berubah (clock out, foto selesai diproses); bagian dari ETag rekap
+    attendance_version = db.Column(db.Integer, nullable=False, default=0, server_default='0')
 
     # Relasi ke User
     user = db.relationship('User', back_populates='employees')
@@ -64,6 +61,9 @@ class Employee(db.Model):
     # Relasi ke Attendance
     attendances = db.relationship('Attendance', back_populates='employee', lazy=True, cascade="all, delete-orphan")
 
+    # Relasi ke ringkasan harian; ikut terhapus bersama karyawan
+    daily_summaries = db.relationship('AttendanceDailySummary', lazy=True, cascade="all, delete-orphan")
+
 
 class AttendanceStatus(Enum):
     ALPHA = "ALPHA"
@@ -74,10 +74,19 @@ class AttendanceStatus(Enum):
 
 class Attendance(db.Model):
     __tablename__ = 'attendance'
+    __table_args__ = (
+        # Satu catatan per karyawan per hari; juga melayani get_attendance_for_today dan recap
+        db.UniqueConstraint('employee_id', 'date', name='uq_attendance_employee_id_date'),
+        # clock_out: filter employee_id + status, urut id desc
+        db.Index('ix_attendance_employee_id_status_id', 'employee_id', 'status', 'id'),
+        # ETag rekap: id terakhir milik karyawan (ORDER BY id DESC LIMIT 1)
+        db.Index('ix_attendance_employee_id_id', 'employee_id', 'id'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     employee_id = db.Column(db.Integer, db.ForeignKey('employees.user_id'), nullable=False)
-    status = db.Column(db.Enum(AttendanceStatus), nullable=False, default=AttendanceStatus.ALPHA)
+    # native_enum=False: disimpan sebagai VARCHAR di semua database (tanpa tipe ENUM PostgreSQL)
+    status = db.Column(db.Enum(AttendanceStatus, native_enum=False, length=20), nullable=False, default=AttendanceStatus.ALPHA)
     date = db.Column(db.DateTime, nullable=False)
     time = db.Column(db.DateTime, nullable=False)
     time_out = db.Column(db.DateTime)
@@ -85,6 +94,8 @@ class Attendance(db.Model):
     latitude = db.Column(db.Float)
     longitude = db.Column(db.Float)
     reason = db.Column(db.Text)
+    # Idempotency-Key dari request clock out; retry dengan key yang sama tidak menulis ulang
+    clock_out_key = db.Column(db.String(64))
 
     # Relasi ke Employee
     employee = db.relationship('Employee', back_populates='attendances', lazy=True)
@@ -92,13 +103,56 @@ class Attendance(db.Model):
     def save(self):
         """Override save method to log when attendance is saved or updated"""
         if self.id is None:
-            logging.info(f"Creating new attendance record for employee ID: {self.employee_id}")
+            logger.info(f"Creating new attendance record for employee ID: {self.employee_id}")
         else:
-            logging.info(f"Updating attendance record ID: {self.id} for employee ID: {self.employee_id}")
+            logger.info(f"Updating attendance record ID: {self.id} for employee ID: {self.employee_id}")
         db.session.add(self)
         db.session.commit()
 
 
+class AttendanceDailySummary(db.Model):
+    """Ringkasan absensi per karyawan per hari, diperbarui setiap kali Attendance ditulis."""
+    __tablename__ = 'attendance_daily_summary'
+    __table_args__ = (
+        db.UniqueConstraint('employee_id', 'date', name='uq_attendance_daily_summary_employee_id_date'),
+        db.Index('ix_attendance_daily_summary_date_status', 'date', 'status'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    employee_id = db.Column(db.Integer, db.ForeignKey('employees.user_id', ondelete='CASCADE'), nullable=False)
+    date = db.Column(db.Date, nullable=False)
+    status = db.Column(db.Enum(AttendanceStatus, native_enum=False, length=20), nullable=False, default=AttendanceStatus.ALPHA)
+    clock_in_time = db.Column(db.DateTime)
+    clock_out_time = db.Column(db.DateTime)
+    reason = db.Column(db.Text)
+    record_count = db.Column(db.Integer, nullable=False, default=0)
+
+    def apply(self, attendance, new_record=True):
+        """Gabungkan satu catatan Attendance ke ringkasan hari ini.
+
+        ``new_record=False`` untuk perubahan baris yang sudah dihitung (mis.
+        clock out menutup baris clock in), sehingga record_count tidak bertambah.
+        """
+        if new_record:
+            self.record_count = (self.record_count or 0) + 1
+        if attendance.status == AttendanceStatus.CLOCK_IN:
+            if self.clock_in_time is None or attendance.time < self.clock_in_time:
+                self.clock_in_time = attendance.time
+            # Clock in tidak menimpa status CLOCK_OUT/IJIN yang sudah tercatat
+            if self.status in (None, AttendanceStatus.ALPHA):
+                self.status = AttendanceStatus.CLOCK_IN
+        elif attendance.status == AttendanceStatus.CLOCK_OUT:
+            if self.clock_in_time is None:
+                self.clock_in_time = attendance.time
+            self.clock_out_time = attendance.time_out
+            self.status = AttendanceStatus.CLOCK_OUT
+        elif attendance.status == AttendanceStatus.IJIN:
+            self.status = AttendanceStatus.IJIN
+            self.reason = attendance.reason
+        elif self.status is None:
+            self.status = attendance.status
+
+
 class LocationSetting(db.Model):
     __tablename__ = 'location_settings'
 
@@ -118,6 +172,34 @@ class LocationSetting(db.Model):
     
     def save(self):
         """Override save method to log location setting changes"""
-        logging.info(f"Saving location setting ID: {self.id} with latitude: {self.latitude}, longitude: {self.longitude}")
+        logger.info(f"Saving location setting ID: {self.id} with latitude: {self.latitude}, longitude: {self.longitude}")
         db.session.add(self)
         db.session.commit()
+
+
+class EmailOutbox(db.Model):
+    """Email yang menunggu dikirim oleh worker outbox (lihat app/mail_outbox.py)."""
+    __tablename__ = 'email_outbox'
+    __table_args__ = (
+        # Worker mengambil email PENDING yang jadwal kirimnya sudah lewat
+        db.Index('ix_email_outbox_status_next_attempt_at', 'status', 'next_attempt_at'),
+    )
+
+    PENDING = 'PENDING'
+    SENDING = 'SENDING'
+    SENT = 'SENT'
+    FAILED = 'FAILED'
+
+    id = db.Column(db.Integer, primary_key=True)
+    recipient = db.Column(db.String(255), nullable=False)
+    subject = db.Column(db.String(255), nullable=False)
+    body = db.Column(db.Text, nullable=False)
+    html = db.Column(db.Text)
+    status = db.Column(db.String(10), nullable=False, default=PENDING)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    next_attempt_at = db.Column(db.DateTime, nullable=False, default=datetime.datetime.now)
+    claimed_by = db.Column(db.String(32))
+    claimed_at = db.Column(db.DateTime)
+    last_error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.datetime.now)
+    sent_at = db.Column(db.DateTime)
@@ -0,0 +1,162 @@
+import os
+import re
+import time
+import logging
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import bcrypt
+
+logger = logging.getLogger(__name__)
+
+_COST_PATTERN = re.compile(r'^\$2[abxy]?\$(\d{2})\$')
+
+
+def _hashpw(password, rounds):
+    """Hash bcrypt di proses worker (harus fungsi top-level agar bisa di-pickle)."""
+    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds)).decode('utf-8')
+
+
+def _checkpw(password, hashed):
+    """Verifikasi bcrypt di proses worker; hash rusak dianggap tidak cocok."""
+    try:
+        return bcrypt.checkpw(password.encode('utf-8'), hashed.encode('utf-8'))
+    except ValueError:
+        return False
+
+
+def hash_cost(hashed):
+    """Cost factor (log rounds) dari hash bcrypt, atau None jika formatnya tidak dikenal."""
+    match = _COST_PATTERN.match(hashed or '')
+    return int(match.group(1)) if match else None
+
+
+class PasswordHasherBusy(Exception):
+    """Antrian hashing penuh; request sebaiknya dijawab 503 dan dicoba lagi."""
+
+
+class PasswordHasher:
+    """Layanan hash password bcrypt terpusat untuk login, reset password dan import.
+
+    Hash dan verifikasi dijalankan di process pool sehingga kerja CPU bcrypt
+    tidak memegang GIL worker web: thread request lain tetap dilayani selama
+    lonjakan login saat pergantian shift. Jumlah verifikasi yang menunggu
+    dibatasi PASSWORD_HASH_MAX_PENDING; jika penuh lebih lama dari
+    PASSWORD_HASH_QUEUE_TIMEOUT detik, PasswordHasherBusy dilempar. Dengan
+    PASSWORD_HASH_WORKERS=0 semua hashing berjalan langsung di thread pemanggil.
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self.rounds = 12
+        self.workers = 0
+        self.max_pending = 64
+        self.queue_timeout = 5.0
+        self._executor = None
+        self._executor_pid = None
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self._lock = threading.Lock()
+        self._metrics = {
+            'hashed': 0,
+            'verified': 0,
+            'verify_failed': 0,
+            'rehashed': 0,
+            'rejected_busy': 0,
+            'pending': 0,
+            'total_verify_seconds': 0.0,
+        }
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        self.configure(
+            rounds=app.config.get('BCRYPT_LOG_ROUNDS', 12),
+            workers=app.config.get('PASSWORD_HASH_WORKERS', os.cpu_count() or 1),
+            max_pending=app.config.get('PASSWORD_HASH_MAX_PENDING', 64),
+            queue_timeout=app.config.get('PASSWORD_HASH_QUEUE_TIMEOUT', 5.0),
+        )
+        app.extensions['password_hasher'] = self
+
+    def configure(self, rounds, workers, max_pending=64, queue_timeout=5.0):
+        self.rounds = rounds
+        self.workers = workers
+        self.max_pending = max_pending
+        self.queue_timeout = queue_timeout
+        self._slots = threading.BoundedSemaphore(max_pending)
+
+    def _pool(self):
+        # Pool dibuat saat pertama kali dibutuhkan dan dibuat ulang setelah fork (preload)
+        pid = os.getpid()
+        if self._executor is not None and self._executor_pid == pid:
+            return self._executor
+        with self._lock:
+            if self._executor is None or self._executor_pid != pid:
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+                self._executor_pid = pid
+            return self._executor
+
+    def _call(self, func, *args):
+        if not self.workers:
+            return func(*args)
+        if not self._slots.acquire(timeout=self.queue_timeout):
+            with self._lock:
+                self._metrics['rejected_busy'] += 1
+            raise PasswordHasherBusy()
+        with self._lock:
+            self._metrics['pending'] += 1
+        try:
+            return self._pool().submit(func, *args).result()
+        finally:
+            with self._lock:
+                self._metrics['pending'] -= 1
+            self._slots.release()
+
+    def hash(self, password):
+        """Hash password dengan cost factor saat ini."""
+        hashed = self._call(_hashpw, password, self.rounds)
+        with self._lock:
+            self._metrics['hashed'] += 1
+        return hashed
+
+    def hash_many(self, passwords):
+        """Hash banyak password sekaligus (bulk import), dibagi rata ke semua worker."""
+        passwords = list(passwords)
+        if not self.workers or len(passwords) < 2:
+            hashes = [_hashpw(password, self.rounds) for password in passwords]
+        else:
+            hashes = list(self._pool().map(_hashpw, passwords, [self.rounds] * len(passwords), chunksize=16))
+        with self._lock:
+            self._metrics['hashed'] += len(hashes)
+        return hashes
+
+    def verify(self, hashed, password):
+        """True jika password cocok dengan hash tersimpan."""
+        started = time.perf_counter()
+        matched = self._call(_checkpw, password, hashed)
+        with self._lock:
+            self._metrics['verified'] += 1
+            self._metrics['total_verify_seconds'] += time.perf_counter() - started
+            if not matched:
+                self._metrics['verify_failed'] += 1
+        return matched
+
+    def needs_rehash(self, hashed):
+        """True jika hash tersimpan memakai cost factor selain BCRYPT_LOG_ROUNDS."""
+        return hash_cost(hashed) != self.rounds
+
+    def record_rehash(self):
+        with self._lock:
+            self._metrics['rehashed'] += 1
+
+    def metrics(self):
+        """Snapshot metrik hashing untuk endpoint admin."""
+        with self._lock:
+            snapshot = dict(self._metrics)
+        snapshot['rounds'] = self.rounds
+        snapshot['workers'] = self.workers
+        snapshot['max_pending'] = self.max_pending
+        return snapshot
+
+
+password_hasher = PasswordHasher()
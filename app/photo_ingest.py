@@ -0,0 +1,342 @@
+import os
+import io
+import queue
+import hashlib
+import logging
+import threading
+import time
+import uuid
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # Pillow opsional: tanpa Pillow foto hanya dipindahkan tanpa thumbnail
+    Image = None
+
+try:
+    import fcntl
+except ImportError:  # Windows (server dev satu proses): semua spool milik proses lain dianggap yatim
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+SPOOL_SUFFIX = '.spool'
+PARTIAL_SUFFIX = '.part'
+
+
+def spool_name(owner, attendance_id, namespace, digest, extension):
+    """Nama file spool yang memuat seluruh job: ``<owner>-<attendance_id>-<namespace>-<sha256><ext>.spool``."""
+    return f'{owner}-{attendance_id}-{namespace or "_"}-{digest}{extension}{SPOOL_SUFFIX}'
+
+
+def parse_spool_name(name):
+    """Kebalikan spool_name(); ValueError untuk nama yang tidak dikenal."""
+    owner, attendance_id, namespace, rest = name[:-len(SPOOL_SUFFIX)].split('-', 3)
+    digest, extension = rest[:64], rest[64:]
+    if not name.endswith(SPOOL_SUFFIX) or len(digest) != 64:
+        raise ValueError(f'Not a spool file: {name}')
+    return owner, int(attendance_id), '' if namespace == '_' else namespace, digest, extension
+
+
+class PhotoIngestor:
+    """Pipeline latar belakang untuk foto absensi.
+
+    Request hanya men-spool upload ke disk lalu langsung kembali. Worker thread
+    menulis file akhir, menghapus EXIF, membuat thumbnail JPEG/WebP, lalu
+    memperbarui kolom Attendance.photo. Antrian dibatasi; jika penuh, foto
+    diproses langsung di thread request (backpressure) dan tercatat di metrik.
+
+    Antrian hanya ada di memori, jadi nama file spool memuat seluruh job dan
+    pemiliknya (token per proses yang memegang flock pada ``.owner-<token>``).
+    Setelah reload/restart worker, spool milik proses yang sudah mati diklaim
+    dengan rename atomik lalu dijadwalkan ulang (lihat recover_spool).
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self._queue = None
+        self._workers = []
+        self._lock = threading.Lock()
+        self._recover_lock = threading.Lock()
+        self._owner = None
+        self._owner_file = None
+        self._metrics = {
+            'submitted': 0,
+            'recovered': 0,
+            'completed': 0,
+            'failed': 0,
+            'inline_fallback': 0,
+            'max_queue_depth': 0,
+            'total_processing_seconds': 0.0,
+        }
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        self.workers = app.config.get('PHOTO_INGEST_WORKERS', 4)
+        self.queue_size = app.config.get('PHOTO_INGEST_QUEUE_SIZE', 64)
+        self.spool_folder = app.config.get('PHOTO_SPOOL_FOLDER') or os.path.join(app.instance_path, 'photo_spool')
+        self.thumbnail_size = app.config.get('PHOTO_THUMBNAIL_SIZE', (320, 320))
+        self.recover_seconds = app.config.get('PHOTO_SPOOL_RECOVER_SECONDS', 60)
+        os.makedirs(self.spool_folder, exist_ok=True)
+        # Worker mulai di request pertama agar spool sisa restart diproses walau belum ada clock in baru
+        app.before_request(self._ensure_workers)
+        if Image is None:
+            logger.warning("Pillow is not installed: attendance photos are stored as uploaded, "
+                           "without EXIF (GPS) stripping or thumbnails.")
+        app.extensions['photo_ingestor'] = self
+
+    def _ensure_workers(self):
+        # Worker dibuat saat pertama kali dibutuhkan agar aman jika app di-fork (preload)
+        if self._queue is not None:
+            return
+        with self._lock:
+            if self._queue is not None:
+                return
+            self._claim_owner()
+            self._queue = queue.Queue(maxsize=self.queue_size)
+            for index in range(self.workers):
+                worker = threading.Thread(target=self._run, name=f'photo-ingest-{index}', daemon=True)
+                worker.start()
+                self._workers.append(worker)
+
+    def _claim_owner(self):
+        # Token pemilik dibuat setelah fork; flock dilepas OS saat proses mati
+        self._owner = uuid.uuid4().hex
+        if fcntl is not None:
+            # Dikunci dulu baru diberi nama akhir: file pemilik tidak pernah terlihat tanpa lock
+            path = os.path.join(self.spool_folder, f'.owner-{self._owner}')
+            self._owner_file = open(f'{path}.tmp', 'w')
+            fcntl.flock(self._owner_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            os.rename(f'{path}.tmp', path)
+
+    def _owner_alive(self, owner):
+        if owner == self._owner:
+            return True
+        if fcntl is None:
+            return False
+        try:
+            with open(os.path.join(self.spool_folder, f'.owner-{owner}'), 'r') as owner_file:
+                fcntl.flock(owner_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except FileNotFoundError:
+            return False
+        except BlockingIOError:
+            return True
+        return False
+
+    def spool(self, file_storage, attendance_id, namespace=''):
+        """Simpan stream upload ke folder spool; kembalikan job untuk worker.
+
+        Hash dihitung sambil menulis sehingga photo_storage tidak perlu
+        membaca ulang file spool. File ditulis dengan akhiran .part lalu
+        di-rename ke spool_name() agar recover_spool tidak mengambil upload
+        yang belum selesai.
+        """
+        from app.instrumentation import track_file_io
+        from app.photo_storage import photo_extension
+
+        extension = photo_extension(file_storage.filename)
+        digest = hashlib.sha256()
+        partial_path = os.path.join(self.spool_folder, f'{self._owner}-{uuid.uuid4().hex}{PARTIAL_SUFFIX}')
+        try:
+            with track_file_io(), open(partial_path, 'wb') as spool_file:
+                for chunk in iter(lambda: file_storage.stream.read(1024 * 1024), b''):
+                    digest.update(chunk)
+                    spool_file.write(chunk)
+            digest = digest.hexdigest()
+            spool_path = os.path.join(self.spool_folder,
+                                      spool_name(self._owner, attendance_id, namespace, digest, extension))
+            os.replace(partial_path, spool_path)
+        except Exception:
+            if os.path.exists(partial_path):
+                os.remove(partial_path)
+            raise
+        return spool_path, digest, extension, namespace, attendance_id
+
+    def submit(self, file_storage, attendance_id, namespace=''):
+        """Spool upload dan jadwalkan pemrosesannya untuk catatan attendance_id."""
+        self._ensure_workers()
+        job = self.spool(file_storage, attendance_id, namespace)
+        with self._lock:
+            self._metrics['submitted'] += 1
+        try:
+            self._queue.put_nowait(job)
+        except queue.Full:
+            # Antrian penuh: proses langsung agar klien merasakan backpressure
+            with self._lock:
+                self._metrics['inline_fallback'] += 1
+            logger.warning(f"Photo ingest queue full, processing photo for attendance {attendance_id} inline.")
+            self._process(*job)
+        with self._lock:
+            self._metrics['max_queue_depth'] = max(self._metrics['max_queue_depth'], self._queue.qsize())
+
+    def recover_spool(self):
+        """Jadwalkan ulang spool milik proses yang sudah mati; kembalikan jumlahnya.
+
+        Dipanggil worker saat mulai dan setiap PHOTO_SPOOL_RECOVER_SECONDS
+        detik antrian kosong, sehingga job worker lama yang selesai
+        graceful reload belakangan ikut terambil.
+        """
+        if not self._recover_lock.acquire(blocking=False):
+            return 0  # Worker lain sedang memulihkan
+        try:
+            alive = {}
+            recovered = 0
+            for name in sorted(os.listdir(self.spool_folder)):
+                if name.startswith('.owner-') and not name.endswith('.tmp'):
+                    alive.setdefault(name[len('.owner-'):], None)  # Dicek di akhir agar file pemilik mati ikut dibersihkan
+                    continue
+                owner = name.split('-', 1)[0]
+                if not name.endswith((SPOOL_SUFFIX, PARTIAL_SUFFIX)):
+                    continue
+                if alive.get(owner) is None:
+                    alive[owner] = self._owner_alive(owner)
+                if alive[owner]:
+                    continue
+                path = os.path.join(self.spool_folder, name)
+                if name.endswith(PARTIAL_SUFFIX):
+                    # Upload yang terputus saat pemiliknya mati tidak bisa dilanjutkan
+                    self._remove(path)
+                    continue
+                try:
+                    _, attendance_id, namespace, digest, extension = parse_spool_name(name)
+                except ValueError:
+                    logger.warning(f"Skipping unrecognised photo spool file {name}")
+                    continue
+                claimed = os.path.join(self.spool_folder, spool_name(self._owner, attendance_id, namespace, digest, extension))
+                try:
+                    os.rename(path, claimed)  # Atomik: hanya satu proses yang berhasil mengklaim
+                except FileNotFoundError:
+                    continue
+                job = (claimed, digest, extension, namespace, attendance_id)
+                try:
+                    self._queue.put_nowait(job)
+                except queue.Full:
+                    self._process(*job)  # Sudah di thread worker: proses langsung
+                recovered += 1
+            for owner, owner_alive in alive.items():
+                if owner_alive is None:
+                    owner_alive = self._owner_alive(owner)
+                if not owner_alive:
+                    self._remove(os.path.join(self.spool_folder, f'.owner-{owner}'))
+        finally:
+            self._recover_lock.release()
+        if recovered:
+            with self._lock:
+                self._metrics['recovered'] += recovered
+            logger.info(f"Recovered {recovered} photo spool files left by stopped workers.")
+        return recovered
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    def _run(self):
+        self._safe_recover()
+        while True:
+            try:
+                job = self._queue.get(timeout=self.recover_seconds)
+            except queue.Empty:
+                self._safe_recover()
+                continue
+            try:
+                self._process(*job)
+            finally:
+                self._queue.task_done()
+
+    def _safe_recover(self):
+        try:
+            self.recover_spool()
+        except Exception as e:
+            logger.error(f"Error recovering photo spool files: {e}")
+
+    def _process(self, spool_path, digest, extension, namespace, attendance_id):
+        started = time.perf_counter()
+        try:
+            stored_name = self._write_final(spool_path, digest, extension, namespace)
+            self._update_attendance(attendance_id, stored_name)
+            with self._lock:
+                self._metrics['completed'] += 1
+        except Exception as e:
+            with self._lock:
+                self._metrics['failed'] += 1
+            logger.error(f"Error ingesting photo for attendance {attendance_id}: {e}")
+        finally:
+            if os.path.exists(spool_path):
+                os.remove(spool_path)
+            with self._lock:
+                self._metrics['total_processing_seconds'] += time.perf_counter() - started
+
+    def _write_final(self, spool_path, digest, extension, namespace):
+        """Simpan file akhir dan thumbnail lewat photo_storage; kembalikan path relatifnya."""
+        from app.photo_storage import photo_storage
+
+        if Image is None:
+            return photo_storage.store_file(spool_path, extension, namespace, digest)
+
+        try:
+            with Image.open(spool_path) as source:
+                image = ImageOps.exif_transpose(source)  # Terapkan orientasi sebelum EXIF dibuang
+                image.load()
+        except Exception:
+            # Bukan gambar yang bisa dibaca Pillow: simpan apa adanya
+            return photo_storage.store_file(spool_path, extension, namespace, digest)
+
+        if image.mode not in ('RGB', 'L'):
+            image = image.convert('RGB')
+        # Simpan ulang sebagai JPEG tanpa metadata EXIF (lokasi GPS, model perangkat, dll)
+        encoded = io.BytesIO()
+        image.save(encoded, format='JPEG', quality=85, optimize=True)
+        stored_name = photo_storage.save_bytes(encoded.getvalue(), '.jpg', namespace)
+
+        base = os.path.splitext(photo_storage.path_for(stored_name))[0]
+        if not os.path.exists(f'{base}_thumb.webp'):
+            thumbnail = image.copy()
+            thumbnail.thumbnail(self.thumbnail_size)
+            thumbnail.save(f'{base}_thumb.jpg', format='JPEG', quality=80)
+            thumbnail.save(f'{base}_thumb.webp', format='WEBP', quality=80)
+        return stored_name
+
+    def _update_attendance(self, attendance_id, filename):
+        from app import db
+        from app.models import Attendance
+        from app.utils import bump_attendance_version
+        from app.write_queue import write_queue
+
+        def write():
+            db.session.execute(
+                db.update(Attendance).where(Attendance.id == attendance_id).values(photo=filename)
+            )
+            # Foto baru terlihat di rekap: ETag karyawan pemilik baris ini harus berubah
+            bump_attendance_version(
+                db.select(Attendance.employee_id).where(Attendance.id == attendance_id).scalar_subquery()
+            )
+
+        with self.app.app_context():
+            try:
+                write_queue.run(write)
+            finally:
+                db.session.remove()
+
+    def metrics(self):
+        """Snapshot metrik backpressure untuk endpoint admin."""
+        with self._lock:
+            snapshot = dict(self._metrics)
+        snapshot['queue_depth'] = self._queue.qsize() if self._queue else 0
+        snapshot['queue_capacity'] = self.queue_size
+        snapshot['workers'] = self.workers
+        snapshot['exif_stripping'] = Image is not None  # False: Pillow tidak terpasang, foto disimpan apa adanya
+        finished = snapshot['completed'] + snapshot['failed']
+        snapshot['avg_processing_seconds'] = snapshot['total_processing_seconds'] / finished if finished else 0.0
+        return snapshot
+
+    def join(self):
+        """Tunggu sampai semua foto di antrian selesai diproses (untuk test/benchmark)."""
+        if self._queue is not None:
+            self._queue.join()
+
+
+photo_ingestor = PhotoIngestor()
@@ -0,0 +1,162 @@
+import os
+import io
+import uuid
+import shutil
+import hashlib
+import logging
+import binascii
+from app.instrumentation import track_file_io
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 256 * 1024
+
+
+def photo_extension(filename, default='.jpg'):
+    """Ambil ekstensi file (huruf kecil) dari nama upload, default .jpg."""
+    extension = os.path.splitext(filename or '')[1].lower()
+    return extension if extension.isascii() and extension[1:].isalnum() else default
+
+
+class Base64DecodingStream:
+    """Bungkus stream berisi teks base64 dan decode per chunk berukuran tetap.
+
+    Mendukung prefix data URL (``data:image/jpeg;base64,``) dan whitespace/baris
+    baru di antara karakter base64. Memori yang dipakai hanya sebesar satu chunk,
+    berapa pun ukuran fotonya.
+    """
+
+    def __init__(self, stream, chunk_size=64 * 1024):
+        self._stream = stream
+        self._chunk_size = chunk_size - chunk_size % 4
+        self._pending = b''
+        self._buffer = b''
+        self._started = False
+        self._eof = False
+
+    def _fill(self):
+        raw = self._stream.read(self._chunk_size)
+        if isinstance(raw, str):
+            raw = raw.encode('ascii')
+        if not raw:
+            self._eof = True
+            if self._pending:
+                padded = self._pending + b'=' * (-len(self._pending) % 4)
+                self._buffer += self._decode(padded)
+                self._pending = b''
+            return
+
+        if not self._started:
+            self._started = True
+            raw = raw.lstrip()
+            if raw.startswith(b'data:'):
+                # Buang prefix data URL, mis. data:image/jpeg;base64,
+                raw = raw[raw.index(b',') + 1:]
+
+        data = self._pending + raw.translate(None, b' \t\r\n')
+        cut = len(data) - len(data) % 4
+        self._pending = data[cut:]
+        self._buffer += self._decode(data[:cut])
+
+    @staticmethod
+    def _decode(data):
+        try:
+            return binascii.a2b_base64(data)
+        except binascii.Error as e:
+            raise ValueError(f'Invalid base64 data: {e}') from e
+
+    def read(self, size=-1):
+        while not self._eof and (size < 0 or len(self._buffer) < size):
+            self._fill()
+        if size < 0:
+            size = len(self._buffer)
+        data, self._buffer = self._buffer[:size], self._buffer[size:]
+        return data
+
+
+class PhotoStorage:
+    """Penyimpanan foto berbasis konten (content-addressed).
+
+    Nama file adalah SHA-256 dari isi file, disebar ke subfolder berdasarkan
+    prefix hash (``ab/cd/abcd....jpg``) sehingga tidak ada folder raksasa dan
+    file dengan nama sama dari ponsel berbeda tidak saling menimpa. Isi yang
+    identik hanya disimpan sekali. Path yang dikembalikan relatif terhadap
+    folder ``static/uploads`` sehingga template tetap memakai
+    ``url_for('static', filename='uploads/' + photo)``.
+    """
+
+    def __init__(self, app=None):
+        self.root = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.root = app.config.get('PHOTO_STORAGE_ROOT') or os.path.join(app.root_path, 'static', 'uploads')
+        self.tmp_folder = os.path.join(self.root, '.tmp')
+        os.makedirs(self.tmp_folder, exist_ok=True)
+        app.extensions['photo_storage'] = self
+
+    def relative_path(self, digest, extension, namespace=''):
+        parts = [namespace] if namespace else []
+        parts += [digest[:2], digest[2:4], f'{digest}{extension}']
+        return '/'.join(parts)
+
+    def path_for(self, relative_path):
+        """Path absolut di disk untuk path relatif yang disimpan di database."""
+        return os.path.join(self.root, *relative_path.split('/'))
+
+    def _commit(self, tmp_path, digest, extension, namespace):
+        relative = self.relative_path(digest, extension, namespace)
+        final_path = self.path_for(relative)
+        if os.path.exists(final_path):
+            # Isi identik sudah tersimpan: buang salinan baru
+            os.remove(tmp_path)
+            logger.info(f"Deduplicated photo {relative}")
+        else:
+            os.makedirs(os.path.dirname(final_path), exist_ok=True)
+            os.replace(tmp_path, final_path)
+        return relative
+
+    def save_stream(self, stream, extension='.jpg', namespace=''):
+        """Tulis stream ke disk sambil menghitung hash, lalu pindahkan ke path akhirnya.
+
+        Data hanya ditulis satu kali; pemindahan ke path akhir hanya rename.
+        """
+        digest = hashlib.sha256()
+        tmp_path = os.path.join(self.tmp_folder, uuid.uuid4().hex)
+        try:
+            with track_file_io(), open(tmp_path, 'wb') as tmp_file:
+                while True:
+                    chunk = stream.read(CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    digest.update(chunk)
+                    tmp_file.write(chunk)
+            return self._commit(tmp_path, digest.hexdigest(), extension, namespace)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def save_bytes(self, data, extension='.jpg', namespace=''):
+        return self.save_stream(io.BytesIO(data), extension, namespace)
+
+    def store_file(self, path, extension='.jpg', namespace='', digest=None):
+        """Pindahkan file yang sudah ada di disk (mis. hasil spool) tanpa menulis ulang isinya.
+
+        ``digest`` adalah SHA-256 (hex) isi file jika sudah dihitung saat file
+        ditulis; tanpa itu file dibaca sekali untuk di-hash.
+        """
+        tmp_path = os.path.join(self.tmp_folder, uuid.uuid4().hex)
+        with track_file_io():
+            if digest is None:
+                sha256 = hashlib.sha256()
+                with open(path, 'rb') as source:
+                    for chunk in iter(lambda: source.read(CHUNK_SIZE), b''):
+                        sha256.update(chunk)
+                digest = sha256.hexdigest()
+            shutil.move(path, tmp_path)
+        return self._commit(tmp_path, digest, extension, namespace)
+
+
+photo_storage = PhotoStorage()
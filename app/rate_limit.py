@@ -0,0 +1,228 @@
+import math
+import time
+import logging
+import threading
+from collections import OrderedDict
+
+try:
+    import redis
+except ImportError:  # redis opsional: tanpa redis hanya tersedia penyimpanan per proses
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+
+class MemoryBackend:
+    """Penyimpanan counter per proses.
+
+    Setiap key menyimpan dua bucket (window sebelumnya dan window berjalan),
+    jadi memori per key konstan. Key diurutkan menurut waktu terakhir disentuh;
+    key yang sudah kedaluwarsa dibuang dari depan setiap kali ada increment,
+    sehingga biaya pembersihan teramortisasi O(1) dan tidak ada pemindaian
+    seluruh tabel. ``max_keys`` membatasi memori saat banyak IP/email berbeda.
+    """
+
+    def __init__(self, max_keys=100000):
+        self.max_keys = max_keys
+        self._entries = OrderedDict()  # key -> [bucket, previous, current, expires_at]
+        self._lock = threading.Lock()
+
+    def counts(self, key, bucket):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return 0, 0
+            if entry[0] == bucket:
+                return entry[1], entry[2]
+            if entry[0] == bucket - 1:
+                return entry[2], 0
+            return 0, 0
+
+    def incr(self, key, bucket, ttl):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = self._entries[key] = [bucket, 0, 0, 0]
+            elif entry[0] != bucket:
+                # Geser window: bucket berjalan menjadi bucket sebelumnya (atau nol jika sudah lewat)
+                entry[1] = entry[2] if entry[0] == bucket - 1 else 0
+                entry[2] = 0
+                entry[0] = bucket
+            entry[2] += 1
+            entry[3] = now + ttl
+            self._entries.move_to_end(key)
+            self._prune(now)
+
+    def reset(self, key, bucket):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def _prune(self, now):
+        entries = self._entries
+        while entries:
+            key, entry = next(iter(entries.items()))
+            if entry[3] > now and len(entries) <= self.max_keys:
+                break
+            del entries[key]
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class RedisBackend:
+    """Penyimpanan counter bersama di Redis untuk banyak worker/host.
+
+    Setiap bucket adalah satu key Redis dengan TTL dua window. ``client``
+    cukup objek yang punya ``mget``, ``pipeline`` dan ``delete`` seperti
+    redis.Redis, sehingga bisa diganti stand-in lokal (mis. fakeredis) untuk
+    pengujian dan benchmark.
+    """
+
+    def __init__(self, client, prefix='presensi:ratelimit:'):
+        self.client = client
+        self.prefix = prefix
+
+    def _key(self, key, bucket):
+        return f'{self.prefix}{key}:{bucket}'
+
+    def counts(self, key, bucket):
+        previous, current = self.client.mget(self._key(key, bucket - 1), self._key(key, bucket))
+        return int(previous or 0), int(current or 0)
+
+    def incr(self, key, bucket, ttl):
+        pipeline = self.client.pipeline()
+        pipeline.incr(self._key(key, bucket))
+        pipeline.expire(self._key(key, bucket), int(math.ceil(ttl)))
+        pipeline.execute()
+
+    def reset(self, key, bucket):
+        self.client.delete(self._key(key, bucket - 1), self._key(key, bucket))
+
+    def __len__(self):
+        return 0  # Jumlah key di Redis tidak dihitung per proses
+
+
+class RateLimiter:
+    """Pembatas laju sliding window untuk login dan lupa password.
+
+    Memakai perkiraan sliding window dua bucket: jumlah hit di window
+    sebelumnya diberi bobot sesuai sisa porsinya di window berjalan lalu
+    ditambah hit window berjalan. Setiap pengecekan hanya membaca dan menulis
+    satu key, jadi biayanya O(1) berapa pun jumlah IP/email yang dilacak.
+
+    Aturan diatur di RATE_LIMITS sebagai ``nama -> (batas, window detik)``.
+    Penyimpanan default per proses; RATE_LIMIT_STORAGE_URL=redis://...
+    memakai Redis bersama agar batas berlaku lintas worker.
+    """
+
+    def __init__(self, app=None):
+        self.enabled = False
+        self.rules = {}
+        self.proxy_hops = 0
+        self.backend = MemoryBackend()
+        self._lock = threading.Lock()
+        self._metrics = {'allowed': 0, 'rejected': 0, 'backend_errors': 0}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.enabled = app.config.get('RATE_LIMIT_ENABLED', True)
+        self.rules = dict(app.config.get('RATE_LIMITS', {}))
+        self.proxy_hops = app.config.get('RATE_LIMIT_PROXY_HOPS', 0)
+        self.backend = self._create_backend(app.config.get('RATE_LIMIT_STORAGE_URL'),
+                                            app.config.get('RATE_LIMIT_MAX_KEYS', 100000))
+        app.extensions['rate_limiter'] = self
+
+    @staticmethod
+    def _create_backend(url, max_keys):
+        if url and url.startswith(('redis://', 'rediss://', 'unix://')):
+            if redis is not None:
+                return RedisBackend(redis.Redis.from_url(url, socket_timeout=0.5))
+            logger.warning("RATE_LIMIT_STORAGE_URL is set but redis is not installed; using per-process storage.")
+        return MemoryBackend(max_keys)
+
+    def use_backend(self, backend):
+        """Ganti penyimpanan counter (mis. RedisBackend dengan client stand-in)."""
+        self.backend = backend
+
+    def client_ip(self, request):
+        """IP klien; dengan RATE_LIMIT_PROXY_HOPS > 0 diambil dari X-Forwarded-For."""
+        if self.proxy_hops:
+            forwarded = [part.strip() for part in request.headers.get('X-Forwarded-For', '').split(',') if part.strip()]
+            if len(forwarded) >= self.proxy_hops:
+                return forwarded[-self.proxy_hops]
+        return request.remote_addr or 'unknown'
+
+    def _window(self, rule, key):
+        limit, window = self.rules[rule]
+        now = time.time()
+        bucket = int(now // window)
+        return f'{rule}:{key}', limit, window, bucket, (now % window) / window
+
+    def _retry_after(self, previous, current, limit, window, elapsed):
+        if current + 1 > limit:
+            return max(window * (1 - elapsed), 1)
+        # Tunggu sampai bobot window sebelumnya cukup menyusut
+        return max(window * (1 - (limit - 1 - current) / previous) - window * elapsed, 1)
+
+    def _check(self, rule, key, record):
+        if not self.enabled or rule not in self.rules:
+            return 0
+        name, limit, window, bucket, elapsed = self._window(rule, key)
+        try:
+            previous, current = self.backend.counts(name, bucket)
+            estimate = previous * (1 - elapsed) + current
+            if estimate + 1 > limit:
+                with self._lock:
+                    self._metrics['rejected'] += 1
+                return int(math.ceil(self._retry_after(previous, current, limit, window, elapsed)))
+            if record:
+                self.backend.incr(name, bucket, window * 2)
+        except Exception as e:
+            # Penyimpanan bermasalah (mis. Redis mati): jangan kunci semua orang keluar
+            with self._lock:
+                self._metrics['backend_errors'] += 1
+            logger.error(f"Rate limit backend error for {rule}: {e}")
+            return 0
+        with self._lock:
+            self._metrics['allowed'] += 1
+        return 0
+
+    def hit(self, rule, key):
+        """Catat satu percobaan; kembalikan detik Retry-After jika melebihi batas, 0 jika boleh."""
+        return self._check(rule, key, record=True)
+
+    def blocked(self, rule, key):
+        """Seperti hit() tetapi tanpa mencatat percobaan (mis. cek lockout email)."""
+        return self._check(rule, key, record=False)
+
+    def record(self, rule, key):
+        """Catat percobaan tanpa mengecek batas (mis. login gagal)."""
+        if not self.enabled or rule not in self.rules:
+            return
+        name, _, window, bucket, _ = self._window(rule, key)
+        try:
+            self.backend.incr(name, bucket, window * 2)
+        except Exception as e:
+            with self._lock:
+                self._metrics['backend_errors'] += 1
+            logger.error(f"Rate limit backend error for {rule}: {e}")
+
+    def reset(self, rule, key):
+        if not self.enabled or rule not in self.rules:
+            return
+        name, _, _, bucket, _ = self._window(rule, key)
+        try:
+            self.backend.reset(name, bucket)
+        except Exception as e:
+            logger.error(f"Rate limit backend error for {rule}: {e}")
+
+    def metrics(self):
+        with self._lock:
+            snapshot = dict(self._metrics)
+        snapshot['keys'] = len(self.backend)
+        return snapshot
+
+
+rate_limiter = RateLimiter()
@@ -1,32 +1,53 @@
 import logging
 import datetime
-from datetime import datetime, time
+from datetime import datetime, time, timedelta
 import re
-import os
-from flask import Blueprint, render_template, request, redirect, url_for, flash, current_app, jsonify
+import io
+import csv
+from itertools import islice
+from flask import Blueprint, render_template, request, redirect, url_for, flash, current_app, jsonify, Response, stream_with_context
 from flask_login import login_required, current_user
-from app.models import User, Attendance, Employee, LocationSetting
-from flask_bcrypt import Bcrypt
+from app.models import User, Attendance, AttendanceStatus, Employee, LocationSetting
+from app.utils import get_daily_summary
+from app.serializers import (REPORT_SELECT_COLUMNS, EMPLOYEE_SELECT_COLUMNS, iter_report, serialize_employees,
+                             dumps, json_response)
+from app.photo_ingest import photo_ingestor
+from app.photo_storage import photo_storage, photo_extension
+from app.geofence import geofence
+from app.identity_cache import identity_cache
+from app.clock_in_guard import clocked_in_today
+from app.write_queue import write_queue
+from app.mail_outbox import mail_outbox
+from app.database import pool_metrics
+from app.instrumentation import instrumentation
+from app.passwords import password_hasher
+from app.tokens import token_service
+from app.rate_limit import rate_limiter
 from app import db
 import uuid
-from werkzeug.utils import secure_filename
 
-# Konfigurasi Logging
-logging.basicConfig(level=logging.INFO,  # Atur level log yang diinginkan (INFO, ERROR, DEBUG, dsb)
-                    format='%(asctime)s - %(levelname)s - %(message)s',
-                    handlers=[
-                        logging.StreamHandler(),  # Output log ke konsol
-                        logging.FileHandler('app.log')  # Simpan log ke file app.log
-                    ])
+logger = logging.getLogger(__name__)
 
 admin_bp = Blueprint('admin_bp', __name__)
-bcrypt = Bcrypt()
+
+def _summarize_day(summaries):
+    """Hitung jumlah karyawan per status (dan yang terlambat) dari ringkasan harian."""
+    counts = {status.value: 0 for status in AttendanceStatus}
+    late = 0
+    setting = LocationSetting.query.order_by(LocationSetting.id.desc()).first()
+    for summary in summaries:
+        counts[summary.status.value] += 1
+        if setting and summary.clock_in_time and summary.clock_in_time.time() > setting.clock_in:
+            late += 1
+    counts['LATE'] = late
+    return counts
+
 
 @admin_bp.route('/dashboard', methods=['GET'])
 @login_required
 def admin_dashboard():
     # Logika untuk menampilkan dashboard admin
-    logging.info(f'User {current_user.email} accessed the dashboard.')
+    logger.info(f'User {current_user.email} accessed the dashboard.')
 
     # Ambil data untuk dashboard
     dashboard_data = {
@@ -34,17 +55,19 @@ def admin_dashboard():
         'user_email': current_user.email,
         'user_status': current_user.status,
         'total_employees': Employee.query.count(),  # Menghitung total karyawan
-        'total_attendance_records': Attendance.query.count()  # Menghitung total catatan absensi
+        'total_attendance_records': Attendance.query.count(),  # Menghitung total catatan absensi
+        'today': _summarize_day(get_daily_summary())  # Ringkasan hari ini dari tabel ringkasan harian
     }
 
     # Log request format untuk memastikan parameter format diterima
     format = request.args.get('format')
-    logging.info(f"Request format: {format}")
+    logger.info(f"Request format: {format}")
 
     # Jika format = json, kirimkan respons dalam format JSON
     if format == 'json':
         response = jsonify(dashboard_data)
-        logging.info(f"JSON Response: {response.get_data()}")
+        if logger.isEnabledFor(logging.DEBUG):  # Hindari serialisasi ulang respons hanya untuk log
+            logger.debug(f"JSON Response: {response.get_data()}")
         return response, 200
 
     # Jika format tidak diminta atau tidak ada, render halaman HTML
@@ -81,15 +104,14 @@ def add_employee():
             return jsonify({'message': 'Email already exists in employees table!'}), 400
 
         # Hash password
-        hashed_password = bcrypt.generate_password_hash(password).decode('utf-8')
+        hashed_password = password_hasher.hash(password)
 
         # Ambil file foto (optional)
         photo = request.files.get('photo_profile')  # Pastikan file tetap dikirim sebagai multipart/form-data
         photo_filename = None
         if photo:
-            photo_filename = secure_filename(photo.filename)
-            # Simpan foto ke folder static/uploads
-            photo.save(os.path.join(current_app.root_path, 'static', 'uploads', photo_filename))
+            # Simpan foto ke static/uploads dengan nama berbasis hash isi
+            photo_filename = photo_storage.save_stream(photo.stream, photo_extension(photo.filename))
 
         # Simpan data ke database
         new_user = User(email=email, password=hashed_password, status=0)
@@ -109,7 +131,7 @@ def add_employee():
         db.session.commit()
 
         # Log info
-        logging.info(f'New employee added with email {email}.')
+        logger.info(f'New employee added with email {email}.')
         
         # Kembalikan response JSON
         return jsonify({'message': 'Employee added successfully!'}), 201
@@ -118,6 +140,125 @@ def add_employee():
     return render_template('admin/add_employee.html')
 
 
+IMPORT_FIELDS = ['name', 'gender', 'email', 'phone', 'password']
+
+
+def _read_import_rows():
+    """Ambil baris import dari file CSV, body text/csv, atau body JSON."""
+    upload = request.files.get('file')
+    if upload:
+        return list(csv.DictReader(io.TextIOWrapper(upload.stream, encoding='utf-8-sig')))
+    if request.mimetype == 'text/csv':
+        return list(csv.DictReader(io.StringIO(request.get_data(as_text=True))))
+
+    data = request.get_json(silent=True)
+    if isinstance(data, dict):
+        data = data.get('employees')
+    return data if isinstance(data, list) else None
+
+
+def _find_existing_emails(emails, chunk_size=500):
+    """Cek email yang sudah ada di tabel users dan employees dengan satu query per chunk."""
+    existing = set()
+    emails = list(emails)
+    for start in range(0, len(emails), chunk_size):
+        chunk = emails[start:start + chunk_size]
+        query = db.union(
+            db.select(User.email).where(User.email.in_(chunk)),
+            db.select(Employee.email).where(Employee.email.in_(chunk))
+        )
+        existing.update(db.session.execute(query).scalars())
+    return existing
+
+
+@admin_bp.route('/import_employees', methods=['POST'])
+@login_required
+def import_employees():
+    if current_user.status != 1:  # Pastikan hanya admin yang bisa mengakses
+        return jsonify({'message': 'Access denied! This page is for admin only.'}), 403
+
+    try:
+        rows = _read_import_rows()
+    except (UnicodeDecodeError, csv.Error):
+        return jsonify({'message': 'File CSV tidak valid!'}), 400
+    if not rows:
+        return jsonify({'message': 'Body request kosong atau tidak valid!'}), 400
+
+    results = [{'row': index, 'email': str(row.get('email') or '').strip() if isinstance(row, dict) else None}
+               for index, row in enumerate(rows, start=1)]
+
+    # Validasi per baris dan cari email ganda di dalam file itu sendiri
+    candidates = []
+    seen = set()
+    for result, row in zip(results, rows):
+        if not isinstance(row, dict):
+            result.update(status='error', message='Format baris tidak valid!')
+            continue
+        missing = [field for field in IMPORT_FIELDS if not str(row.get(field) or '').strip()]
+        if missing:
+            result.update(status='error', message=f"Field wajib kosong: {', '.join(missing)}")
+            continue
+        if result['email'] in seen:
+            result.update(status='skipped', message='Email duplikat di dalam data import!')
+            continue
+        seen.add(result['email'])
+        candidates.append((result, row))
+
+    existing = _find_existing_emails(seen)
+    pending = []
+    for result, row in candidates:
+        if result['email'] in existing:
+            result.update(status='skipped', message='Email already exists!')
+        else:
+            pending.append((result, row))
+
+    # Hash password secara paralel di process pool password_hasher
+    hashes = password_hasher.hash_many(str(row['password']) for _, row in pending)
+
+    # Insert batch demi batch di dalam satu transaksi
+    batch_size = current_app.config['BULK_IMPORT_BATCH_SIZE']
+    try:
+        for start in range(0, len(pending), batch_size):
+            batch = pending[start:start + batch_size]
+            batch_hashes = hashes[start:start + batch_size]
+
+            users = [User(email=result['email'], password=hashed, status=0)
+                     for (result, _), hashed in zip(batch, batch_hashes)]
+            db.session.add_all(users)
+            db.session.flush()  # Dapatkan id user untuk foreign key employee
+
+            db.session.add_all([
+                Employee(
+                    name=str(row['name']).strip(),
+                    gender=str(row['gender']).strip(),
+                    email=result['email'],
+                    phone_number=str(row['phone']).strip(),
+                    password=hashed,
+                    user_id=user.id
+                )
+                for (result, row), hashed, user in zip(batch, batch_hashes, users)
+            ])
+            db.session.flush()
+
+            for (result, _), user in zip(batch, users):
+                result.update(status='created', user_id=user.id)
+
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f'Error importing employees: {e}')
+        return jsonify({'message': 'Terjadi kesalahan saat mengimpor data! Tidak ada data yang disimpan.'}), 500
+
+    created = sum(1 for result in results if result.get('status') == 'created')
+    logger.info(f'Bulk import finished: {created} of {len(results)} employees created.')
+    return jsonify({
+        'created': created,
+        'skipped': sum(1 for result in results if result.get('status') == 'skipped'),
+        'errors': sum(1 for result in results if result.get('status') == 'error'),
+        'results': results
+    }), 200
+
+
 @admin_bp.route('/edit_employee/<int:id>', methods=['GET', 'POST'])
 @login_required
 def edit_employee(id):
@@ -144,7 +285,8 @@ def edit_employee(id):
         # Simpan perubahan ke database
         try:
             db.session.commit()
-            logging.info(f'Employee with ID {id} updated.')
+            identity_cache.invalidate(employee.user_id)
+            logger.info(f'Employee with ID {id} updated.')
             return jsonify({
                 'message': 'Employee updated successfully!',
                 'employee': {
@@ -155,7 +297,7 @@ def edit_employee(id):
             }), 200
         except Exception as e:
             db.session.rollback()
-            logging.error(f'Error updating employee with ID {id}: {e}')
+            logger.error(f'Error updating employee with ID {id}: {e}')
             return jsonify({'message': 'Terjadi kesalahan saat memperbarui data!'}), 500
 
     # Jika metode GET, pastikan Anda merender halaman HTML hanya jika perlu
@@ -176,13 +318,16 @@ def delete_employee(id):
     try:
         db.session.delete(user)  # Menghapus user
         db.session.commit()
-        logging.info(f'User with ID {id} and all related records deleted successfully.')
+        identity_cache.invalidate(id)
+        # SQLite bisa memakai ulang users.id terbesar: karyawan baru tidak boleh mewarisi tanda clock in
+        clocked_in_today.clear(id)
+        logger.info(f'User with ID {id} and all related records deleted successfully.')
         
         # Kembalikan respons dalam format JSON
         return jsonify({'message': 'User and all related employees and attendance records deleted successfully!'}), 200
     except Exception as e:
         db.session.rollback()
-        logging.error(f'Error deleting user with ID {id}: {e}')
+        logger.error(f'Error deleting user with ID {id}: {e}')
         
         # Kembalikan respons kesalahan dalam format JSON
         return jsonify({'message': f'Error deleting user: {str(e)}'}), 500
@@ -191,21 +336,68 @@ def delete_employee(id):
 @admin_bp.route('/list_employees', methods=['GET', 'POST'])
 @login_required
 def list_employee():
-    employees = Employee.query.all()  # Ambil semua pegawai dari tabel Employee
-    logging.info(f'{len(employees)} employees listed.')
+    # Ambil kolom yang dikirim saja dari tabel Employee, tanpa objek ORM
+    employees = db.session.execute(db.select(*EMPLOYEE_SELECT_COLUMNS)).all()
+    logger.info(f'{len(employees)} employees listed.')
 
     # Kembalikan respons dalam format JSON pada kedua metode
-    employee_list = [
-        {
-            'id': employee.id,
-            'name': employee.name,
-            'gender': employee.gender,
-            'email': employee.email,
-            'phone_number': employee.phone_number
-        }
-        for employee in employees
-    ]
-    return jsonify(employee_list), 200
+    return json_response(serialize_employees(employees)), 200
+
+
+# Urutan field laporan absensi (header CSV); query-nya lihat REPORT_SELECT_COLUMNS
+REPORT_COLUMNS = ['employee_id', 'employee_name', 'status', 'date', 'time', 'time_out', 'reason', 'photo']
+REPORT_PAGE_SIZE = 500
+REPORT_MAX_PAGE_SIZE = 5000
+REPORT_STREAM_BATCH = 1000
+REPORT_FORMATS = ('json', 'ndjson', 'csv')
+
+
+def _int_arg(args, name):
+    """Nilai integer dari query string, None jika tidak dikirim; ValueError jika bukan angka."""
+    value = args.get(name)
+    return None if value is None or value == '' else int(value)
+
+
+def _build_report_query(args):
+    """Susun SELECT laporan absensi dari query string (filter + keyset cursor)."""
+    query = db.select(*REPORT_SELECT_COLUMNS).outerjoin(Employee, Attendance.employee_id == Employee.user_id)
+
+    start_date = args.get('start_date')
+    end_date = args.get('end_date')
+    if start_date:
+        query = query.where(Attendance.date >= datetime.strptime(start_date, '%Y-%m-%d'))
+    if end_date:
+        # end_date inklusif: ambil semua catatan sebelum hari berikutnya
+        query = query.where(Attendance.date < datetime.strptime(end_date, '%Y-%m-%d') + timedelta(days=1))
+
+    employee_id = _int_arg(args, 'employee_id')
+    if employee_id is not None:
+        query = query.where(Attendance.employee_id == employee_id)
+
+    status = args.get('status')
+    if status:
+        query = query.where(Attendance.status == AttendanceStatus(status.upper()))
+
+    # Keyset pagination: lanjutkan setelah id terakhir yang sudah dikirim
+    cursor = _int_arg(args, 'cursor')
+    if cursor is not None:
+        query = query.where(Attendance.id > cursor)
+
+    return query.order_by(Attendance.id)
+
+
+def _stream_report_batches(query):
+    """Yield list dict laporan per batch langsung dari server-side cursor."""
+    result = db.session.execute(query.execution_options(yield_per=REPORT_STREAM_BATCH))
+    try:
+        records = iter_report(result)
+        while True:
+            batch = list(islice(records, REPORT_STREAM_BATCH))
+            if not batch:
+                break
+            yield batch
+    finally:
+        result.close()
 
 
 @admin_bp.route('/attendance_report', methods=['GET', 'POST'])
@@ -214,26 +406,177 @@ def attendance_report():
     if current_user.status != 1:  # Pastikan hanya admin yang bisa mengakses
         return jsonify({'message': 'Access denied! This page is for admin only.'}), 403
 
-    # Ambil semua catatan absensi dengan relasi ke Employee
-    attendance_records = Attendance.query.options(db.joinedload(Attendance.employee)).all()
-    logging.info(f'{len(attendance_records)} attendance records fetched for report.')
+    try:
+        query = _build_report_query(request.args)
+        limit = _int_arg(request.args, 'limit')
+    except ValueError:
+        return jsonify({'message': 'Filter tidak valid! Gunakan format tanggal YYYY-MM-DD, status yang dikenal, '
+                                   'dan angka untuk employee_id, cursor serta limit.'}), 400
+
+    output_format = request.args.get('format', 'json')
+    if output_format not in REPORT_FORMATS:
+        return jsonify({'message': 'format harus salah satu dari json, ndjson atau csv!'}), 400
+
+    # Mode paginasi: kirim satu halaman beserta cursor untuk halaman berikutnya
+    if 'limit' in request.args or 'cursor' in request.args:
+        if output_format != 'json':
+            return jsonify({'message': 'Mode paginasi (limit/cursor) hanya mendukung format json; '
+                                       'gunakan format ndjson/csv tanpa limit/cursor untuk streaming.'}), 400
+        limit = min(REPORT_PAGE_SIZE if limit is None else limit, REPORT_MAX_PAGE_SIZE)
+        if limit <= 0:
+            return jsonify({'message': 'limit harus lebih besar dari 0!'}), 400
+
+        rows = db.session.execute(query.limit(limit + 1)).all()
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        logger.info(f'{len(rows)} attendance records fetched for report page.')
+        return json_response({
+            'records': list(iter_report(rows)),
+            'next_cursor': rows[-1].id if has_more else None
+        }), 200
+
+    # Mode streaming: memori per request tetap datar berapa pun ukuran tabel
+    if output_format == 'ndjson':
+        def generate_ndjson():
+            for batch in _stream_report_batches(query):
+                yield b''.join(dumps(record) + b'\n' for record in batch)
+
+        return Response(stream_with_context(generate_ndjson()), mimetype='application/x-ndjson')
+
+    if output_format == 'csv':
+        def generate_csv():
+            buffer = io.StringIO()
+            writer = csv.DictWriter(buffer, fieldnames=REPORT_COLUMNS)
+            writer.writeheader()
+            for batch in _stream_report_batches(query):
+                writer.writerows(batch)
+                if buffer.tell() >= 64 * 1024:
+                    yield buffer.getvalue()
+                    buffer.seek(0)
+                    buffer.truncate()
+            yield buffer.getvalue()
+
+        return Response(stream_with_context(generate_csv()), mimetype='text/csv',
+                        headers={'Content-Disposition': 'attachment; filename=attendance_report.csv'})
+
+    # Default: array JSON yang sama seperti sebelumnya, tetapi dikirim secara streaming
+    def generate_json():
+        # Satu kali encode per batch: buang '[' dan ']' lalu sambung dengan ','
+        yield b'['
+        first = True
+        for batch in _stream_report_batches(query):
+            yield (b'' if first else b',') + dumps(batch)[1:-1]
+            first = False
+        yield b']'
+
+    logger.info('Streaming attendance report.')
+    return Response(stream_with_context(generate_json()), mimetype='application/json')
+
+
+@admin_bp.route('/daily_summary', methods=['GET'])
+@login_required
+def daily_summary():
+    if current_user.status != 1:  # Pastikan hanya admin yang bisa mengakses
+        return jsonify({'message': 'Access denied! This page is for admin only.'}), 403
+
+    date_str = request.args.get('date')
+    try:
+        date = datetime.strptime(date_str, '%Y-%m-%d').date() if date_str else None
+    except ValueError:
+        return jsonify({'message': 'Format tanggal harus YYYY-MM-DD!'}), 400
+
+    summaries = get_daily_summary(date)
+    return jsonify({
+        'counts': _summarize_day(summaries),
+        'employees': [
+            {
+                'employee_id': summary.employee_id,
+                'date': summary.date.strftime('%Y-%m-%d'),
+                'status': summary.status.value,
+                'clock_in': summary.clock_in_time.strftime('%H:%M:%S') if summary.clock_in_time else None,
+                'clock_out': summary.clock_out_time.strftime('%H:%M:%S') if summary.clock_out_time else None,
+                'reason': summary.reason if summary.reason else 'N/A'
+            }
+            for summary in summaries
+        ]
+    }), 200
+
+
+@admin_bp.route('/photo_ingest_metrics', methods=['GET'])
+@login_required
+def photo_ingest_metrics():
+    if current_user.status != 1:  # Pastikan hanya admin yang bisa mengakses
+        return jsonify({'message': 'Access denied! This page is for admin only.'}), 403
+
+    return jsonify(photo_ingestor.metrics()), 200
 
-    # Kembalikan respons dalam format JSON untuk kedua metode (GET dan POST)
-    attendance_list = [
-        {
-            'employee_id': record.employee_id,
-            'employee_name': record.employee.name if record.employee else 'N/A',
-            'status': record.status,
-            'date': record.date.strftime('%Y-%m-%d'),
-            'time': record.time.strftime('%H:%M:%S'),
-            'time_out': record.time_out.strftime('%H:%M:%S') if record.time_out else 'Not Clocked Out',
-            'reason': record.reason if record.reason else 'N/A',
-            'photo': record.photo if record.photo else 'No photo uploaded'
-        }
-        for record in attendance_records
-    ]
-    
-    return jsonify(attendance_list), 200
+
+@admin_bp.route('/write_queue_metrics', methods=['GET'])
+@login_required
+def write_queue_metrics():
+    if current_user.status != 1:  # Pastikan hanya admin yang bisa mengakses
+        return jsonify({'message': 'Access denied! This page is for admin only.'}), 403
+
+    return jsonify(write_queue.metrics()), 200
+
+
+@admin_bp.route('/metrics', methods=['GET'])
+@login_required
+def metrics():
+    if current_user.status != 1:  # Pastikan hanya admin yang bisa mengakses
+        return jsonify({'message': 'Access denied! This page is for admin only.'}), 403
+
+    body = instrumentation.render_prometheus({
+        'write_queue': write_queue.metrics(),
+        'photo_ingest': photo_ingestor.metrics(),
+        'db_pool': pool_metrics.stats(),
+        'identity_cache': identity_cache.stats(),
+        'mail_outbox': mail_outbox.metrics(),
+        'password_hash': password_hasher.metrics(),
+        'token_cache': token_service.stats(),
+        'rate_limit': rate_limiter.metrics(),
+    })
+    return Response(body, mimetype='text/plain; version=0.0.4'), 200
+
+
+@admin_bp.route('/slow_requests', methods=['GET'])
+@login_required
+def slow_requests():
+    if current_user.status != 1:  # Pastikan hanya admin yang bisa mengakses
+        return jsonify({'message': 'Access denied! This page is for admin only.'}), 403
+
+    return jsonify({
+        'profiling_enabled': instrumentation.sampler is not None,
+        'threshold_seconds': instrumentation.sampler.threshold if instrumentation.sampler else None,
+        'requests': instrumentation.slow_requests()
+    }), 200
+
+
+@admin_bp.route('/mail_outbox_metrics', methods=['GET'])
+@login_required
+def mail_outbox_metrics():
+    if current_user.status != 1:  # Pastikan hanya admin yang bisa mengakses
+        return jsonify({'message': 'Access denied! This page is for admin only.'}), 403
+
+    return jsonify(mail_outbox.metrics()), 200
+
+
+@admin_bp.route('/db_pool_stats', methods=['GET'])
+@login_required
+def db_pool_stats():
+    if current_user.status != 1:  # Pastikan hanya admin yang bisa mengakses
+        return jsonify({'message': 'Access denied! This page is for admin only.'}), 403
+
+    return jsonify(pool_metrics.stats()), 200
+
+
+@admin_bp.route('/identity_cache_stats', methods=['GET'])
+@login_required
+def identity_cache_stats():
+    if current_user.status != 1:  # Pastikan hanya admin yang bisa mengakses
+        return jsonify({'message': 'Access denied! This page is for admin only.'}), 403
+
+    return jsonify(identity_cache.stats()), 200
 
 
 @admin_bp.route('/location_settings', methods=['GET', 'POST'])
@@ -266,13 +609,15 @@ def location_settings():
                 latitude=latitude,
                 longitude=longitude,
                 radius=radius,
+                date=datetime.today().date(),
                 clock_in=clock_in,
                 clock_out=clock_out
             )
             db.session.add(new_setting)
             db.session.commit()
+            geofence.refresh()  # Muat ulang indeks geofence agar lokasi baru langsung berlaku
 
-            logging.info('New location setting added successfully.')
+            logger.info('New location setting added successfully.')
 
             # Kembalikan respons JSON
             return jsonify({'message': 'Location settings saved successfully!', 'setting': {
@@ -287,7 +632,7 @@ def location_settings():
             return jsonify({'message': 'Format waktu clock_in dan clock_out harus HH:MM!'}), 400
         except Exception as e:
             db.session.rollback()
-            logging.error(f'Error saving location setting: {e}')
+            logger.error(f'Error saving location setting: {e}')
             return jsonify({'message': 'Terjadi kesalahan saat menyimpan pengaturan lokasi!'}), 500
 
     # Jika metode GET, kembalikan data dalam format JSON
@@ -1,69 +1,77 @@
-import os
 import logging
-from flask import Blueprint, request, session, jsonify, current_app
+from flask import Blueprint, request, jsonify
+from flask_login import login_required, current_user
 from app import db
 from app.models import Attendance, AttendanceStatus
+from app.utils import update_daily_summary
+from app.photo_ingest import photo_ingestor
+from app.write_queue import write_queue
+from app.clock_in_guard import clocked_in_today
+from sqlalchemy.exc import IntegrityError
 from datetime import datetime
-from werkzeug.utils import secure_filename
 
-# Konfigurasi Logging
-logging.basicConfig(level=logging.INFO,  # Atur level log yang diinginkan (INFO, ERROR, DEBUG, dsb)
-                    format='%(asctime)s - %(levelname)s - %(message)s',
-                    handlers=[
-                        logging.StreamHandler(),  # Output log ke konsol
-                        logging.FileHandler('app.log')  # Simpan log ke file app.log
-                    ])
+logger = logging.getLogger(__name__)
 
 attendance_bp = Blueprint('attendance', __name__)
 
 @attendance_bp.route('/record', methods=['GET', 'POST'])
+@login_required
 def record_attendance():
     if request.method == 'POST':
         photo = request.files.get('photo')  # Ambil file foto dari form
-        photo_filename = None
-        
-        if photo:
-            try:
-                photo_filename = secure_filename(photo.filename)
-                # Tentukan path untuk menyimpan foto ke dalam folder absensi
-                upload_folder = os.path.join(current_app.root_path, 'static', 'uploads', 'absensi')
-                # Pastikan folder absensi ada
-                if not os.path.exists(upload_folder):
-                    os.makedirs(upload_folder)
-                # Simpan foto ke folder absensi
-                photo.save(os.path.join(upload_folder, photo_filename))
-
-                logging.info(f"Photo uploaded successfully: {photo_filename}")  # Logging saat foto berhasil diupload
+        # ID dari identitas login (cookie session atau token bearer), sama seperti user_bp.clock_in
+        employee_id = current_user.id
+        now = datetime.now()  # Kolom date dan time bertipe DateTime, sama seperti user_bp.clock_in
 
-            except Exception as e:
-                logging.error(f"Error while uploading photo: {e}")  # Logging jika terjadi kesalahan saat upload foto
-                return jsonify({'message': 'Terjadi kesalahan saat mengunggah foto. Silakan coba lagi.'}), 500
+        # Jalan pintas: retry clock in hari ini ditolak sebelum database disentuh
+        if clocked_in_today.is_set(employee_id):
+            return jsonify({'message': 'Anda sudah absen hari ini!'}), 409
 
         # Simpan data absensi ke database
         try:
-            attendance = Attendance(
-                employee_id=session['user_id'],
-                status=AttendanceStatus.CLOCK_IN,
-                date=datetime.today().date(),
-                time=datetime.now().time(),
-                photo=photo_filename,  # Simpan nama file foto
-            )
-            db.session.add(attendance)
-            db.session.commit()
-            logging.info(f"Attendance recorded for employee ID {session['user_id']} on {datetime.today().date()} at {datetime.now().time()}")  # Logging absensi yang berhasil
+            def write():
+                attendance = Attendance(
+                    employee_id=employee_id,
+                    status=AttendanceStatus.CLOCK_IN,
+                    date=now.date(),
+                    time=now,
+                )
+                db.session.add(attendance)
+                update_daily_summary(attendance)
+                db.session.flush()
+                return attendance.id
+
+            try:
+                attendance_id = write_queue.run(write)
+            except IntegrityError:
+                # Unique (employee_id, date): sudah ada catatan hari ini
+                clocked_in_today.mark(employee_id)
+                return jsonify({'message': 'Anda sudah absen hari ini!'}), 409
+            clocked_in_today.mark(employee_id)
+
+            if photo:
+                try:
+                    # Foto disimpan di namespace absensi oleh worker latar belakang
+                    photo_ingestor.submit(photo, attendance_id, namespace='absensi')
+                    logger.info(f"Photo queued for ingestion for attendance {attendance_id}")  # Logging saat foto masuk antrian
+                except Exception as e:
+                    logger.error(f"Error while uploading photo: {e}")  # Logging jika terjadi kesalahan saat upload foto
+                    return jsonify({'message': 'Terjadi kesalahan saat mengunggah foto. Silakan coba lagi.'}), 500
+
+            logger.info(f"Attendance recorded for employee ID {employee_id} on {now.date()} at {now.time()}")  # Logging absensi yang berhasil
 
             # Kembalikan respons dalam format JSON
             return jsonify({'message': 'Absensi berhasil!', 'attendance': {
-                'employee_id': session['user_id'],
-                'status': AttendanceStatus.CLOCK_IN,
-                'date': datetime.today().date().strftime('%Y-%m-%d'),
-                'time': datetime.now().time().strftime('%H:%M:%S'),
-                'photo': photo_filename
+                'employee_id': employee_id,
+                'status': AttendanceStatus.CLOCK_IN.value,
+                'date': now.strftime('%Y-%m-%d'),
+                'time': now.strftime('%H:%M:%S'),
+                'photo': 'processing' if photo else None
             }}), 201
 
         except Exception as e:
             db.session.rollback()  # Rollback jika terjadi kesalahan saat menyimpan absensi
-            logging.error(f"Error while recording attendance for employee ID {session['user_id']}: {e}")  # Logging error saat menyimpan absensi
+            logger.error(f"Error while recording attendance for employee ID {employee_id}: {e}")  # Logging error saat menyimpan absensi
             return jsonify({'message': 'Terjadi kesalahan saat mencatat absensi. Silakan coba lagi.'}), 500
 
     # Jika metode GET, kembalikan respons JSON atau informasi lain yang diperlukan
@@ -2,68 +2,160 @@ import random, string
 import logging
 from flask import Blueprint, render_template, request, flash, redirect, url_for, jsonify
 from flask_login import login_user, logout_user, login_required, current_user
-from app.models import User
-from flask_bcrypt import Bcrypt
-from flask_mail import Mail, Message  # Pastikan Anda mengimpor Flask-Mail
-from app import mail, db
+from app.models import User, Employee
+from app import db
 from werkzeug.security import generate_password_hash
 from app.utils import generate_reset_token, verify_reset_token
+from app.identity_cache import identity_cache
+from app.mail_outbox import mail_outbox
+from app.passwords import password_hasher, PasswordHasherBusy
+from app.write_queue import write_queue
+from app.tokens import token_service
+from app.rate_limit import rate_limiter
 
-# Konfigurasi Logging
-logging.basicConfig(level=logging.INFO,  # Atur level log yang diinginkan (INFO, ERROR, DEBUG, dsb)
-                    format='%(asctime)s - %(levelname)s - %(message)s',
-                    handlers=[
-                        logging.StreamHandler(),  # Output log ke konsol
-                        logging.FileHandler('app.log')  # Simpan log ke file app.log
-                    ])
+logger = logging.getLogger(__name__)
 
 auth_bp = Blueprint('auth_bp', __name__)
-bcrypt = Bcrypt()
-mail = Mail()  # Inisialisasi Flask-Mail
+
+
+def _rehash_password(user_id, old_hash, password):
+    """Simpan ulang hash password dengan BCRYPT_LOG_ROUNDS saat ini setelah login berhasil."""
+    new_hash = password_hasher.hash(password)
+
+    def write():
+        # Hanya jika hash belum berubah, agar reset password yang bersamaan tidak tertimpa
+        updated = db.session.execute(
+            db.update(User).where(User.id == user_id, User.password == old_hash).values(password=new_hash)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        if updated:
+            db.session.execute(
+                db.update(Employee).where(Employee.user_id == user_id).values(password=new_hash)
+                .execution_options(synchronize_session=False)
+            )
+        return updated
+
+    if write_queue.run(write):
+        password_hasher.record_rehash()
+        logger.info(f'Rehashed password for user {user_id} with cost {password_hasher.rounds}.')
+        return new_hash
+    return old_hash
+
+
+def _too_many_requests(retry_after):
+    return jsonify({"code": 429, "status": "Too Many Requests", "message": "Terlalu banyak percobaan, silakan coba lagi nanti."}), \
+        429, {'Retry-After': str(retry_after)}
+
+
+def _authenticate(data):
+    """Cek email/password dari body JSON.
+
+    Mengembalikan (user, hash password terkini, None) jika berhasil, atau
+    (None, None, response error) jika gagal.
+    """
+    data = data or {}
+    email = data.get('email')
+    password = data.get('password')
+
+    logger.info(f"Attempting to login with email: {email}")
+
+    if not email or not password:
+        return None, None, (jsonify({"code": 400, "status": "Bad Request", "message": "Email dan password harus diisi!"}), 400)
+
+    # Rate limit dicek sebelum query database dan bcrypt: burst credential stuffing ditolak murah
+    # Hanya login gagal yang dihitung: login sah dari satu NAT kantor saat pergantian shift tidak ditolak
+    email_key = email.strip().lower()
+    client_ip = rate_limiter.client_ip(request)
+    retry_after = rate_limiter.blocked('login_ip', client_ip) or rate_limiter.blocked('login_email', email_key)
+    if retry_after:
+        logger.warning(f'Login rate limited for {email} from {client_ip}.')
+        return None, None, _too_many_requests(retry_after)
+
+    user = User.query.filter_by(email=email).first()
+    if not user:
+        rate_limiter.record('login_ip', client_ip)
+        rate_limiter.record('login_email', email_key)
+        logger.warning(f'Failed login attempt. Email {email} not found in database.')
+        return None, None, (jsonify({"code": 404, "status": "Not Found", "message": "Email tidak ditemukan!"}), 404)
+
+    logger.info(f"User found: {user.email}, Status: {user.status}")
+    try:
+        # Verifikasi bcrypt berjalan di process pool, bukan di thread request
+        matched = password_hasher.verify(user.password, password)
+    except PasswordHasherBusy:
+        logger.warning(f'Password hasher busy, rejecting login for {email}.')
+        return None, None, (jsonify({"code": 503, "status": "Service Unavailable", "message": "Server sedang sibuk, silakan coba lagi."}), 503, {'Retry-After': '1'})
+
+    if not matched:
+        # Login gagal dihitung per IP dan per email; setelah batasnya email dikunci sementara
+        rate_limiter.record('login_ip', client_ip)
+        rate_limiter.record('login_email', email_key)
+        logger.warning(f'Failed login attempt. Incorrect password for user: {email}')
+        return None, None, (jsonify({"code": 401, "status": "Unauthorized", "message": "Password salah!"}), 401)
+
+    rate_limiter.reset('login_email', email_key)
+    password_hash = user.password
+    if password_hasher.needs_rehash(password_hash):
+        try:
+            password_hash = _rehash_password(user.id, password_hash, password)
+        except Exception as e:
+            # Login tetap berhasil; rehash dicoba lagi pada login berikutnya
+            logger.warning(f'Failed to rehash password for user {user.email}: {e}')
+    return user, password_hash, None
+
 
 @auth_bp.route('/login', methods=['GET', 'POST'])
 def login():
     if request.method == 'POST':
         # Ambil data dari body JSON
-        data = request.get_json()
-        email = data.get('email')
-        password = data.get('password')
+        user, _, error = _authenticate(request.get_json())
+        if error:
+            return error
+
+        login_user(user)
+        logger.info(f'User {user.email} successfully logged in.')
+        return jsonify({
+            "code": 200,
+            "status": "OK",
+            "message": "Login berhasil!",
+            "redirect_url": url_for('admin_bp.admin_dashboard') if user.status == 1 else url_for('user_bp.user_dashboard')
+        }), 200
 
-        logging.info(f"Attempting to login with email: {email}")
+    # Jika metode GET, render halaman login
+    return render_template('auth/login.html')
 
-        if not email or not password:
-            # logging.info(f'email = {email}')
-            # logging.info(f'password = {password}')
-            return jsonify({"code": 400, "status": "Bad Request", "message": "Email dan password harus diisi!"}), 400
 
-        user = User.query.filter_by(email=email).first()
-        if user:
-            logging.info(f"User found: {user.email}, Status: {user.status}")
-            if bcrypt.check_password_hash(user.password, password):
-                login_user(user)
-                logging.info(f'User {user.email} successfully logged in.')
-                return jsonify({
-                    "code": 200,
-                    "status": "OK",
-                    "message": "Login berhasil!",
-                    "redirect_url": url_for('admin_bp.admin_dashboard') if user.status == 1 else url_for('user_bp.user_dashboard')
-                }), 200
-            else:
-                logging.warning(f'Failed login attempt. Incorrect password for user: {email}')
-                return jsonify({"code": 401, "status": "Unauthorized", "message": "Password salah!"}), 401
-        else:
-            logging.warning(f'Failed login attempt. Email {email} not found in database.')
-            return jsonify({"code": 404, "status": "Not Found", "message": "Email tidak ditemukan!"}), 404
+# Token bearer untuk API mobile: tanpa cookie session
+@auth_bp.route('/token', methods=['POST'])
+def issue_token():
+    user, password_hash, error = _authenticate(request.get_json(silent=True))
+    if error:
+        return error
+
+    employee_id = db.session.execute(db.select(Employee.id).where(Employee.user_id == user.id).limit(1)).scalar()
+    tokens = token_service.issue(user.id, user.email, user.status, employee_id, password_hash)
+    logger.info(f'Issued API tokens for user {user.email}.')
+    return jsonify({"code": 200, "status": "OK", **tokens}), 200
 
-    # Jika metode GET, render halaman login
-    return render_template('auth/login.html')
+
+@auth_bp.route('/token/refresh', methods=['POST'])
+def refresh_token():
+    data = request.get_json(silent=True) or {}
+    token = data.get('refresh_token')
+    if not token:
+        return jsonify({"code": 400, "status": "Bad Request", "message": "refresh_token harus diisi!"}), 400
+
+    tokens = token_service.refresh(token)
+    if tokens is None:
+        return jsonify({"code": 401, "status": "Unauthorized", "message": "Refresh token tidak valid atau telah kedaluwarsa."}), 401
+    return jsonify({"code": 200, "status": "OK", **tokens}), 200
 
 
 # Logout
 @auth_bp.route('/logout', methods=['GET', 'POST'])
 def logout():
     if current_user.is_authenticated:
-        logging.info(f'User   {current_user.email} logged out.')
+        logger.info(f'User   {current_user.email} logged out.')
         logout_user()
         
         # Jika metode POST, kembalikan respons dalam format JSON
@@ -89,16 +181,35 @@ def forgot_password():
         if not email:
             return jsonify({"code": 400, "status": "Bad Request", "message": "Email harus diisi!"}), 400
 
+        retry_after = (rate_limiter.hit('forgot_ip', rate_limiter.client_ip(request))
+                       or rate_limiter.hit('forgot_email', email.strip().lower()))
+        if retry_after:
+            logger.warning(f'Forgot password rate limited for {email}.')
+            return _too_many_requests(retry_after)
+
         user = User.query.filter_by(email=email).first()
         if user:
             token = generate_reset_token(user.id)
             reset_url = url_for('auth_bp.reset_password', token=token, _external=True)
 
-            # Kirim email reset password (implementasi pengiriman email tidak ditampilkan di sini)
-            logging.info(f'Password reset email sent to {email}.')
+            # Email masuk outbox dan dikirim worker di latar belakang; request tidak menunggu SMTP
+            try:
+                mail_outbox.send(
+                    user.email,
+                    'Reset Password - Sistem Presensi',
+                    'Halo,\n\n'
+                    'Kami menerima permintaan untuk mengatur ulang kata sandi akun Anda. '
+                    'Buka tautan berikut dalam 10 menit:\n\n'
+                    f'{reset_url}\n\n'
+                    'Abaikan email ini jika Anda tidak meminta reset kata sandi.'
+                )
+            except Exception as e:
+                logger.error(f'Error queueing password reset email for {email}: {e}')
+                return jsonify({"code": 500, "status": "Internal Server Error", "message": "Gagal mengirim email reset password."}), 500
+            logger.info(f'Password reset email queued for {email}.')
             return jsonify({"code": 200, "status": "OK", "message": "Email reset password telah dikirim!"}), 200
         else:
-            logging.warning(f'Email {email} tidak ditemukan.')
+            logger.warning(f'Email {email} tidak ditemukan.')
             return jsonify({"code": 404, "status": "Not Found", "message": "Email tidak ditemukan!"}), 404
 
     # Jika metode GET, render halaman forgot password
@@ -121,11 +232,15 @@ def reset_password(token):
             return jsonify({"code": 400, "status": "Bad Request", "message": "Password baru harus diisi!"}), 400
 
         user = User.query.get(user_id)
-        hashed_password = bcrypt.generate_password_hash(new_password).decode('utf-8')
+        try:
+            hashed_password = password_hasher.hash(new_password)
+        except PasswordHasherBusy:
+            return jsonify({"code": 503, "status": "Service Unavailable", "message": "Server sedang sibuk, silakan coba lagi."}), 503, {'Retry-After': '1'}
         user.password = hashed_password
 
         try:
             db.session.commit()
+            identity_cache.invalidate(user.id)
             return jsonify({"code": 200, "status": "OK", "message": "Kata sandi Anda telah diperbarui!"}), 200
         except Exception as e:
             db.session.rollback()
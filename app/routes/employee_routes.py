@@ -1,19 +1,17 @@
-import os
-import logging, base64, uuid
-from flask import Blueprint, render_template, request, flash, redirect, url_for, current_app, jsonify
+import logging, base64
+from flask import Blueprint, render_template, request, flash, redirect, url_for, jsonify
 from flask_login import login_required, current_user
 from app import db
-from app.models import Attendance, AttendanceStatus, Employee
-from werkzeug.utils import secure_filename
+from app.models import Attendance, AttendanceStatus
+from app.utils import (update_daily_summary, get_leave_upload, attendance_etag, get_attendance_recap,
+                       not_modified, with_etag, RECAP_PAGE_ARGS)
+from app.serializers import serialize_recap, json_response
+from app.photo_storage import photo_storage
+from app.write_queue import write_queue
+from sqlalchemy.exc import IntegrityError
 from datetime import datetime
 
-# Konfigurasi Logging
-logging.basicConfig(level=logging.INFO,  # Atur level log yang diinginkan (INFO, ERROR, DEBUG, dsb)
-                    format='%(asctime)s - %(levelname)s - %(message)s',
-                    handlers=[
-                        logging.StreamHandler(),  # Output log ke konsol
-                        logging.FileHandler('app.log')  # Simpan log ke file app.log
-                    ])
+logger = logging.getLogger(__name__)
 
 home_bp = Blueprint('home', __name__)
 
@@ -21,7 +19,7 @@ home_bp = Blueprint('home', __name__)
 def home():
     # Logic for the home page
     user_status = 'Active'
-    logging.info(f"Home page accessed by user: {current_user.id if current_user.is_authenticated else 'Guest'}")  # Logging siapa yang mengakses halaman home
+    logger.info(f"Home page accessed by user: {current_user.id if current_user.is_authenticated else 'Guest'}")  # Logging siapa yang mengakses halaman home
 
     # Jika header "Accept" adalah "application/json", kembalikan JSON
     if request.accept_mimetypes.best_match(['application/json', 'text/html']) == 'application/json':
@@ -41,8 +39,8 @@ employee_bp = Blueprint('employee', __name__)
 @employee_bp.route('/profile', methods=['GET'])
 @login_required
 def profile():
-    logging.info(f"Profile page accessed by user: {current_user.id}")  # Logging saat mengakses halaman profil
-    employee = Employee.query.filter_by(user_id=current_user.id).first()
+    logger.info(f"Profile page accessed by user: {current_user.id}")  # Logging saat mengakses halaman profil
+    employee = current_user.employee  # Sudah dimuat bersama user oleh identity cache
 
     # Cek apakah klien menerima format JSON
     if request.accept_mimetypes.best_match(['application/json', 'text/html']) == 'application/json':
@@ -66,26 +64,27 @@ def profile():
 @employee_bp.route('/recap', methods=['GET'])
 @login_required
 def recap():
-    # Ambil semua catatan absensi untuk karyawan yang sedang login
-    attendance_records = Attendance.query.filter_by(employee_id=current_user.id).all()
-    logging.info(f"Recap page accessed by user: {current_user.id}, Found {len(attendance_records)} attendance records")
-
     # Cek apakah permintaan ingin menerima JSON
     if request.accept_mimetypes.best_match(['application/json', 'text/html']) == 'application/json':
-        records_data = [
-            {
-                'date': record.date.strftime('%Y-%m-%d'),
-                'status': record.status.value,  # Menggunakan .value untuk mendapatkan string dari enum
-                'reason': record.reason if record.reason else 'N/A',
-                'photo': record.photo if record.photo else 'Tidak ada foto yang diunggah.',
-                'time': record.time.strftime('%H:%M:%S'),
-                'time_out': record.time_out.strftime('%H:%M:%S') if record.time_out else 'Belum Clock Out',
-                'latitude': record.latitude,
-                'longitude': record.longitude
-            }
-            for record in attendance_records
-        ]
-        return jsonify(records_data), 200
+        # Polling tanpa perubahan cukup dijawab 304 setelah satu lookup ber-index
+        etag = attendance_etag(current_user.id)
+        if etag in request.if_none_match:
+            return not_modified(etag)
+
+        try:
+            attendance_records, next_cursor = get_attendance_recap(current_user.id, request.args)
+        except ValueError:
+            return jsonify({"status": "error", "message": "Parameter since/limit/offset/cursor tidak valid!"}), 400
+        logger.info(f"Recap page accessed by user: {current_user.id}, Found {len(attendance_records)} attendance records")
+
+        records_data = serialize_recap(attendance_records)
+        if any(key in request.args for key in RECAP_PAGE_ARGS):
+            return with_etag(json_response({'records': records_data, 'next_cursor': next_cursor}), etag), 200
+        return with_etag(json_response(records_data), etag), 200
+
+    # Ambil semua catatan absensi untuk karyawan yang sedang login
+    attendance_records = Attendance.query.filter_by(employee_id=current_user.id).all()
+    logger.info(f"Recap page accessed by user: {current_user.id}, Found {len(attendance_records)} attendance records")
 
     # Jika permintaan bukan JSON, render halaman rekap absensi
     return render_template('employee/recap.html', attendance_records=attendance_records)
@@ -97,53 +96,71 @@ def leave():
     if request.method == 'POST':
         # Cek apakah permintaan menginginkan JSON
         if request.accept_mimetypes.best_match(['application/json', 'text/html']) == 'application/json':
-            # Ambil data dari body JSON
-            data = request.get_json()
-            if not data:
-                return jsonify({"status": "error", "message": "Body request kosong atau tidak valid!"}), 400
-
-            # Ambil data dari JSON
-            reason = data.get('reason')
-            date = data.get('date')
-            photo_data = data.get('photo')  # Ambil data foto sebagai base64 string jika ada
+            # Mode streaming (multipart / base64 chunked) atau JSON biasa
+            upload = get_leave_upload()
+            if upload is not None:
+                reason, date, photo_stream = upload
+                photo_data = None
+            else:
+                # Ambil data dari body JSON
+                data = request.get_json()
+                if not data:
+                    return jsonify({"status": "error", "message": "Body request kosong atau tidak valid!"}), 400
+
+                # Ambil data dari JSON
+                reason = data.get('reason')
+                date = data.get('date')
+                photo_data = data.get('photo')  # Ambil data foto sebagai base64 string jika ada
+                photo_stream = None
 
             # Validasi input
             if not reason or not date:
-                logging.warning(f"Leave request failed for user {current_user.id}: Reason or date not provided")
+                logger.warning(f"Leave request failed for user {current_user.id}: Reason or date not provided")
                 return jsonify({"status": "error", "message": "Alasan dan tanggal harus diisi!"}), 400
 
             # Simpan foto jika ada
             photo_filename = None
-            if photo_data:
+            if photo_data or photo_stream:
                 try:
-                    # Decode base64 string dan simpan sebagai file
-                    photo_binary = base64.b64decode(photo_data)
-                    photo_filename = f"{uuid.uuid4().hex}.jpg"  # Buat nama file unik
-                    photo_path = os.path.join(current_app.root_path, 'static', 'uploads', photo_filename)
-                    with open(photo_path, 'wb') as photo_file:
-                        photo_file.write(photo_binary)
-                    logging.info(f"Leave photo uploaded for user {current_user.id}: {photo_filename}")
+                    if photo_stream:
+                        # Decode per chunk langsung ke disk tanpa menyalin seluruh foto ke memori
+                        photo_filename = photo_storage.save_stream(photo_stream, '.jpg')
+                    else:
+                        # Decode base64 string dan simpan sebagai file
+                        photo_binary = base64.b64decode(photo_data)
+                        photo_filename = photo_storage.save_bytes(photo_binary, '.jpg')  # Nama file = hash isi foto
+                    logger.info(f"Leave photo uploaded for user {current_user.id}: {photo_filename}")
                 except Exception as e:
-                    logging.error(f"Error decoding or saving photo for user {current_user.id}: {e}")
+                    logger.error(f"Error decoding or saving photo for user {current_user.id}: {e}")
                     return jsonify({"status": "error", "message": "Foto tidak valid atau gagal disimpan!"}), 400
 
             # Simpan pengajuan izin ke database
             try:
-                attendance = Attendance(
-                    employee_id=current_user.id,
-                    status=AttendanceStatus.IJIN,
-                    date=datetime.strptime(date, '%Y-%m-%d'),  # Mengonversi string ke objek datetime
-                    time=datetime.now(),
-                    reason=reason,
-                    photo=photo_filename  # Simpan nama file foto
-                )
-                db.session.add(attendance)
-                db.session.commit()
-                logging.info(f"Leave request successfully submitted for user {current_user.id} on {date}")
+                employee_id = current_user.id
+                leave_date = datetime.strptime(date, '%Y-%m-%d')  # Mengonversi string ke objek datetime
+
+                def write():
+                    attendance = Attendance(
+                        employee_id=employee_id,
+                        status=AttendanceStatus.IJIN,
+                        date=leave_date,
+                        time=datetime.now(),
+                        reason=reason,
+                        photo=photo_filename  # Simpan nama file foto
+                    )
+                    db.session.add(attendance)
+                    update_daily_summary(attendance)
+
+                try:
+                    write_queue.run(write)
+                except IntegrityError:
+                    logger.warning(f"Leave request failed for user {employee_id}: attendance for {date} already exists")
+                    return jsonify({"status": "error", "message": "Sudah ada catatan absensi pada tanggal tersebut!"}), 409
+                logger.info(f"Leave request successfully submitted for user {current_user.id} on {date}")
                 return jsonify({"status": "success", "message": "Pengajuan izin berhasil!"}), 200
             except Exception as e:
                 db.session.rollback()
-                logging.error(f"Error while submitting leave request for user {current_user.id}: {e}")
+                logger.error(f"Error while submitting leave request for user {current_user.id}: {e}")
                 return jsonify({"status": "error", "message": "Terjadi kesalahan saat mengajukan izin. Silakan coba lagi."}), 500
 
     # Jika metode GET, render halaman pengajuan izin
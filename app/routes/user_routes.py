@@ -1,43 +1,64 @@
-import logging, os, base64
-from flask import Blueprint, render_template, redirect, url_for, flash, request, current_app, jsonify
+import logging, base64
+from flask import Blueprint, render_template, redirect, url_for, flash, request, jsonify
 from flask_login import login_required, current_user
 from app import db
-from app.models import Attendance, AttendanceStatus, Employee
-from werkzeug.utils import secure_filename
-from datetime import datetime
+from app.models import Attendance, AttendanceStatus
+from app.utils import (update_daily_summary, get_leave_upload, attendance_etag, bump_attendance_version,
+                       get_attendance_recap, not_modified, with_etag, RECAP_PAGE_ARGS)
+from app.serializers import serialize_recap, json_response
+from app.photo_ingest import photo_ingestor
+from app.photo_storage import photo_storage
+from app.geofence import geofence
+from app.write_queue import write_queue
+from app.clock_in_guard import clocked_in_today
+from sqlalchemy.exc import IntegrityError
+from datetime import datetime, timedelta
 import pytz
 
-# Konfigurasi Logging
-logging.basicConfig(level=logging.INFO,  # Atur level log yang diinginkan (INFO, ERROR, DEBUG, dsb)
-                    format='%(asctime)s - %(levelname)s - %(message)s',
-                    handlers=[
-                        logging.StreamHandler(),  # Output log ke konsol
-                        logging.FileHandler('app.log')  # Simpan log ke file app.log
-                    ])
+logger = logging.getLogger(__name__)
 
 user_bp = Blueprint('user_bp', __name__)
 
+# Pesan penolakan clock in sesuai catatan yang sudah ada hari ini
+EXISTING_ATTENDANCE_MESSAGES = {
+    AttendanceStatus.CLOCK_IN: "Anda sudah Clock In hari ini!",
+    AttendanceStatus.CLOCK_OUT: "Anda sudah Clock Out hari ini!",
+    AttendanceStatus.IJIN: "Anda sudah mengajukan izin untuk hari ini!",
+    AttendanceStatus.ALPHA: "Anda sudah tercatat Alpha hari ini!",
+}
+
+
+def _existing_attendance_response(employee_id):
+    # Satu lookup ber-index (unique employee_id, date) hanya saat clock in ditolak
+    today = datetime.combine(datetime.now().date(), datetime.min.time())
+    status = db.session.execute(
+        db.select(Attendance.status).where(Attendance.employee_id == employee_id, Attendance.date == today).limit(1)
+    ).scalar()
+    message = EXISTING_ATTENDANCE_MESSAGES.get(status, EXISTING_ATTENDANCE_MESSAGES[AttendanceStatus.CLOCK_IN])
+    logger.warning(f"User {employee_id} failed clock-in: attendance for today already exists ({status}).")  # Logging jika clock in ganda
+    return jsonify({"status": "error", "message": message}), 409
+
 @user_bp.route('/user_dashboard', methods=['GET'])
 @login_required
 def user_dashboard():
-    employee = Employee.query.filter_by(user_id=current_user.id).first()
-    attendances = Attendance.query.filter_by(employee_id=current_user.id).all()
+    employee = current_user.employee  # Sudah dimuat bersama user oleh identity cache
 
-    logging.info(f"User {current_user.id} accessed their dashboard.")  # Logging saat pengguna mengakses dashboard
+    logger.info(f"User {current_user.id} accessed their dashboard.")  # Logging saat pengguna mengakses dashboard
 
     # Cek apakah permintaan menginginkan JSON
     if request.accept_mimetypes.best_match(['application/json', 'text/html']) == 'application/json':
-        attendance_data = [
-            {
-                'date': attendance.date.strftime('%Y-%m-%d'),
-                'status': attendance.status.value,  # Menggunakan .value untuk mendapatkan string dari enum
-                'time': attendance.time.strftime('%H:%M:%S'),
-                'time_out': attendance.time_out.strftime('%H:%M:%S') if attendance.time_out else 'Belum Clock Out',
-                'reason': attendance.reason if attendance.reason else 'N/A',
-                'photo': attendance.photo if attendance.photo else 'Tidak ada foto yang diunggah.'
-            }
-            for attendance in attendances
-        ]
+        # Profil karyawan ikut dalam ETag karena ikut dikirim di response
+        etag = attendance_etag(current_user.id, employee.id, employee.name, employee.gender, employee.email,
+                               employee.phone_number, employee.photo_profile)
+        if etag in request.if_none_match:
+            return not_modified(etag)
+
+        try:
+            attendances, next_cursor = get_attendance_recap(current_user.id, request.args)
+        except ValueError:
+            return jsonify({"status": "error", "message": "Parameter since/limit/offset/cursor tidak valid!"}), 400
+
+        attendance_data = serialize_recap(attendances, include_location=False)
         response_data = {
             'employee': {
                 'id': employee.id,
@@ -49,7 +70,11 @@ def user_dashboard():
             },
             'attendances': attendance_data
         }
-        return jsonify(response_data), 200
+        if any(key in request.args for key in RECAP_PAGE_ARGS):
+            response_data['next_cursor'] = next_cursor
+        return with_etag(json_response(response_data), etag), 200
+
+    attendances = Attendance.query.filter_by(employee_id=current_user.id).all()
 
     # Jika permintaan bukan JSON, render halaman dashboard
     return render_template('employee/user_dashboard.html', attendances=attendances, employee=employee)
@@ -59,41 +84,62 @@ def user_dashboard():
 @login_required
 def clock_in():
     if request.method == 'POST':
-        data = request.get_json()  # Mengambil data JSON dari request (jika ada)
+        # Jalan pintas: retry clock in hari ini ditolak sebelum foto atau database disentuh
+        if clocked_in_today.is_set(current_user.id):
+            return _existing_attendance_response(current_user.id)
+
+        # Form multipart (foto + lat/long) atau JSON
+        data = request.form if request.mimetype == 'multipart/form-data' else (request.get_json(silent=True) or {})
         photo = request.files.get('photo')  # Mengambil file foto dari request
         lat = data.get('lat')
         long = data.get('long')
 
         if not photo:
             flash('Foto tidak ditemukan. Silakan coba lagi.', 'danger')
-            logging.warning(f"User {current_user.id} failed clock-in: Photo not provided.")  # Logging jika foto tidak ada
+            logger.warning(f"User {current_user.id} failed clock-in: Photo not provided.")  # Logging jika foto tidak ada
             return jsonify({"status": "error", "message": "Foto tidak ditemukan. Silakan coba lagi."}), 400
 
         # Validasi latitude dan longitude
         if not lat or not long:
             flash('Latitude dan Longitude harus diisi!', 'danger')
-            logging.warning(f"User {current_user.id} failed clock-in: Latitude or Longitude missing.")  # Logging jika lat/long tidak ada
+            logger.warning(f"User {current_user.id} failed clock-in: Latitude or Longitude missing.")  # Logging jika lat/long tidak ada
             return jsonify({"status": "error", "message": "Latitude dan Longitude harus diisi!"}), 400
 
-        # Simpan foto ke folder static/uploads
-        photo_filename = secure_filename(photo.filename)
-        photo_path = os.path.join(current_app.root_path, 'static', 'uploads', photo_filename)
-        photo.save(photo_path)
-
-        # Simpan data absensi ke database
-        attendance = Attendance(
-            employee_id=current_user.id,  # Menggunakan ID karyawan yang sedang login
-            status=AttendanceStatus.CLOCK_IN,
-            date=datetime.today().date(),
-            time=datetime.now(),
-            photo=photo_filename,  # Simpan nama file foto
-            latitude=float(lat),  # Konversi lat dan long ke float
-            longitude=float(long)
-        )
-        db.session.add(attendance)
-        db.session.commit()
+        # Validasi posisi terhadap semua lokasi kantor (jika ada lokasi yang diatur)
+        if geofence.fences and geofence.locate(float(lat), float(long)) is None:
+            logger.warning(f"User {current_user.id} failed clock-in: position {lat}, {long} outside all locations.")  # Logging jika di luar geofence
+            return jsonify({"status": "error", "message": "Lokasi Anda berada di luar area kantor!"}), 403
+
+        employee_id = current_user.id  # Menggunakan ID karyawan yang sedang login
+        now = datetime.now()
+
+        # Simpan data absensi ke database; kolom photo diisi oleh worker setelah foto diproses
+        def write():
+            attendance = Attendance(
+                employee_id=employee_id,
+                status=AttendanceStatus.CLOCK_IN,
+                date=now.date(),
+                time=now,
+                latitude=float(lat),  # Konversi lat dan long ke float
+                longitude=float(long)
+            )
+            db.session.add(attendance)
+            update_daily_summary(attendance)
+            db.session.flush()
+            return attendance.id
+
+        try:
+            attendance_id = write_queue.run(write)
+        except IntegrityError:
+            # Unique (employee_id, date): sudah ada catatan hari ini, mungkin dari worker lain
+            clocked_in_today.mark(employee_id)
+            return _existing_attendance_response(employee_id)
+        clocked_in_today.mark(employee_id)
+
+        # Foto di-spool lalu disimpan ke photo_storage oleh worker latar belakang
+        photo_ingestor.submit(photo, attendance_id)
         flash('Clock In berhasil!', 'success')
-        logging.info(f"User {current_user.id} successfully clocked in at {lat}, {long} with photo {photo_filename}.")  # Logging jika clock-in berhasil
+        logger.info(f"User {current_user.id} successfully clocked in at {lat}, {long}.")  # Logging jika clock-in berhasil
 
         # Kembalikan respons JSON jika berhasil
         return jsonify({"status": "success", "message": "Clock In berhasil!"}), 200
@@ -107,23 +153,44 @@ def clock_in():
 @login_required
 def clock_out():
     if request.method == 'POST':
-        # Cari data clock-in terakhir
-        attendance = Attendance.query.filter_by(
-            employee_id=current_user.id,
-            status=AttendanceStatus.CLOCK_IN
-        ).order_by(Attendance.id.desc()).first()
-
-        if not attendance:
-            flash('Tidak ada data Clock In sebelumnya untuk Clock Out!', 'danger')
-            logging.warning(f"User {current_user.id} attempted to clock out without clocking in.")  # Logging jika tidak ada clock-in sebelumnya
-            return jsonify({"status": "error", "message": "Tidak ada data Clock In sebelumnya untuk Clock Out!"}), 400
-
-        # Update data clock-out
-        attendance.time_out = datetime.now()  # Simpan waktu clock out
-        attendance.status = AttendanceStatus.CLOCK_OUT
-        db.session.commit()
+        employee_id = current_user.id
+        idempotency_key = request.headers.get('Idempotency-Key', '')[:64] or None
+        now = datetime.now()
+        today = datetime.combine(now.date(), datetime.min.time())
+        returned_columns = (Attendance.id, Attendance.employee_id, Attendance.date, Attendance.status,
+                            Attendance.time, Attendance.time_out, Attendance.reason)
+
+        def write():
+            # Satu UPDATE bersyarat: hanya clock in hari ini yang masih terbuka yang ditutup
+            rows = db.session.execute(
+                db.update(Attendance)
+                .where(Attendance.employee_id == employee_id,
+                       Attendance.date >= today,
+                       Attendance.date < today + timedelta(days=1),
+                       Attendance.status == AttendanceStatus.CLOCK_IN)
+                .values(status=AttendanceStatus.CLOCK_OUT, time_out=now, clock_out_key=idempotency_key)
+                .returning(*returned_columns)
+            ).all()
+            for row in rows:
+                update_daily_summary(row, new_record=False)  # Baris clock in yang sama, sudah dihitung
+            if rows:
+                bump_attendance_version(employee_id)  # Baris yang sama berubah: ETag rekap ikut berubah
+            if rows or not idempotency_key:
+                return bool(rows)
+
+            # Retry dengan Idempotency-Key yang sama: clock out sudah tercatat sebelumnya
+            return db.session.execute(
+                db.select(Attendance.id).where(Attendance.employee_id == employee_id,
+                                               Attendance.clock_out_key == idempotency_key).limit(1)
+            ).first() is not None
+
+        if not write_queue.run(write):
+            flash('Tidak ada data Clock In hari ini untuk Clock Out!', 'danger')
+            logger.warning(f"User {current_user.id} attempted to clock out without clocking in today.")  # Logging jika tidak ada clock-in hari ini
+            return jsonify({"status": "error", "message": "Tidak ada data Clock In hari ini untuk Clock Out!"}), 400
+
         flash('Clock Out berhasil!', 'success')
-        logging.info(f"User {current_user.id} successfully clocked out.")  # Logging jika clock-out berhasil
+        logger.info(f"User {current_user.id} successfully clocked out.")  # Logging jika clock-out berhasil
         
         # Jika permintaan meminta JSON, kembalikan respons JSON
         if request.accept_mimetypes.best_match(['application/json', 'text/html']) == 'application/json':
@@ -136,26 +203,27 @@ def clock_out():
 @user_bp.route('/recap', methods=['GET'])
 @login_required
 def recap():
-    # Ambil semua catatan absensi untuk karyawan yang sedang login
-    attendance_records = Attendance.query.filter_by(employee_id=current_user.id).all()
-    logging.info(f"User {current_user.id} accessed their attendance recap. Found {len(attendance_records)} records.")  # Logging saat mengakses recap
-
     # Memeriksa apakah permintaan menginginkan JSON
     if request.accept_mimetypes.best_match(['application/json', 'text/html']) == 'application/json':
-        records_data = [
-            {
-                'date': record.date.strftime('%Y-%m-%d'),
-                'status': record.status.value,  # Menggunakan .value untuk mendapatkan string dari enum
-                'reason': record.reason if record.reason else 'N/A',
-                'photo': record.photo if record.photo else 'Tidak ada foto yang diunggah.',
-                'time': record.time.strftime('%H:%M:%S'),
-                'time_out': record.time_out.strftime('%H:%M:%S') if record.time_out else 'Belum Clock Out',
-                'latitude': record.latitude,
-                'longitude': record.longitude
-            }
-            for record in attendance_records
-        ]
-        return jsonify(records_data), 200
+        # Polling tanpa perubahan cukup dijawab 304 setelah satu lookup ber-index
+        etag = attendance_etag(current_user.id)
+        if etag in request.if_none_match:
+            return not_modified(etag)
+
+        try:
+            attendance_records, next_cursor = get_attendance_recap(current_user.id, request.args)
+        except ValueError:
+            return jsonify({"status": "error", "message": "Parameter since/limit/offset/cursor tidak valid!"}), 400
+        logger.info(f"User {current_user.id} accessed their attendance recap. Found {len(attendance_records)} records.")  # Logging saat mengakses recap
+
+        records_data = serialize_recap(attendance_records)
+        if any(key in request.args for key in RECAP_PAGE_ARGS):
+            return with_etag(json_response({'records': records_data, 'next_cursor': next_cursor}), etag), 200
+        return with_etag(json_response(records_data), etag), 200
+
+    # Ambil semua catatan absensi untuk karyawan yang sedang login
+    attendance_records = Attendance.query.filter_by(employee_id=current_user.id).all()
+    logger.info(f"User {current_user.id} accessed their attendance recap. Found {len(attendance_records)} records.")  # Logging saat mengakses recap
 
     # Jika permintaan bukan JSON, render halaman rekap absensi
     return render_template('employee/recap.html', attendance_records=attendance_records, AttendanceStatus=AttendanceStatus)
@@ -165,47 +233,63 @@ def recap():
 @login_required
 def leave():
     if request.method == 'POST':
-        # Ambil data JSON dari request body
-        data = request.get_json()
-
-        reason = data.get('reason')
-        date = data.get('date')
-        photo = data.get('photo')  # Foto dalam format base64
+        # Mode streaming (multipart / base64 chunked) atau JSON biasa
+        upload = get_leave_upload()
+        if upload is not None:
+            reason, date, photo_stream = upload
+            photo = None
+        else:
+            data = request.get_json()
+            reason = data.get('reason')
+            date = data.get('date')
+            photo = data.get('photo')  # Foto dalam format base64
+            photo_stream = None
 
         # Validasi alasan dan tanggal
         if not reason or not date:
             flash('Alasan dan tanggal harus diisi!', 'danger')
-            logging.warning(f"User {current_user.id} failed leave request: Reason or date not provided.")  # Logging jika alasan atau tanggal tidak diisi
+            logger.warning(f"User {current_user.id} failed leave request: Reason or date not provided.")  # Logging jika alasan atau tanggal tidak diisi
             return jsonify({"status": "error", "message": "Alasan dan tanggal harus diisi!"}), 400
 
         # Simpan foto jika ada
         photo_filename = None
-        if photo:
+        if photo or photo_stream:
             try:
-                # Mengonversi foto dari base64 ke file
-                photo_data = base64.b64decode(photo.split(',')[1])  # Menghilangkan prefix data:image/jpeg;base64,
-                photo_filename = secure_filename(f'{current_user.id}_leave.jpg')
-                photo_path = os.path.join(current_app.root_path, 'static', 'uploads', photo_filename)
-                with open(photo_path, 'wb') as f:
-                    f.write(photo_data)
-                logging.info(f"User {current_user.id} uploaded a leave photo: {photo_filename}")  # Logging saat foto diunggah
+                if photo_stream:
+                    # Decode per chunk langsung ke disk tanpa menyalin seluruh foto ke memori
+                    photo_filename = photo_storage.save_stream(photo_stream, '.jpg')
+                else:
+                    # Mengonversi foto dari base64 ke file
+                    photo_data = base64.b64decode(photo.split(',')[1])  # Menghilangkan prefix data:image/jpeg;base64,
+                    photo_filename = photo_storage.save_bytes(photo_data, '.jpg')
+                logger.info(f"User {current_user.id} uploaded a leave photo: {photo_filename}")  # Logging saat foto diunggah
             except Exception as e:
-                logging.error(f"Error saving the photo for user {current_user.id}: {e}")
+                logger.error(f"Error saving the photo for user {current_user.id}: {e}")
                 return jsonify({"status": "error", "message": "Gagal menyimpan foto!"}), 500
 
+        employee_id = current_user.id
+        leave_date = datetime.strptime(date, '%Y-%m-%d')  # Mengonversi string ke objek datetime
+
         # Simpan pengajuan izin ke database
-        attendance = Attendance(
-            employee_id=current_user.id,
-            status=AttendanceStatus.IJIN,
-            date=datetime.strptime(date, '%Y-%m-%d'),  # Mengonversi string ke objek datetime
-            time=datetime.now(),
-            reason=reason,
-            photo=photo_filename  # Simpan nama file foto
-        )
-        db.session.add(attendance)
-        db.session.commit()
+        def write():
+            attendance = Attendance(
+                employee_id=employee_id,
+                status=AttendanceStatus.IJIN,
+                date=leave_date,
+                time=datetime.now(),
+                reason=reason,
+                photo=photo_filename  # Simpan nama file foto
+            )
+            db.session.add(attendance)
+            update_daily_summary(attendance)
+
+        try:
+            write_queue.run(write)
+        except IntegrityError:
+            logger.warning(f"User {employee_id} failed leave request: attendance for {date} already exists.")  # Logging jika sudah ada catatan
+            return jsonify({"status": "error", "message": "Sudah ada catatan absensi pada tanggal tersebut!"}), 409
         flash('Pengajuan izin berhasil!', 'success')
-        logging.info(f"User {current_user.id} successfully submitted a leave request for {date}.")  # Logging pengajuan izin berhasil
+        logger.info(f"User {current_user.id} successfully submitted a leave request for {date}.")  # Logging pengajuan izin berhasil
 
         # Memeriksa apakah permintaan menginginkan JSON
         if request.accept_mimetypes.best_match(['application/json', 'text/html']) == 'application/json':
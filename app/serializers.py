@@ -0,0 +1,114 @@
+import json
+from flask import current_app
+from app.models import Attendance, Employee
+
+try:
+    import orjson
+except ImportError:  # orjson opsional: tanpa orjson dipakai encoder json bawaan
+    orjson = None
+
+# Kolom yang diambil sebagai tuple (tanpa hidrasi objek ORM)
+RECAP_SELECT_COLUMNS = (
+    Attendance.id,
+    Attendance.date,
+    Attendance.status,
+    Attendance.reason,
+    Attendance.photo,
+    Attendance.time,
+    Attendance.time_out,
+    Attendance.latitude,
+    Attendance.longitude,
+)
+REPORT_SELECT_COLUMNS = (
+    Attendance.id,
+    Attendance.employee_id,
+    Employee.name,
+    Attendance.status,
+    Attendance.date,
+    Attendance.time,
+    Attendance.time_out,
+    Attendance.reason,
+    Attendance.photo,
+)
+EMPLOYEE_SELECT_COLUMNS = (
+    Employee.id,
+    Employee.name,
+    Employee.gender,
+    Employee.email,
+    Employee.phone_number,
+)
+
+
+def dumps(obj):
+    """Encode ke bytes JSON dengan backend tercepat yang terpasang."""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def json_response(obj):
+    """Pengganti jsonify untuk payload besar: satu kali encode, langsung bytes."""
+    return current_app.response_class(dumps(obj), mimetype='application/json')
+
+
+class DateCache(dict):
+    """Format tanggal sekali per nilai unik dalam satu batch.
+
+    Satu tanggal muncul di banyak baris (satu per karyawan), jadi hasil
+    format disimpan dan dipakai ulang alih-alih memanggil strftime per baris.
+    """
+
+    def __missing__(self, value):
+        text = value.isoformat()[:10]
+        self[value] = text
+        return text
+
+
+def format_time(value):
+    """HH:MM:SS dari datetime/time, lebih murah daripada strftime."""
+    return f'{value.hour:02d}:{value.minute:02d}:{value.second:02d}'
+
+
+def serialize_recap(rows, include_location=True):
+    """Baris RECAP_SELECT_COLUMNS -> list dict untuk rekap dan dashboard karyawan."""
+    dates = DateCache()
+    records = []
+    append = records.append
+    for _, date, status, reason, photo, time, time_out, latitude, longitude in rows:
+        record = {
+            'date': dates[date],
+            'status': status.value,
+            'reason': reason if reason else 'N/A',
+            'photo': photo if photo else 'Tidak ada foto yang diunggah.',
+            'time': format_time(time),
+            'time_out': format_time(time_out) if time_out else 'Belum Clock Out',
+        }
+        if include_location:
+            record['latitude'] = latitude
+            record['longitude'] = longitude
+        append(record)
+    return records
+
+
+def iter_report(rows):
+    """Baris REPORT_SELECT_COLUMNS -> dict laporan absensi admin, satu per satu (untuk streaming)."""
+    dates = DateCache()
+    for _, employee_id, name, status, date, time, time_out, reason, photo in rows:
+        yield {
+            'employee_id': employee_id,
+            'employee_name': name if name else 'N/A',
+            'status': status.value,
+            'date': dates[date],
+            'time': format_time(time),
+            'time_out': format_time(time_out) if time_out else 'Not Clocked Out',
+            'reason': reason if reason else 'N/A',
+            'photo': photo if photo else 'No photo uploaded',
+        }
+
+
+def serialize_employees(rows):
+    """Baris EMPLOYEE_SELECT_COLUMNS -> list dict daftar pegawai."""
+    return [
+        {'id': id, 'name': name, 'gender': gender, 'email': email, 'phone_number': phone_number}
+        for id, name, gender, email, phone_number in rows
+    ]
@@ -0,0 +1,165 @@
+import time
+import uuid
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+
+import jwt
+from flask_login import UserMixin
+
+logger = logging.getLogger(__name__)
+
+ACCESS = 'access'
+REFRESH = 'refresh'
+
+
+class TokenIdentity(UserMixin):
+    """current_user untuk request bertoken bearer, dibangun dari klaim token saja.
+
+    id, email, status (role) dan employee_id tersedia tanpa query. Profil
+    Employee lengkap baru diambil dari identity cache jika route memintanya.
+    """
+
+    def __init__(self, id, email, status, employee_id):
+        self.id = id
+        self.email = email
+        self.status = status
+        self.employee_id = employee_id
+
+    @property
+    def employee(self):
+        if self.employee_id is None:
+            return None
+        from app.identity_cache import identity_cache
+
+        identity = identity_cache.get(self.id)
+        return identity.employee if identity is not None else None
+
+    def __repr__(self):
+        return f"<TokenIdentity {self.id} {self.email}>"
+
+
+def password_fingerprint(hashed):
+    # Refresh token ikut memuat sidik hash password: reset password mencabut semua refresh token lama
+    return hashlib.sha256(hashed.encode('utf-8')).hexdigest()[:16]
+
+
+class TokenService:
+    """Access token dan refresh token JWT (HS256) untuk endpoint JSON.
+
+    Access token berumur pendek dan memuat user id, role (User.status) dan
+    employee id sehingga otorisasi tidak butuh query database. Token yang
+    sudah pernah didekode disimpan di cache LRU per proses sampai kedaluwarsa,
+    jadi request berikutnya dengan token yang sama tidak memverifikasi
+    signature lagi. Refresh token selalu dicek ke database agar perubahan
+    role, penghapusan user dan reset password ikut berlaku.
+    """
+
+    def __init__(self, app=None):
+        self.max_size = 4096
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.rejected = 0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.secret = app.config.get('JWT_SECRET_KEY') or app.config['SECRET_KEY']
+        self.access_seconds = app.config.get('JWT_ACCESS_TOKEN_SECONDS', 900)
+        self.refresh_seconds = app.config.get('JWT_REFRESH_TOKEN_SECONDS', 30 * 24 * 3600)
+        self.max_size = app.config.get('JWT_CACHE_SIZE', self.max_size)
+        app.extensions['token_service'] = self
+
+    def _encode(self, claims, token_type, expires_in):
+        now = int(time.time())
+        payload = dict(claims, type=token_type, iat=now, exp=now + expires_in, jti=uuid.uuid4().hex)
+        return jwt.encode(payload, self.secret, algorithm='HS256')
+
+    def issue(self, user_id, email, status, employee_id, password_hash):
+        """Buat pasangan access/refresh token untuk user yang baru terautentikasi."""
+        claims = {'sub': str(user_id), 'email': email, 'role': status, 'eid': employee_id}
+        return {
+            'access_token': self._encode(claims, ACCESS, self.access_seconds),
+            'refresh_token': self._encode({'sub': str(user_id), 'pwd': password_fingerprint(password_hash)},
+                                          REFRESH, self.refresh_seconds),
+            'token_type': 'Bearer',
+            'expires_in': self.access_seconds,
+        }
+
+    def _decode(self, token, token_type):
+        try:
+            payload = jwt.decode(token, self.secret, algorithms=['HS256'], options={'require': ['exp', 'sub', 'type']})
+        except jwt.InvalidTokenError as e:
+            logger.info(f"Rejected {token_type} token: {e}")
+            return None
+        return payload if payload.get('type') == token_type else None
+
+    def authenticate(self, token):
+        """TokenIdentity dari access token, atau None jika token tidak valid/kedaluwarsa."""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(token)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        payload = self._decode(token, ACCESS)
+        if payload is None:
+            with self._lock:
+                self.rejected += 1
+            return None
+
+        identity = TokenIdentity(int(payload['sub']), payload.get('email'), payload.get('role'), payload.get('eid'))
+        with self._lock:
+            self._entries[token] = (payload['exp'], identity)
+            self._entries.move_to_end(token)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        return identity
+
+    def refresh(self, token):
+        """Tukar refresh token dengan pasangan token baru; None jika ditolak."""
+        from app import db
+        from app.models import User, Employee
+
+        payload = self._decode(token, REFRESH)
+        if payload is None:
+            with self._lock:
+                self.rejected += 1
+            return None
+
+        row = db.session.execute(
+            db.select(User.id, User.email, User.status, User.password, Employee.id.label('employee_id'))
+            .outerjoin(Employee, Employee.user_id == User.id).where(User.id == int(payload['sub'])).limit(1)
+        ).first()
+        if row is None or password_fingerprint(row.password) != payload.get('pwd'):
+            with self._lock:
+                self.rejected += 1
+            return None
+        return self.issue(row.id, row.email, row.status, row.employee_id, row.password)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'hits': self.hits,
+                'misses': self.misses,
+                'rejected': self.rejected,
+            }
+
+
+token_service = TokenService()
+
+
+def bearer_token(request):
+    """Token dari header ``Authorization: Bearer <token>``, atau None."""
+    scheme, _, token = request.headers.get('Authorization', '').partition(' ')
+    if scheme.lower() != 'bearer':
+        return None
+    return token.strip() or None
@@ -1,77 +1,285 @@
 import logging
+import zlib
 from flask import current_app
 import datetime  # Pastikan ini diimpor
 from flask_mail import Message
 from flask_login import current_user
-from app.models import Attendance, User, Employee  # Pastikan untuk mengimpor model EmailConfig
+from app.models import Attendance, AttendanceDailySummary, User, Employee  # Pastikan untuk mengimpor model EmailConfig
 from app import mail
 import jwt
 from app import db
 
-# Konfigurasi Logging
-logging.basicConfig(level=logging.INFO,  # Atur level log yang diinginkan (INFO, ERROR, DEBUG, dsb)
-                    format='%(asctime)s - %(levelname)s - %(message)s',
-                    handlers=[
-                        logging.StreamHandler(),  # Output log ke konsol
-                        logging.FileHandler('app.log')  # Simpan log ke file app.log
-                    ])
+logger = logging.getLogger(__name__)
 
 
 def get_attendance_for_today(employee_id):
     today = datetime.datetime.now().date()  # Get today's date
     attendance = Attendance.query.filter_by(employee_id=employee_id, date=today).first()
-    logging.info(f"Attendance for employee {employee_id} on {today}: {attendance}")  # Log saat attendance diambil
+    logger.info(f"Attendance for employee {employee_id} on {today}: {attendance}")  # Log saat attendance diambil
     return attendance
 
+def _summary_date(value):
+    """Kolom Attendance.date bertipe DateTime, ringkasan disimpan per tanggal."""
+    return value.date() if isinstance(value, datetime.datetime) else value
+
+
+def update_daily_summary(attendance, new_record=True):
+    """Perbarui ringkasan harian untuk catatan attendance dalam session yang sama.
+
+    Dipanggil sebelum commit di handler clock in/clock out/izin agar ringkasan
+    dan catatan mentah tersimpan dalam satu transaksi. ``new_record=False``
+    untuk update baris yang sudah ada (clock out).
+    """
+    summary_date = _summary_date(attendance.date)
+    with db.session.no_autoflush:
+        summary = AttendanceDailySummary.query.filter_by(
+            employee_id=attendance.employee_id, date=summary_date
+        ).first()
+    if summary is None:
+        summary = AttendanceDailySummary(employee_id=attendance.employee_id, date=summary_date, record_count=0, status=None)
+        db.session.add(summary)
+    summary.apply(attendance, new_record)
+    return summary
+
+
+def rebuild_daily_summary(batch_size=1000):
+    """Bangun ulang seluruh tabel ringkasan harian dari tabel attendance.
+
+    Catatan dibaca berurutan per (employee_id, date), jadi satu ringkasan
+    selesai begitu kuncinya berganti. Ringkasan ditulis per ``batch_size``
+    lalu dikeluarkan dari session, sehingga memori tetap O(batch) berapa pun
+    panjang riwayatnya. Semua perubahan tetap dalam satu transaksi.
+    """
+    logger.info("Rebuilding attendance daily summary")
+    AttendanceDailySummary.query.delete()
+
+    # Ambil kolom saja (bukan objek ORM) agar identity map tidak membengkak
+    records = db.session.execute(
+        db.select(
+            Attendance.employee_id, Attendance.date, Attendance.status,
+            Attendance.time, Attendance.time_out, Attendance.reason
+        ).order_by(Attendance.employee_id, Attendance.date, Attendance.id).execution_options(yield_per=batch_size)
+    )
+
+    total = 0
+    pending = []
+    summary = None
+    for attendance in records:
+        key = (attendance.employee_id, _summary_date(attendance.date))
+        if summary is None or (summary.employee_id, summary.date) != key:
+            summary = AttendanceDailySummary(employee_id=key[0], date=key[1], record_count=0, status=None)
+            pending.append(summary)
+            if len(pending) > batch_size:
+                # Semua kecuali ringkasan terakhir sudah lengkap
+                total += _flush_summaries(pending[:-1])
+                del pending[:-1]
+        summary.apply(attendance)
+
+    total += _flush_summaries(pending)
+    db.session.commit()
+    logger.info(f"Rebuilt {total} daily summary rows")
+    return total
+
+
+def _flush_summaries(summaries):
+    db.session.add_all(summaries)
+    db.session.flush()
+    db.session.expunge_all()
+    return len(summaries)
+
+
+def get_daily_summary(date=None):
+    """Ringkasan kehadiran untuk satu tanggal: O(karyawan), bukan O(riwayat)."""
+    date = date or datetime.datetime.now().date()
+    return AttendanceDailySummary.query.filter_by(date=date).all()
+
+
+def get_leave_upload():
+    """Baca pengajuan izin yang dikirim tanpa membuffer seluruh body.
+
+    - multipart/form-data: field ``reason`` dan ``date``; file ``photo`` berisi
+      foto biner, atau file ``photo_base64`` berisi teks base64.
+    - text/plain atau application/octet-stream: body berisi base64 (boleh
+      chunked), ``reason`` dan ``date`` dikirim lewat query string.
+
+    Mengembalikan (reason, date, photo_stream) atau None untuk request JSON biasa.
+    """
+    from flask import request
+    from app.photo_storage import Base64DecodingStream
+
+    if request.mimetype == 'multipart/form-data':
+        photo = request.files.get('photo')
+        encoded = request.files.get('photo_base64')
+        if photo:
+            photo_stream = photo.stream
+        elif encoded:
+            photo_stream = Base64DecodingStream(encoded.stream)
+        else:
+            photo_stream = None
+        return request.form.get('reason'), request.form.get('date'), photo_stream
+
+    if request.mimetype in ('text/plain', 'application/octet-stream'):
+        return request.args.get('reason'), request.args.get('date'), Base64DecodingStream(request.stream)
+
+    return None
+
+
+# Paginasi rekap absensi karyawan (limit/offset atau cursor id)
+RECAP_PAGE_SIZE = 100
+RECAP_MAX_PAGE_SIZE = 1000
+RECAP_PAGE_ARGS = ('limit', 'offset', 'cursor')
+
+
+def attendance_etag(employee_id, *extra):
+    """ETag rekap absensi seorang karyawan dari dua lookup ber-index.
+
+    Baris baru terlihat dari id attendance terakhir (index (employee_id, id),
+    ORDER BY id DESC LIMIT 1); perubahan baris lama seperti clock out dan foto
+    yang selesai diproses terlihat dari Employee.attendance_version (lihat
+    bump_attendance_version). ``extra`` dipakai untuk data lain di response
+    yang sama, misalnya profil karyawan di dashboard.
+    """
+    latest_id = (
+        db.select(Attendance.id).where(Attendance.employee_id == employee_id)
+        .order_by(Attendance.id.desc()).limit(1).scalar_subquery()
+    )
+    row = db.session.execute(
+        db.select(Employee.attendance_version, latest_id).where(Employee.user_id == employee_id)
+    ).first()
+    version, last_id = row if row is not None else (0, None)
+    etag = f"{employee_id}-{last_id or 0}-{version or 0}"
+    if extra:
+        etag += '-' + format(zlib.crc32(repr(extra).encode()), 'x')
+    return etag
+
+
+def bump_attendance_version(employee_id):
+    """Naikkan versi absensi karyawan di transaksi yang sedang berjalan (tanpa commit).
+
+    ``employee_id`` boleh berupa nilai atau subquery skalar.
+    """
+    db.session.execute(
+        db.update(Employee).where(Employee.user_id == employee_id)
+        .values(attendance_version=Employee.attendance_version + 1)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def not_modified(etag):
+    """Response 304 untuk klien yang sudah memegang versi terbaru."""
+    response = current_app.response_class(status=304)
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
+
+def with_etag(response, etag):
+    """Pasang ETag agar polling berikutnya bisa dijawab dengan 304."""
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
+
+def get_attendance_recap(employee_id, args):
+    """Ambil rekap absensi seorang karyawan secara incremental.
+
+    Parameter query string:
+    - ``since``: tanggal (YYYY-MM-DD) atau id. Dengan id, baris dengan id itu
+      ikut dikirim ulang karena clock out dan foto dapat mengubah baris terakhir.
+    - ``limit``/``offset`` atau ``cursor`` (id terakhir halaman sebelumnya).
+
+    Mengembalikan (rows, next_cursor) dengan rows berupa tuple RECAP_SELECT_COLUMNS
+    (lihat app/serializers.py); next_cursor None jika tidak ada
+    halaman berikutnya atau permintaan tidak memakai paginasi. Melempar
+    ValueError untuk parameter yang tidak valid.
+    """
+    from app.serializers import RECAP_SELECT_COLUMNS
+
+    query = db.select(*RECAP_SELECT_COLUMNS).where(Attendance.employee_id == employee_id)
+
+    since = args.get('since')
+    if since:
+        if since.isdigit():
+            query = query.where(Attendance.id >= int(since))
+        else:
+            query = query.where(Attendance.date >= datetime.datetime.strptime(since, '%Y-%m-%d'))
+
+    cursor = args.get('cursor', type=int)
+    if cursor is not None:
+        query = query.where(Attendance.id > cursor)
+    query = query.order_by(Attendance.id)
+
+    if not any(key in args for key in RECAP_PAGE_ARGS):
+        return db.session.execute(query).all(), None
+
+    limit = min(args.get('limit', RECAP_PAGE_SIZE, type=int), RECAP_MAX_PAGE_SIZE)
+    offset = args.get('offset', 0, type=int)
+    if limit <= 0 or offset < 0:
+        raise ValueError('limit harus lebih besar dari 0 dan offset tidak boleh negatif')
+
+    records = db.session.execute(query.offset(offset).limit(limit + 1)).all()
+    has_more = len(records) > limit
+    records = records[:limit]
+    return records, records[-1].id if has_more else None
+
+
+class EmployeeRow:
+    """Baris ringan daftar karyawan: tanpa hash password, foto profil, maupun identity map ORM."""
+    __slots__ = ('id', 'name', 'gender', 'email', 'phone_number', 'user_id')
+
+    def __init__(self, id, name, gender, email, phone_number, user_id):
+        self.id = id
+        self.name = name
+        self.gender = gender
+        self.email = email
+        self.phone_number = phone_number
+        self.user_id = user_id
+
+
 def get_all_employees():
-    logging.info("Fetching all employees")  # Log saat mengambil data semua karyawan
-    from app.models import Employee  # Move import here
-    employees = Employee.query.all()
-    logging.info(f"Found {len(employees)} employees")  # Log jumlah karyawan yang ditemukan
+    logger.info("Fetching all employees")  # Log saat mengambil data semua karyawan
+    # Hanya kolom yang dibutuhkan yang di-SELECT, hasilnya bukan objek ORM
+    rows = db.session.execute(db.select(
+        Employee.id, Employee.name, Employee.gender, Employee.email, Employee.phone_number, Employee.user_id
+    ))
+    employees = [EmployeeRow(*row) for row in rows]
+    logger.info(f"Found {len(employees)} employees")  # Log jumlah karyawan yang ditemukan
     return employees
 
 def get_employee_by_id(employee_id):
-    logging.info(f"Fetching employee with ID: {employee_id}")  # Log saat mengambil data karyawan berdasarkan ID
+    logger.info(f"Fetching employee with ID: {employee_id}")  # Log saat mengambil data karyawan berdasarkan ID
     from app.models import Employee  # Move import here
     employee = Employee.query.get(employee_id)
-    logging.info(f"Employee details: {employee}")  # Log data karyawan
+    logger.info(f"Employee details: {employee}")  # Log data karyawan
     return employee
 
 def delete_employee_and_related_data(user_id):
-    logging.info(f"Deleting employee and related data for user ID: {user_id}")  # Log sebelum menghapus data
+    logger.info(f"Deleting employee and related data for user ID: {user_id}")  # Log sebelum menghapus data
     # Menghapus data attendance berdasarkan employee_id
     employee = Employee.query.filter_by(user_id=user_id).first()
     if employee:
         # Menghapus data attendance terkait
         deleted_attendance_count = Attendance.query.filter_by(employee_id=employee.id).delete()
-        logging.info(f"Deleted {deleted_attendance_count} attendance records for employee {employee.id}")  # Log jumlah attendance yang dihapus
+        logger.info(f"Deleted {deleted_attendance_count} attendance records for employee {employee.id}")  # Log jumlah attendance yang dihapus
         
         # Menghapus data employee
         db.session.delete(employee)
-        logging.info(f"Deleted employee with ID: {employee.id}")  # Log saat data employee dihapus
+        logger.info(f"Deleted employee with ID: {employee.id}")  # Log saat data employee dihapus
     
     # Menghapus data user
     user = User.query.get(user_id)
     if user:
         db.session.delete(user)
-        logging.info(f"Deleted user with ID: {user.id}")  # Log saat data user dihapus
+        logger.info(f"Deleted user with ID: {user.id}")  # Log saat data user dihapus
 
     # Commit perubahan ke database
     db.session.commit()
-    logging.info(f"Changes committed to the database for user ID: {user_id}")  # Log setelah commit perubahan
-
+    logger.info(f"Changes committed to the database for user ID: {user_id}")  # Log setelah commit perubahan
 
-def generate_access_token(user, expires_in=3600):
-    """Menghasilkan token akses untuk pengguna."""
-    payload = {
-        'user_id': user.id,
-        'exp': datetime.datetime.utcnow() + datetime.timedelta(seconds=expires_in)
-    }
-    return jwt.encode(payload, current_app.config['SECRET_KEY'], algorithm='HS256')
 
 def generate_reset_token(user_id, expires_in=600):
     """Menghasilkan token reset password untuk pengguna."""
-    logging.info(f"Generating reset token for user ID: {user_id}")  # Log saat token reset dibuat
+    logger.info(f"Generating reset token for user ID: {user_id}")  # Log saat token reset dibuat
     return jwt.encode({'reset_password': user_id, 'exp': datetime.datetime.utcnow() + datetime.timedelta(seconds=expires_in)},
                        current_app.config['SECRET_KEY'], algorithm='HS256')
 
@@ -79,8 +287,8 @@ def verify_reset_token(token):
     """Memverifikasi token reset password dan mengembalikan user_id jika valid."""
     try:
         user_id = jwt.decode(token, current_app.config['SECRET_KEY'], algorithms=['HS256'])['reset_password']
-        logging.info(f"Token verified for user ID: {user_id}")  # Log setelah token diverifikasi
+        logger.info(f"Token verified for user ID: {user_id}")  # Log setelah token diverifikasi
     except Exception as e:
-        logging.error(f"Token verification failed: {str(e)}")  # Log error jika token tidak valid
+        logger.error(f"Token verification failed: {str(e)}")  # Log error jika token tidak valid
         return None
     return user_id
@@ -0,0 +1,124 @@
+import queue
+import logging
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+
+logger = logging.getLogger(__name__)
+
+
+class WriteQueue:
+    """Antrian penulis tunggal untuk write ke database.
+
+    SQLite hanya mengizinkan satu penulis pada satu waktu. Daripada banyak
+    thread request saling menunggu lock (``database is locked``), semua write
+    dari handler clock in/clock out/izin dijalankan berurutan oleh satu thread
+    penulis per proses. Handler mengirim fungsi ``write()`` yang memakai
+    ``db.session`` tanpa commit; thread penulis yang melakukan commit atau
+    rollback lalu mengembalikan hasil fungsi (sebaiknya nilai sederhana seperti
+    id, bukan objek ORM).
+
+    Sebelum menunggu, session request pemanggil ditutup sehingga koneksinya
+    kembali ke pool; objek ORM yang sudah dimuat request menjadi detached.
+
+    Jika SERIALIZE_WRITES mati (mis. database server), fungsi dijalankan
+    langsung di thread pemanggil dengan commit yang sama.
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self.enabled = False
+        self._queue = None
+        self._thread = None
+        self._lock = threading.Lock()
+        self._metrics = {'submitted': 0, 'completed': 0, 'failed': 0, 'cancelled': 0, 'total_wait_seconds': 0.0}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        uri = app.config.get('SQLALCHEMY_DATABASE_URI', '')
+        enabled = app.config.get('SERIALIZE_WRITES')
+        self.enabled = uri.startswith('sqlite') if enabled is None else enabled
+        self.queue_size = app.config.get('WRITE_QUEUE_SIZE', 1000)
+        self.timeout = app.config.get('WRITE_QUEUE_TIMEOUT', 30)
+        app.extensions['write_queue'] = self
+
+    def _ensure_thread(self):
+        # Thread dibuat saat pertama dibutuhkan agar aman jika app di-fork (preload)
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._queue = queue.Queue(maxsize=self.queue_size)
+            self._thread = threading.Thread(target=self._run, name='db-writer', daemon=True)
+            self._thread.start()
+
+    def run(self, write):
+        """Jalankan write() dalam satu transaksi dan kembalikan hasilnya."""
+        from app import db
+
+        if not self.enabled or threading.current_thread() is self._thread:
+            try:
+                result = write()
+                db.session.commit()
+                return result
+            except Exception:
+                db.session.rollback()
+                raise
+
+        self._ensure_thread()
+        # Lepaskan koneksi session request sebelum menunggu: di worker gevent ratusan
+        # request yang antre bisa menahan semua koneksi pool sehingga penulis tidak kebagian
+        db.session.close()
+        future = Future()
+        with self._lock:
+            self._metrics['submitted'] += 1
+        self._queue.put((write, future, time.perf_counter()), timeout=self.timeout)
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            if future.cancel():
+                # Belum sempat dijalankan: dibatalkan, jadi error ke klien sesuai kenyataan
+                with self._lock:
+                    self._metrics['cancelled'] += 1
+                raise
+            # Sudah dijalankan thread penulis: tunggu hasil sebenarnya (mis. clock in yang ter-commit)
+            return future.result()
+
+    def _run(self):
+        from app import db
+
+        with self.app.app_context():
+            while True:
+                write, future, queued_at = self._queue.get()
+                if not future.set_running_or_notify_cancel():
+                    continue  # Pemanggil sudah timeout dan membatalkan write ini
+                waited = time.perf_counter() - queued_at
+                try:
+                    result = write()
+                    db.session.commit()
+                    future.set_result(result)
+                    outcome = 'completed'
+                except Exception as e:
+                    db.session.rollback()
+                    future.set_exception(e)
+                    outcome = 'failed'
+                finally:
+                    db.session.remove()  # Session bersih untuk setiap write
+                with self._lock:
+                    self._metrics[outcome] += 1
+                    self._metrics['total_wait_seconds'] += waited
+
+    def metrics(self):
+        with self._lock:
+            snapshot = dict(self._metrics)
+        snapshot['enabled'] = self.enabled
+        snapshot['queue_depth'] = self._queue.qsize() if self._queue else 0
+        finished = snapshot['completed'] + snapshot['failed']
+        snapshot['avg_wait_seconds'] = snapshot['total_wait_seconds'] / finished if finished else 0.0
+        return snapshot
+
+
+write_queue = WriteQueue()
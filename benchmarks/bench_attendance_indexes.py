@@ -0,0 +1,116 @@
+"""Benchmark latensi query absensi dengan dan tanpa composite index.
+
+Mengisi tabel attendance sintetis (skema sama dengan app.models.Attendance)
+lalu mengukur query hot path:
+  - get_attendance_for_today : employee_id + date
+  - clock_out                : employee_id + status, ORDER BY id DESC LIMIT 1
+  - recap                    : employee_id
+
+Contoh:
+    python benchmarks/bench_attendance_indexes.py --sizes 10000 100000 1000000 10000000
+"""
+import argparse
+import datetime
+import json
+import os
+import random
+import sqlite3
+import tempfile
+import time
+
+EMPLOYEES = 2000
+STATUSES = ['ALPHA', 'CLOCK_IN', 'CLOCK_OUT', 'IJIN']
+
+SCHEMA = """
+CREATE TABLE attendance (
+    id INTEGER PRIMARY KEY,
+    employee_id INTEGER NOT NULL,
+    status VARCHAR(9) NOT NULL,
+    date DATETIME NOT NULL,
+    time DATETIME NOT NULL,
+    time_out DATETIME,
+    photo TEXT,
+    latitude FLOAT,
+    longitude FLOAT,
+    reason TEXT
+)
+"""
+
+INDEXES = [
+    "CREATE INDEX ix_attendance_employee_id_date ON attendance (employee_id, date)",
+    "CREATE INDEX ix_attendance_employee_id_status_id ON attendance (employee_id, status, id)",
+]
+
+QUERIES = {
+    'today': ("SELECT * FROM attendance WHERE employee_id = ? AND date = ? LIMIT 1", 'date'),
+    'clock_out': ("SELECT * FROM attendance WHERE employee_id = ? AND status = 'CLOCK_IN' "
+                  "ORDER BY id DESC LIMIT 1", None),
+    'recap': ("SELECT * FROM attendance WHERE employee_id = ?", None),
+}
+
+
+def seed(conn, rows):
+    start = datetime.datetime(2020, 1, 1)
+    batch = []
+    for i in range(rows):
+        day = start + datetime.timedelta(days=i // EMPLOYEES)
+        stamp = day.strftime('%Y-%m-%d %H:%M:%S.000000')
+        batch.append((i % EMPLOYEES + 1, random.choice(STATUSES), stamp, stamp))
+        if len(batch) >= 50000:
+            conn.executemany("INSERT INTO attendance (employee_id, status, date, time) VALUES (?, ?, ?, ?)", batch)
+            batch.clear()
+    if batch:
+        conn.executemany("INSERT INTO attendance (employee_id, status, date, time) VALUES (?, ?, ?, ?)", batch)
+    conn.commit()
+    return start
+
+
+def measure(conn, sql, params_fn, iterations):
+    started = time.perf_counter()
+    for _ in range(iterations):
+        conn.execute(sql, params_fn()).fetchall()
+    return (time.perf_counter() - started) / iterations * 1e6  # mikrodetik per query
+
+
+def run(size, iterations):
+    fd, path = tempfile.mkstemp(suffix='.db')
+    os.close(fd)
+    try:
+        conn = sqlite3.connect(path)
+        conn.execute(SCHEMA)
+        start = seed(conn, size)
+        days = max(size // EMPLOYEES, 1)
+
+        def params(kind):
+            employee_id = random.randint(1, EMPLOYEES)
+            if kind == 'date':
+                day = start + datetime.timedelta(days=random.randrange(days))
+                return (employee_id, day.strftime('%Y-%m-%d %H:%M:%S.000000'))
+            return (employee_id,)
+
+        result = {'rows': size}
+        for label in ('no_index', 'indexed'):
+            if label == 'indexed':
+                for ddl in INDEXES:
+                    conn.execute(ddl)
+                conn.execute("ANALYZE")
+            for name, (sql, kind) in QUERIES.items():
+                result[f'{name}_{label}_us'] = round(measure(conn, sql, lambda: params(kind), iterations), 1)
+        conn.close()
+        return result
+    finally:
+        os.remove(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000, 1000000])
+    parser.add_argument('--iterations', type=int, default=200)
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        print(json.dumps(run(size, args.iterations)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+"""Benchmark pool koneksi database dengan pengaturan dari config.engine_options.
+
+Menjalankan --threads thread yang masing-masing meminjam koneksi, menjalankan
+query recap, lalu mengembalikannya. Waktu tunggu checkout dan waktu query
+diukur terpisah untuk setiap kombinasi DB_POOL_SIZE / DB_MAX_OVERFLOW.
+
+Tanpa DATABASE_URL dipakai file SQLite sementara sebagai pengganti lokal; set
+DATABASE_URL=postgresql://... untuk mengukur server database sungguhan.
+
+Contoh:
+    python benchmarks/bench_db_pool.py --pool-sizes 1 5 20 --max-overflow 0 --threads 32
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, text  # noqa: E402
+
+
+def run(url, pool_size, max_overflow, threads, queries):
+    os.environ['DB_POOL_SIZE'] = str(pool_size)
+    os.environ['DB_MAX_OVERFLOW'] = str(max_overflow)
+    from config import engine_options
+
+    engine = create_engine(url, **engine_options(url))
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE IF NOT EXISTS bench_attendance (id INTEGER PRIMARY KEY, employee_id INTEGER)"))
+        conn.execute(text("DELETE FROM bench_attendance"))
+        conn.execute(text("INSERT INTO bench_attendance (id, employee_id) VALUES (:id, :employee_id)"),
+                     [{'id': i, 'employee_id': i % 100} for i in range(1, 10001)])
+
+    waits, durations = [], []
+
+    def worker(i):
+        started = time.perf_counter()
+        with engine.connect() as conn:
+            checked_out = time.perf_counter()
+            conn.execute(text("SELECT * FROM bench_attendance WHERE employee_id = :e"), {'e': i % 100}).fetchall()
+            durations.append(time.perf_counter() - checked_out)
+        waits.append(checked_out - started)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(worker, range(queries)))
+    elapsed = time.perf_counter() - started
+
+    status = engine.pool.status()
+    with engine.begin() as conn:
+        conn.execute(text("DROP TABLE bench_attendance"))
+    engine.dispose()
+
+    waits.sort()
+    return {
+        'pool_size': pool_size,
+        'max_overflow': max_overflow,
+        'threads': threads,
+        'queries_per_s': round(queries / elapsed, 1),
+        'checkout_wait_p50_ms': round(statistics.median(waits) * 1000, 3),
+        'checkout_wait_p95_ms': round(waits[int(len(waits) * 0.95) - 1] * 1000, 3),
+        'query_p50_ms': round(statistics.median(durations) * 1000, 3),
+        'pool_status': status,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--pool-sizes', type=int, nargs='+', default=[1, 5, 20])
+    parser.add_argument('--max-overflow', type=int, default=0)
+    parser.add_argument('--threads', type=int, default=32)
+    parser.add_argument('--queries', type=int, default=5000)
+    args = parser.parse_args()
+
+    url = os.environ.get('DATABASE_URL')
+    tmp_path = None
+    if not url:
+        fd, tmp_path = tempfile.mkstemp(suffix='.db')
+        os.close(fd)
+        url = f'sqlite:///{tmp_path}'
+
+    try:
+        for pool_size in args.pool_sizes:
+            print(json.dumps(run(url, pool_size, args.max_overflow, args.threads, args.queries)), flush=True)
+    finally:
+        if tmp_path:
+            os.remove(tmp_path)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+"""Memori dan latensi daftar karyawan: hidrasi ORM penuh vs SELECT kolom.
+
+Mengisi database SQLite sementara dengan --employees karyawan (lengkap dengan
+hash password dan foto profil) lalu membandingkan:
+  orm_all          Employee.query.all() (cara lama list_employee/get_all_employees)
+  column_tuples    db.select(kolom) seperti list_employee sekarang
+  slots_rows       utils.get_all_employees() -> EmployeeRow dengan __slots__
+
+Latensi diambil yang terbaik dari --repeat; memori adalah puncak tracemalloc
+selama hasil masih dipegang.
+
+Contoh:
+    python benchmarks/bench_employee_list.py --employees 50000
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def measure(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - started)
+        del result
+
+    tracemalloc.start()
+    result = func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {'rows': len(result), 'best_ms': round(min(timings) * 1000, 1), 'peak_mb': round(peak / 1024 / 1024, 1)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--employees', type=int, default=50000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='presensi-employees-')
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(workdir, 'employees.db')}"
+    os.environ['LOG_FILE'] = os.path.join(workdir, 'app.log')
+    os.environ.setdefault('LOG_LEVEL', 'WARNING')
+
+    from app import create_app, db
+    from app.models import User, Employee
+    from app.serializers import EMPLOYEE_SELECT_COLUMNS
+    from app.utils import get_all_employees
+
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        hashed = '$2b$12$' + 'x' * 53  # Panjang hash bcrypt asli
+        photo = 'employee_photos/' + 'a' * 64 + '.jpg'
+        db.session.execute(db.insert(User), [
+            {'id': i, 'email': f'employee{i}@example.com', 'password': hashed, 'status': 0}
+            for i in range(1, args.employees + 1)
+        ])
+        db.session.execute(db.insert(Employee), [
+            {'id': i, 'name': f'Employee {i}', 'gender': 'L', 'email': f'employee{i}@example.com',
+             'phone_number': '0800000000', 'password': hashed, 'photo_profile': photo, 'user_id': i}
+            for i in range(1, args.employees + 1)
+        ])
+        db.session.commit()
+
+        def orm_all():
+            result = Employee.query.all()
+            db.session.expunge_all()  # Identity map dikosongkan agar setiap putaran menghidrasi ulang
+            return result
+
+        results = {
+            'orm_all': measure(orm_all, args.repeat),
+            'column_tuples': measure(lambda: db.session.execute(db.select(*EMPLOYEE_SELECT_COLUMNS)).all(), args.repeat),
+            'slots_rows': measure(get_all_employees, args.repeat),
+        }
+
+    print(json.dumps({'employees': args.employees, **results}))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,140 @@
+"""Throughput verifikasi password login: bcrypt di thread request vs process pool.
+
+Mensimulasikan lonjakan login saat pergantian shift: --clients thread
+memanggil password_hasher.verify() terus-menerus selama --seconds detik.
+Untuk setiap konfigurasi dicatat:
+  logins_per_sec           verifikasi berhasil per detik
+  logins_per_sec_per_core  dibagi jumlah core yang dipakai (min(worker, CPU))
+  p95_login_ms             latensi verifikasi yang dirasakan request
+  p95_tick_ms              latensi thread "request ringan" (loop Python kecil)
+                           yang berjalan bersamaan, menunjukkan seberapa lama
+                           GIL tertahan oleh hashing
+
+Konfigurasi: inline (PASSWORD_HASH_WORKERS=0) lalu process pool dengan
+jumlah worker dari --workers. --stored-rounds berbeda dari --rounds
+memperlihatkan biaya rehash sekali jalan saat cost factor diubah.
+
+Contoh:
+    python benchmarks/bench_login_throughput.py --rounds 12 --workers 1 2 4 --clients 64
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def percentile(values, fraction):
+    if not values:
+        return None
+    values = sorted(values)
+    return round(values[max(0, int(len(values) * fraction) - 1)] * 1000, 2)
+
+
+def ticker(stop, latencies):
+    # Request "ringan" yang hanya butuh GIL sebentar setiap 10 ms
+    while not stop.is_set():
+        started = time.perf_counter()
+        sum(range(1000))
+        latencies.append(time.perf_counter() - started)
+        time.sleep(0.01)
+
+
+def run(hasher, stored_hash, password, clients, seconds):
+    stop = threading.Event()
+    login_latencies, tick_latencies = [], []
+    errors = []
+    lock = threading.Lock()
+
+    def client():
+        while not stop.is_set():
+            started = time.perf_counter()
+            try:
+                matched = hasher.verify(stored_hash, password)
+            except Exception as e:
+                with lock:
+                    errors.append(type(e).__name__)
+                continue
+            with lock:
+                login_latencies.append(time.perf_counter() - started)
+            assert matched
+
+    hasher.verify(stored_hash, password)  # Hangatkan process pool
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    threads.append(threading.Thread(target=ticker, args=(stop, tick_latencies)))
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    cores = min(hasher.workers or clients, os.cpu_count() or 1)
+    logins_per_sec = len(login_latencies) / elapsed
+    return {
+        'workers': hasher.workers,
+        'cores_used': cores,
+        'logins': len(login_latencies),
+        'rejected': len(errors),
+        'logins_per_sec': round(logins_per_sec, 1),
+        'logins_per_sec_per_core': round(logins_per_sec / cores, 1),
+        'p50_login_ms': round(statistics.median(login_latencies) * 1000, 2) if login_latencies else None,
+        'p95_login_ms': percentile(login_latencies, 0.95),
+        'p95_tick_ms': percentile(tick_latencies, 0.95),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rounds', type=int, default=12)
+    parser.add_argument('--stored-rounds', type=int, default=None,
+                        help='Cost hash tersimpan (default sama dengan --rounds)')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, os.cpu_count() or 1])
+    parser.add_argument('--clients', type=int, default=64)
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--max-pending', type=int, default=64)
+    args = parser.parse_args()
+
+    from app.passwords import PasswordHasher, _hashpw
+
+    password = 'rahasia-shift-pagi'
+    stored_rounds = args.stored_rounds or args.rounds
+    stored_hash = _hashpw(password, stored_rounds)
+
+    results = []
+    for workers in [0] + sorted(set(args.workers)):
+        hasher = PasswordHasher()
+        hasher.configure(args.rounds, workers, max_pending=args.max_pending, queue_timeout=args.seconds)
+        result = run(hasher, stored_hash, password, args.clients, args.seconds)
+        result['mode'] = 'inline' if not workers else 'process_pool'
+        results.append(result)
+        print(json.dumps(result), file=sys.stderr)
+
+    rehash = PasswordHasher()
+    rehash.configure(args.rounds, 0)
+    started = time.perf_counter()
+    needs_rehash = rehash.needs_rehash(stored_hash)
+    if needs_rehash:
+        rehash.hash(password)
+    rehash_ms = round((time.perf_counter() - started) * 1000, 2)
+
+    print(json.dumps({
+        'rounds': args.rounds,
+        'stored_rounds': stored_rounds,
+        'clients': args.clients,
+        'cpu_count': os.cpu_count(),
+        'needs_rehash': needs_rehash,
+        'one_time_rehash_ms': rehash_ms if needs_rehash else 0,
+        'results': results,
+    }))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,155 @@
+"""Benchmark kontensi SQLite untuk N clock in bersamaan.
+
+Membandingkan tiga mode:
+  default         journal bawaan (DELETE), setiap thread menulis langsung
+  wal             PRAGMA dari Config.SQLITE_PRAGMAS, setiap thread menulis langsung
+  wal_serialized  PRAGMA yang sama + satu thread penulis (seperti app/write_queue.py)
+
+Setiap klien melakukan satu clock in (INSERT attendance + upsert ringkasan
+harian) lalu membaca recap miliknya, sementara klien lain melakukan hal sama.
+
+Contoh:
+    python benchmarks/bench_sqlite_contention.py --clients 16 64 256
+"""
+import argparse
+import json
+import os
+import queue
+import sqlite3
+import statistics
+import tempfile
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'mmap_size': 268435456,
+    'cache_size': -65536,
+    'busy_timeout': 10000,
+    'temp_store': 'MEMORY',
+}
+
+SCHEMA = [
+    """CREATE TABLE attendance (
+        id INTEGER PRIMARY KEY, employee_id INTEGER NOT NULL, status VARCHAR(9) NOT NULL,
+        date DATETIME NOT NULL, time DATETIME NOT NULL, time_out DATETIME, photo TEXT,
+        latitude FLOAT, longitude FLOAT, reason TEXT)""",
+    "CREATE INDEX ix_attendance_employee_id_date ON attendance (employee_id, date)",
+    """CREATE TABLE attendance_daily_summary (
+        id INTEGER PRIMARY KEY, employee_id INTEGER NOT NULL, date DATE NOT NULL,
+        status VARCHAR(9) NOT NULL, clock_in_time DATETIME, clock_out_time DATETIME,
+        reason TEXT, record_count INTEGER NOT NULL, UNIQUE (employee_id, date))""",
+]
+
+
+def connect(path, mode):
+    conn = sqlite3.connect(path, timeout=60, check_same_thread=False)
+    if mode != 'default':
+        for name, value in PRAGMAS.items():
+            conn.execute(f'PRAGMA {name}={value}')
+    return conn
+
+
+def clock_in(conn, employee_id):
+    now = time.strftime('%Y-%m-%d %H:%M:%S')
+    today = now[:10]
+    with conn:
+        conn.execute("INSERT INTO attendance (employee_id, status, date, time, latitude, longitude) "
+                     "VALUES (?, 'CLOCK_IN', ?, ?, -6.2, 106.8)", (employee_id, today, now))
+        conn.execute("INSERT INTO attendance_daily_summary (employee_id, date, status, clock_in_time, record_count) "
+                     "VALUES (?, ?, 'CLOCK_IN', ?, 1) ON CONFLICT (employee_id, date) "
+                     "DO UPDATE SET record_count = record_count + 1", (employee_id, today, now))
+
+
+class SingleWriter:
+    def __init__(self, conn):
+        self.conn = conn
+        self.jobs = queue.Queue()
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def _run(self):
+        while True:
+            employee_id, future = self.jobs.get()
+            try:
+                clock_in(self.conn, employee_id)
+                future.set_result(None)
+            except Exception as e:
+                future.set_exception(e)
+
+    def submit(self, employee_id):
+        future = Future()
+        self.jobs.put((employee_id, future))
+        return future.result()
+
+
+def run(mode, clients, rounds):
+    fd, path = tempfile.mkstemp(suffix='.db')
+    os.close(fd)
+    try:
+        setup = connect(path, mode)
+        for ddl in SCHEMA:
+            setup.execute(ddl)
+        setup.commit()
+
+        writer = SingleWriter(connect(path, mode)) if mode == 'wal_serialized' else None
+        local = threading.local()
+        write_latencies, read_latencies, errors = [], [], []
+
+        def client(employee_id):
+            if not hasattr(local, 'conn'):
+                local.conn = connect(path, mode)
+            started = time.perf_counter()
+            try:
+                if writer:
+                    writer.submit(employee_id)
+                else:
+                    clock_in(local.conn, employee_id)
+                write_latencies.append(time.perf_counter() - started)
+            except sqlite3.OperationalError as e:
+                errors.append(str(e))
+            started = time.perf_counter()
+            local.conn.execute("SELECT * FROM attendance WHERE employee_id = ?", (employee_id,)).fetchall()
+            read_latencies.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=clients) as pool:
+            list(pool.map(client, [i % clients + 1 for i in range(clients * rounds)]))
+        elapsed = time.perf_counter() - started
+
+        def p(values, q):
+            values = sorted(values)
+            return round(values[max(int(len(values) * q) - 1, 0)] * 1000, 2) if values else None
+
+        return {
+            'mode': mode,
+            'clients': clients,
+            'clock_ins': clients * rounds,
+            'errors': len(errors),
+            'throughput_per_s': round(len(write_latencies) / elapsed, 1),
+            'write_p50_ms': round(statistics.median(write_latencies) * 1000, 2) if write_latencies else None,
+            'write_p95_ms': p(write_latencies, 0.95),
+            'read_p95_ms': p(read_latencies, 0.95),
+            'read_max_ms': p(read_latencies, 1.0),
+        }
+    finally:
+        for suffix in ('', '-wal', '-shm', '-journal'):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--clients', type=int, nargs='+', default=[16, 64])
+    parser.add_argument('--rounds', type=int, default=10)
+    parser.add_argument('--modes', nargs='+', default=['default', 'wal', 'wal_serialized'])
+    args = parser.parse_args()
+
+    for clients in args.clients:
+        for mode in args.modes:
+            print(json.dumps(run(mode, clients, args.rounds)), flush=True)
+
+
+if __name__ == '__main__':
+    main()
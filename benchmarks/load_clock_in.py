@@ -0,0 +1,188 @@
+"""Load test clock in terhadap server produksi (gunicorn) dengan jumlah worker berbeda.
+
+Untuk setiap kombinasi --worker-classes (gthread/gevent) dan --workers, skrip ini:
+  1. membuat database SQLite sementara dan mengisi --employees karyawan,
+  2. menjalankan `gunicorn -c gunicorn.conf.py wsgi:app` dengan WEB_WORKER_CLASS dan
+     WEB_CONCURRENCY tsb,
+  3. login semua karyawan lalu mengirim --requests clock in (multipart + foto)
+     secara paralel dengan --concurrency thread klien; setiap karyawan hanya
+     boleh clock in sekali sehari, jadi request berulang dihitung sebagai
+     'duplicates' (409),
+  4. mencetak satu baris JSON berisi throughput dan latensi.
+
+--upload-delay-ms mengirim foto per potongan 16 KB dengan jeda, meniru klien
+mobile di jaringan lambat; di sinilah worker gevent unggul karena request yang
+sedang upload tidak menahan satu thread worker.
+
+Contoh:
+    python benchmarks/load_clock_in.py --workers 1 2 4 --threads 4 --requests 1000
+    python benchmarks/load_clock_in.py --worker-classes gthread gevent --workers 1 \
+        --employees 2000 --requests 2000 --concurrency 2000 --upload-delay-ms 20
+"""
+import argparse
+import http.cookiejar
+import json
+import os
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PASSWORD = 'benchmark-password'
+PHOTO = b'\xff\xd8\xff\xe0' + os.urandom(200 * 1024) + b'\xff\xd9'  # ~200 KB "foto"
+UPLOAD_CHUNK = 16 * 1024
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def seed(env, employees):
+    """Isi database sementara lewat create_app agar skemanya sama dengan aplikasi."""
+    script = f"""
+import bcrypt
+from app import create_app, db
+from app.models import User, Employee
+app = create_app()
+with app.app_context():
+    db.create_all()
+    hashed = bcrypt.hashpw({PASSWORD!r}.encode(), bcrypt.gensalt(4)).decode()
+    for i in range({employees}):
+        user = User(email=f'bench{{i}}@example.com', password=hashed, status=0)
+        db.session.add(user)
+        db.session.flush()
+        db.session.add(Employee(name=f'Bench {{i}}', gender='L', email=user.email,
+                                phone_number='0800000000', password=hashed, user_id=user.id))
+    db.session.commit()
+"""
+    subprocess.run([sys.executable, '-c', script], cwd=ROOT, env=env, check=True)
+
+
+def wait_for_port(port, timeout=30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=1):
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f'Server did not start on port {port}')
+
+
+def login(base_url, index):
+    opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()))
+    body = json.dumps({'email': f'bench{index}@example.com', 'password': PASSWORD}).encode()
+    request = urllib.request.Request(f'{base_url}/auth/login', data=body, headers={'Content-Type': 'application/json'})
+    opener.open(request).read()
+    return opener
+
+
+def slow_body(body, delay):
+    for start in range(0, len(body), UPLOAD_CHUNK):
+        yield body[start:start + UPLOAD_CHUNK]
+        time.sleep(delay)
+
+
+def clock_in(base_url, opener, upload_delay=0.0):
+    boundary = uuid.uuid4().hex
+    parts = []
+    for name, value in (('lat', '-6.2'), ('long', '106.8')):
+        parts.append(f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode())
+    parts.append(f'--{boundary}\r\nContent-Disposition: form-data; name="photo"; filename="image.jpg"\r\n'
+                 f'Content-Type: image/jpeg\r\n\r\n'.encode() + PHOTO + b'\r\n')
+    parts.append(f'--{boundary}--\r\n'.encode())
+    body = b''.join(parts)
+    request = urllib.request.Request(
+        f'{base_url}/user/clock_in', data=slow_body(body, upload_delay) if upload_delay else body,
+        headers={'Content-Type': f'multipart/form-data; boundary={boundary}', 'Accept': 'application/json',
+                 'Content-Length': str(len(body))}
+    )
+    started = time.perf_counter()
+    try:
+        status = opener.open(request).status
+    except urllib.error.HTTPError as e:
+        status = e.code
+    return status, time.perf_counter() - started
+
+
+def run(worker_class, workers, args):
+    workdir = tempfile.mkdtemp(prefix='presensi-load-')
+    port = free_port()
+    env = dict(os.environ,
+               DATABASE_URL=f"sqlite:///{os.path.join(workdir, 'load.db')}?timeout=60",
+               PHOTO_STORAGE_ROOT=os.path.join(workdir, 'uploads'),
+               PHOTO_SPOOL_FOLDER=os.path.join(workdir, 'spool'),
+               LOG_FILE=os.path.join(workdir, 'app.log'),
+               LOG_LEVEL='WARNING',
+               BCRYPT_LOG_ROUNDS='4',
+               RATE_LIMIT_ENABLED='0',  # Semua klien login dari satu IP
+               PORT=str(port),
+               WEB_WORKER_CLASS=worker_class,
+               WEB_WORKER_CONNECTIONS=str(max(args.concurrency, 1000)),
+               WEB_CONCURRENCY=str(workers),
+               WEB_THREADS=str(args.threads),
+               WEB_PRELOAD='1')
+    server = None
+    try:
+        seed(env, args.employees)
+        server = subprocess.Popen([sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'wsgi:app'],
+                                  cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        wait_for_port(port)
+        base_url = f'http://127.0.0.1:{port}'
+
+        with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            openers = list(pool.map(lambda index: login(base_url, index), range(args.employees)))
+            started = time.perf_counter()
+            results = list(pool.map(lambda i: clock_in(base_url, openers[i % len(openers)], args.upload_delay_ms / 1000),
+                                    range(args.requests)))
+            elapsed = time.perf_counter() - started
+
+        latencies = sorted(latency for _, latency in results)
+        return {
+            'worker_class': worker_class,
+            'workers': workers,
+            'threads': args.threads,
+            'requests': args.requests,
+            'concurrency': args.concurrency,
+            'ok': sum(1 for status, _ in results if status < 400),
+            'duplicates': sum(1 for status, _ in results if status == 409),
+            'errors': sum(1 for status, _ in results if status >= 400 and status != 409),
+            'throughput_rps': round(args.requests / elapsed, 1),
+            'p50_ms': round(statistics.median(latencies) * 1000, 1),
+            'p95_ms': round(latencies[int(len(latencies) * 0.95) - 1] * 1000, 1),
+        }
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--worker-classes', nargs='+', default=['gthread'])
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--employees', type=int, default=500)
+    parser.add_argument('--requests', type=int, default=500)
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--upload-delay-ms', type=float, default=0.0)
+    args = parser.parse_args()
+
+    for worker_class in args.worker_classes:
+        for workers in args.workers:
+            print(json.dumps(run(worker_class, workers, args)), flush=True)
+
+
+if __name__ == '__main__':
+    main()
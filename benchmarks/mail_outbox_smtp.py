@@ -0,0 +1,125 @@
+"""Uji outbox email terhadap server SMTP lokal (aiosmtpd) sebagai pengganti smtp.gmail.com.
+
+Skrip membuat database SQLite sementara, menjalankan server SMTP aiosmtpd di
+127.0.0.1, lalu mengantrikan --emails email lewat mail_outbox.send():
+  - latensi enqueue (yang dirasakan request) diukur terpisah dari waktu kirim,
+  - --fail-first N membuat server menjawab 451 untuk N email pertama sehingga
+    jalur retry dengan backoff ikut teruji,
+  - jumlah sesi SMTP menunjukkan koneksi yang dipakai ulang oleh pool.
+
+Butuh `pip install aiosmtpd`.
+
+Contoh:
+    python benchmarks/mail_outbox_smtp.py --emails 200 --fail-first 5
+"""
+import argparse
+import json
+import os
+import socket
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+class CountingHandler:
+    """Handler aiosmtpd yang mencatat email dan sesi, opsional menolak N email pertama."""
+
+    def __init__(self, fail_first):
+        self.fail_first = fail_first
+        self.delivered = []
+        self.sessions = set()
+        self.rejected = 0
+        self.lock = threading.Lock()
+
+    async def handle_DATA(self, server, session, envelope):
+        with self.lock:
+            self.sessions.add(id(session))
+            if self.rejected < self.fail_first:
+                self.rejected += 1
+                return '451 Try again later'
+            self.delivered.append(envelope.rcpt_tos)
+        return '250 Message accepted for delivery'
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--emails', type=int, default=200)
+    parser.add_argument('--fail-first', type=int, default=0)
+    parser.add_argument('--timeout', type=float, default=60)
+    args = parser.parse_args()
+
+    from aiosmtpd.controller import Controller
+
+    port = free_port()
+    handler = CountingHandler(args.fail_first)
+    controller = Controller(handler, hostname='127.0.0.1', port=port)
+    controller.start()
+
+    workdir = tempfile.mkdtemp(prefix='presensi-mail-')
+    os.environ.update({
+        'DATABASE_URL': f"sqlite:///{os.path.join(workdir, 'mail.db')}",
+        'LOG_FILE': os.path.join(workdir, 'app.log'),
+        'MAIL_SERVER': '127.0.0.1',
+        'MAIL_PORT': str(port),
+        'MAIL_USE_TLS': '0',
+        'MAIL_DEFAULT_SENDER': 'presensi@example.com',
+        'MAIL_OUTBOX_RETRY_SECONDS': '1',
+        'MAIL_OUTBOX_POLL_SECONDS': '1',
+    })
+
+    from app import create_app, db
+    from app.mail_outbox import mail_outbox
+    from app.models import EmailOutbox
+
+    app = create_app()
+    try:
+        with app.app_context():
+            db.create_all()
+
+            latencies = []
+            started = time.perf_counter()
+            for i in range(args.emails):
+                sent_at = time.perf_counter()
+                mail_outbox.send(f'employee{i}@example.com', 'Reset Password', f'Email uji ke-{i}')
+                latencies.append(time.perf_counter() - sent_at)
+
+            deadline = time.time() + args.timeout
+            while len(handler.delivered) < args.emails and time.time() < deadline:
+                time.sleep(0.05)
+            elapsed = time.perf_counter() - started
+
+            statuses = dict(db.session.execute(
+                db.select(EmailOutbox.status, db.func.count()).group_by(EmailOutbox.status)
+            ).all())
+
+        latencies.sort()
+        result = {
+            'emails': args.emails,
+            'delivered': len(handler.delivered),
+            'rejected_451': handler.rejected,
+            'smtp_sessions': len(handler.sessions),
+            'enqueue_p50_ms': round(statistics.median(latencies) * 1000, 2),
+            'enqueue_p95_ms': round(latencies[int(len(latencies) * 0.95) - 1] * 1000, 2),
+            'drain_seconds': round(elapsed, 2),
+            'outbox_status': statuses,
+            'metrics': mail_outbox.metrics(),
+        }
+        print(json.dumps(result))
+        assert result['delivered'] == args.emails, 'Tidak semua email terkirim sebelum batas waktu'
+    finally:
+        controller.stop()
+
+
+if __name__ == '__main__':
+    main()
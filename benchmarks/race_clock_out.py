@@ -0,0 +1,91 @@
+"""Uji konkurensi clock out: N tap bersamaan harus menghasilkan tepat satu transisi.
+
+Skrip membuat database SQLite sementara, satu karyawan dengan clock in hari
+ini, lalu mengirim --taps request POST /user/clock_out secara paralel:
+  - tanpa Idempotency-Key: tepat satu 200, sisanya 400
+  - dengan Idempotency-Key yang sama: semua 200, tetap hanya satu baris CLOCK_OUT
+
+Contoh:
+    python benchmarks/race_clock_out.py --taps 50
+"""
+import argparse
+import datetime
+import json
+import os
+import sys
+import tempfile
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--taps', type=int, default=50)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='presensi-race-')
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(workdir, 'race.db')}"
+    os.environ['LOG_FILE'] = os.path.join(workdir, 'app.log')
+
+    from app import create_app, db
+    from app.models import User, Employee, Attendance, AttendanceStatus
+
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        user = User(email='race@example.com', password='x', status=0)
+        db.session.add(user)
+        db.session.flush()
+        db.session.add(Employee(name='Race', gender='L', email=user.email, phone_number='0', password='x',
+                                user_id=user.id))
+        user_id = user.id
+        db.session.commit()
+
+    def open_clock_in():
+        with app.app_context():
+            Attendance.query.filter_by(employee_id=user_id).delete()
+            now = datetime.datetime.now()
+            db.session.add(Attendance(employee_id=user_id, status=AttendanceStatus.CLOCK_IN,
+                                      date=now.date(), time=now))
+            db.session.commit()
+
+    def tap(headers):
+        client = app.test_client()
+        with client.session_transaction() as session:
+            session['_user_id'] = str(user_id)
+            session['_fresh'] = True
+        return client.post('/user/clock_out', headers=dict(headers, Accept='application/json')).status_code
+
+    def count_clock_outs():
+        with app.app_context():
+            return Attendance.query.filter_by(employee_id=user_id, status=AttendanceStatus.CLOCK_OUT).count()
+
+    results = {}
+    barrier = threading.Barrier(args.taps)
+
+    def synchronized_tap(headers):
+        barrier.wait()
+        return tap(headers)
+
+    for label, headers in (('without_key', {}), ('same_key', {'Idempotency-Key': uuid.uuid4().hex})):
+        open_clock_in()
+        before = count_clock_outs()
+        with ThreadPoolExecutor(max_workers=args.taps) as pool:
+            statuses = list(pool.map(synchronized_tap, [headers] * args.taps))
+        results[label] = {
+            'ok': statuses.count(200),
+            'rejected': statuses.count(400),
+            'transitions': count_clock_outs() - before,
+        }
+
+    print(json.dumps(results))
+    assert results['without_key']['transitions'] == 1 and results['without_key']['ok'] == 1
+    assert results['same_key']['transitions'] == 1 and results['same_key']['ok'] == args.taps
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,361 @@
+"""Benchmark end-to-end siklus absensi: seed data sintetis lalu ukur setiap endpoint utama.
+
+Skenario (berurutan, memakai karyawan berbeda agar tidak bentrok unique constraint):
+  login            POST /auth/login
+  clock_in         POST /user/clock_in (multipart + foto)
+  clock_out        POST /user/clock_out
+  leave            POST /user/leave (JSON, tanggal besok)
+  recap            GET  /user/recap (JSON, seluruh riwayat)
+  list_employees   GET  /list_employees (admin)
+  attendance_report GET /attendance_report?limit=500 (admin, satu halaman)
+  attendance_report_day GET /attendance_report?start_date=..&end_date=..&format=ndjson (admin, streaming satu hari)
+
+Mode:
+  client   Flask test client di proses yang sama (tanpa jaringan)
+  server   server WSGI werkzeug threaded sungguhan di 127.0.0.1, klien urllib
+
+Data di-seed ke database SQLite sementara (atau DATABASE_URL yang kosong):
+--employees karyawan, --attendance-rows baris riwayat (satu per karyawan per
+hari, mundur dari kemarin), satu LocationSetting dan satu admin.
+
+Hasil berupa satu dokumen JSON (stdout atau --output). Dengan --compare
+hasil sebelumnya, p50 setiap skenario dibandingkan dan skenario yang lebih
+lambat dari --tolerance ditandai sebagai regresi (exit code 1). Setiap
+response selain 2xx/304 membuat skenarionya gagal (exit code 1) dan tidak
+ikut dihitung di persentil latensi.
+
+Contoh:
+    python benchmarks/suite.py --employees 1000 --attendance-rows 100000 --output base.json
+    python benchmarks/suite.py --employees 1000 --attendance-rows 100000 --compare base.json
+    python benchmarks/suite.py --mode server --employees 100000 --attendance-rows 50000000 --ops 2000
+"""
+import argparse
+import datetime
+import http.cookiejar
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+PASSWORD = 'benchmark-password'
+ADMIN_EMAIL = 'admin@example.com'
+PHOTO = b'\xff\xd8\xff\xe0' + os.urandom(200 * 1024) + b'\xff\xd9'  # ~200 KB "foto"
+LATITUDE, LONGITUDE = -6.2, 106.8
+SEED_BATCH = 50000
+
+
+def seed(db, employees, attendance_rows):
+    """Isi database dengan data sintetis lewat INSERT batch (Core, tanpa objek ORM)."""
+    import bcrypt
+    from app.models import User, Employee, Attendance, AttendanceStatus, LocationSetting
+
+    # Hash bcrypt berbiaya rendah: yang diukur endpoint, bukan bcrypt saat seed
+    hashed = bcrypt.hashpw(PASSWORD.encode(), bcrypt.gensalt(4)).decode()
+    db.create_all()
+    with db.engine.begin() as conn:
+        conn.execute(User.__table__.insert(), [{'id': 1, 'email': ADMIN_EMAIL, 'password': hashed, 'status': 1}])
+        for start in range(0, employees, SEED_BATCH):
+            ids = range(start + 2, min(start + SEED_BATCH, employees) + 2)
+            conn.execute(User.__table__.insert(), [
+                {'id': i, 'email': f'employee{i}@example.com', 'password': hashed, 'status': 0} for i in ids
+            ])
+            conn.execute(Employee.__table__.insert(), [
+                {'name': f'Employee {i}', 'gender': 'L', 'email': f'employee{i}@example.com',
+                 'phone_number': '0800000000', 'password': hashed, 'user_id': i} for i in ids
+            ])
+
+        now = datetime.datetime.now()
+        conn.execute(LocationSetting.__table__.insert(), [{
+            'latitude': LATITUDE, 'longitude': LONGITUDE, 'radius': 500.0, 'date': now.date(),
+            'clock_in': datetime.time(8, 0), 'clock_out': datetime.time(17, 0),
+        }])
+
+        # Satu baris per karyawan per hari: baris ke-n milik karyawan n % employees, n // employees hari lalu
+        yesterday = datetime.datetime.combine(now.date(), datetime.time()) - datetime.timedelta(days=1)
+        for start in range(0, attendance_rows, SEED_BATCH):
+            batch = []
+            for n in range(start, min(start + SEED_BATCH, attendance_rows)):
+                day = yesterday - datetime.timedelta(days=n // employees)
+                clock_in = day + datetime.timedelta(hours=8, seconds=n % 3600)
+                leave = n % 20 == 0
+                batch.append({
+                    'employee_id': n % employees + 2,
+                    'status': AttendanceStatus.IJIN if leave else AttendanceStatus.CLOCK_OUT,
+                    'date': day,
+                    'time': clock_in,
+                    'time_out': None if leave else clock_in + datetime.timedelta(hours=9),
+                    'photo': f'absensi/{n:064x}.jpg',
+                    'latitude': LATITUDE,
+                    'longitude': LONGITUDE,
+                    'reason': 'Sakit' if leave else None,
+                })
+            conn.execute(Attendance.__table__.insert(), batch)
+
+
+def multipart(fields, file_field, filename, content):
+    boundary = uuid.uuid4().hex
+    parts = [f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode()
+             for name, value in fields.items()]
+    parts.append(f'--{boundary}\r\nContent-Disposition: form-data; name="{file_field}"; filename="{filename}"\r\n'
+                 f'Content-Type: image/jpeg\r\n\r\n'.encode() + content + b'\r\n')
+    parts.append(f'--{boundary}--\r\n'.encode())
+    return f'multipart/form-data; boundary={boundary}', b''.join(parts)
+
+
+class ClientSession:
+    """Satu pengguna yang login lewat Flask test client."""
+
+    def __init__(self, app):
+        self.client = app.test_client()
+
+    def request(self, method, path, body=None, content_type=None, headers=None):
+        response = self.client.open(path, method=method, data=body, content_type=content_type,
+                                    headers=dict(headers or {}, Accept='application/json'))
+        size = len(response.get_data())
+        return response.status_code, size
+
+
+class ServerSession:
+    """Satu pengguna yang login lewat HTTP ke server threaded sungguhan."""
+
+    def __init__(self, base_url):
+        self.base_url = base_url
+        self.opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()))
+
+    def request(self, method, path, body=None, content_type=None, headers=None):
+        headers = dict(headers or {}, Accept='application/json')
+        if content_type:
+            headers['Content-Type'] = content_type
+        request = urllib.request.Request(self.base_url + path, data=body, method=method, headers=headers)
+        try:
+            with self.opener.open(request) as response:
+                return response.status, len(response.read())
+        except urllib.error.HTTPError as e:
+            return e.code, len(e.read())
+
+
+def login(session, email):
+    return session.request('POST', '/auth/login', json.dumps({'email': email, 'password': PASSWORD}).encode(),
+                           'application/json')
+
+
+def is_success(status):
+    return 200 <= status < 300 or status == 304
+
+
+def run_scenario(name, operation, items, concurrency):
+    """Jalankan operation(item) untuk setiap item secara paralel dan ringkas latensinya."""
+    def timed(item):
+        started = time.perf_counter()
+        status, size = operation(item)
+        return status, size, time.perf_counter() - started
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(timed, items))
+    elapsed = time.perf_counter() - started
+
+    # Hanya response sukses yang dihitung: redirect ke login atau 429 yang cepat bukan hasil benchmark
+    succeeded = [result for result in results if is_success(result[0])]
+    latencies = sorted(latency for _, _, latency in succeeded)
+    statuses = {}
+    for status, _, _ in results:
+        statuses[str(status)] = statuses.get(str(status), 0) + 1
+
+    def percentile(q):
+        if not latencies:
+            return None
+        return round(latencies[max(int(len(latencies) * q) - 1, 0)] * 1000, 2)
+
+    summary = {
+        'ops': len(results),
+        'failed': len(results) - len(succeeded),
+        'throughput_per_s': round(len(succeeded) / elapsed, 1),
+        'p50_ms': round(statistics.median(latencies) * 1000, 2) if latencies else None,
+        'p95_ms': percentile(0.95),
+        'p99_ms': percentile(0.99),
+        'max_ms': percentile(1.0),
+        'avg_response_bytes': round(sum(size for _, size, _ in succeeded) / len(succeeded)) if succeeded else None,
+        'statuses': statuses,
+    }
+    print(f'{name}: {json.dumps(summary)}', file=sys.stderr, flush=True)
+    return summary
+
+
+def run_suite(app, new_session, args):
+    from app.photo_ingest import photo_ingestor
+
+    employee_ids = list(range(2, args.employees + 2))
+    ops = min(args.ops, args.employees)
+    sessions = {}
+    results = {}
+
+    def do_login(employee_id):
+        session = new_session()
+        outcome = login(session, f'employee{employee_id}@example.com')
+        sessions[employee_id] = session
+        return outcome
+
+    results['login'] = run_scenario('login', do_login, employee_ids[:ops], args.concurrency)
+
+    content_type, body = multipart({'lat': LATITUDE, 'long': LONGITUDE}, 'photo', 'image.jpg', PHOTO)
+    results['clock_in'] = run_scenario(
+        'clock_in', lambda employee_id: sessions[employee_id].request('POST', '/user/clock_in', body, content_type),
+        employee_ids[:ops], args.concurrency)
+    photo_ingestor.join()
+
+    results['clock_out'] = run_scenario(
+        'clock_out', lambda employee_id: sessions[employee_id].request('POST', '/user/clock_out'),
+        employee_ids[:ops], args.concurrency)
+
+    tomorrow = (datetime.date.today() + datetime.timedelta(days=1)).isoformat()
+    leave_body = json.dumps({'reason': 'Keperluan keluarga', 'date': tomorrow}).encode()
+    results['leave'] = run_scenario(
+        'leave', lambda employee_id: sessions[employee_id].request('POST', '/user/leave', leave_body, 'application/json'),
+        employee_ids[:ops], args.concurrency)
+
+    results['recap'] = run_scenario(
+        'recap', lambda employee_id: sessions[employee_id].request('GET', '/user/recap'),
+        employee_ids[:ops], args.concurrency)
+
+    admin = new_session()
+    status, _ = login(admin, ADMIN_EMAIL)
+    if not is_success(status):
+        raise SystemExit(f'Admin login failed with status {status}')
+    admin_ops = range(args.admin_ops)
+    results['list_employees'] = run_scenario(
+        'list_employees', lambda _: admin.request('GET', '/list_employees'), admin_ops, args.admin_concurrency)
+    results['attendance_report'] = run_scenario(
+        'attendance_report', lambda _: admin.request('GET', '/attendance_report?limit=500'),
+        admin_ops, args.admin_concurrency)
+    yesterday = (datetime.date.today() - datetime.timedelta(days=1)).isoformat()
+    results['attendance_report_day'] = run_scenario(
+        'attendance_report_day',
+        lambda _: admin.request('GET', f'/attendance_report?start_date={yesterday}&end_date={yesterday}&format=ndjson'),
+        admin_ops, args.admin_concurrency)
+    return results
+
+
+def serve(app):
+    from werkzeug.serving import make_server
+
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    thread = threading.Thread(target=server.serve_forever, name='benchmark-server', daemon=True)
+    thread.start()
+    return server, f'http://127.0.0.1:{server.server_port}'
+
+
+def compare(results, baseline_path, tolerance):
+    """Bandingkan p50 dengan hasil sebelumnya; kembalikan daftar regresi."""
+    with open(baseline_path) as baseline_file:
+        baseline = json.load(baseline_file)['results']
+    comparison, regressions = {}, []
+    for name, result in results.items():
+        before = baseline.get(name)
+        # Skenario yang gagal (di run ini atau baseline) tidak punya latensi yang bisa dibandingkan
+        if not before or before.get('failed') or not before.get('p50_ms') or result['failed']:
+            continue
+        ratio = result['p50_ms'] / before['p50_ms'] if before['p50_ms'] else None
+        comparison[name] = {'baseline_p50_ms': before['p50_ms'], 'p50_ms': result['p50_ms'],
+                            'ratio': round(ratio, 3) if ratio else None}
+        if ratio and ratio > 1 + tolerance:
+            regressions.append(name)
+    return comparison, regressions
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--mode', choices=['client', 'server'], default='client')
+    parser.add_argument('--employees', type=int, default=1000)
+    parser.add_argument('--attendance-rows', type=int, default=100000)
+    parser.add_argument('--ops', type=int, default=500, help='Operasi per skenario karyawan (maks. --employees)')
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--admin-ops', type=int, default=20)
+    parser.add_argument('--admin-concurrency', type=int, default=1)
+    parser.add_argument('--output')
+    parser.add_argument('--compare')
+    parser.add_argument('--tolerance', type=float, default=0.10)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='presensi-suite-')
+    os.environ.setdefault('DATABASE_URL', f"sqlite:///{os.path.join(workdir, 'suite.db')}?timeout=60")
+    os.environ.update({
+        'PHOTO_STORAGE_ROOT': os.path.join(workdir, 'uploads'),
+        'PHOTO_SPOOL_FOLDER': os.path.join(workdir, 'spool'),
+        'LOG_FILE': os.path.join(workdir, 'app.log'),
+        'LOG_LEVEL': os.environ.get('LOG_LEVEL', 'WARNING'),
+        'BCRYPT_LOG_ROUNDS': '4',  # Sama dengan cost hash seed agar login tidak memicu rehash
+        'RATE_LIMIT_ENABLED': '0',  # Semua klien login dari satu IP
+    })
+
+    from app import create_app, db
+
+    app = create_app()
+    server = None
+    try:
+        with app.app_context():
+            started = time.perf_counter()
+            seed(db, args.employees, args.attendance_rows)
+            seed_seconds = time.perf_counter() - started
+        print(f'seeded {args.employees} employees, {args.attendance_rows} attendance rows '
+              f'in {seed_seconds:.1f}s', file=sys.stderr, flush=True)
+
+        if args.mode == 'server':
+            server, base_url = serve(app)
+            results = run_suite(app, lambda: ServerSession(base_url), args)
+        else:
+            results = run_suite(app, lambda: ClientSession(app), args)
+
+        document = {
+            'revision': git_revision(),
+            'timestamp': datetime.datetime.now().isoformat(timespec='seconds'),
+            'python': sys.version.split()[0],
+            'database': app.config['SQLALCHEMY_DATABASE_URI'].split(':', 1)[0],
+            'params': vars(args),
+            'seed_seconds': round(seed_seconds, 1),
+            'results': results,
+        }
+        failed = sorted(name for name, result in results.items() if result['failed'])
+        document['failed_scenarios'] = failed
+        regressions = []
+        if args.compare:
+            document['comparison'], regressions = compare(results, args.compare, args.tolerance)
+            document['regressions'] = regressions
+
+        output = json.dumps(document, indent=2)
+        if args.output:
+            with open(args.output, 'w') as output_file:
+                output_file.write(output + '\n')
+        print(output)
+        if failed:
+            print(f'Scenarios with non-2xx/304 responses: {", ".join(failed)}', file=sys.stderr)
+        if failed or regressions:
+            sys.exit(1)
+    finally:
+        if server is not None:
+            server.shutdown()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
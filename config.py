@@ -1,17 +1,170 @@
 import os
 import base64
-import logging
 
-# Menghasilkan SECRET_KEY dari Base64
-secret_key = base64.b64encode(os.urandom(24)).decode('utf-8')
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+
+def load_secret_key():
+    """SECRET_KEY dari environment, atau dari file yang dibagi semua worker.
+
+    Kunci acak per proses membuat cookie session, link reset password dan
+    token JWT yang ditandatangani satu worker ditolak worker lain. Jika
+    SECRET_KEY tidak diset, kunci dibuat sekali lalu disimpan di
+    SECRET_KEY_FILE (default instance/secret_key) dan dibaca ulang oleh
+    worker berikutnya.
+    """
+    key = os.environ.get('SECRET_KEY')
+    if key:
+        return key
+
+    path = os.environ.get('SECRET_KEY_FILE', os.path.join(ROOT, 'instance', 'secret_key'))
+    if os.path.exists(path):
+        with open(path) as key_file:
+            return key_file.read().strip()
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp_path = f'{path}.{os.getpid()}'
+    with open(temp_path, 'w') as key_file:
+        key_file.write(base64.b64encode(os.urandom(32)).decode('utf-8'))
+    os.chmod(temp_path, 0o600)
+    try:
+        # link() atomik: jika worker lain lebih dulu membuat file, kunci miliknya yang dipakai
+        os.link(temp_path, path)
+    except FileExistsError:
+        pass
+    finally:
+        os.remove(temp_path)
+    with open(path) as key_file:
+        return key_file.read().strip()
+
+
+def rate_limit(name, default):
+    """Aturan rate limit (batas, window detik) dari env RATE_LIMIT_<NAME>="batas/detik"."""
+    value = os.environ.get(f'RATE_LIMIT_{name.upper()}')
+    if not value:
+        return default
+    limit, _, window = value.partition('/')
+    return int(limit), int(window or default[1])
+
+
+def database_url():
+    """URL database dari DATABASE_URL, default file SQLite lokal."""
+    url = os.environ.get('DATABASE_URL', 'sqlite:///attendance_system.db?timeout=60')
+    # Beberapa platform masih memberi skema lama postgres://
+    if url.startswith('postgres://'):
+        url = 'postgresql://' + url[len('postgres://'):]
+    return url
+
+
+def uses_queue_pool(url):
+    """False untuk SQLite in-memory (mis. ``sqlite://``) yang memakai StaticPool tanpa pool_size."""
+    from sqlalchemy.engine import make_url
+
+    parsed = make_url(url)
+    if parsed.get_backend_name() != 'sqlite':
+        return True
+    return parsed.database not in (None, '', ':memory:') and parsed.query.get('mode') != 'memory'
+
+
+def engine_options(url):
+    """Pengaturan pool koneksi SQLAlchemy dari environment variable.
+
+    DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT, DB_POOL_RECYCLE,
+    DB_POOL_PRE_PING dan DB_STATEMENT_TIMEOUT_MS (batas waktu per statement,
+    hanya PostgreSQL). Ukuran pool hanya dipasang untuk URL yang memakai QueuePool.
+    """
+    options = {
+        'pool_recycle': int(os.environ.get('DB_POOL_RECYCLE', 3600)),
+        'pool_pre_ping': os.environ.get('DB_POOL_PRE_PING', '1') == '1',
+    }
+    if uses_queue_pool(url):
+        options.update(
+            pool_size=int(os.environ.get('DB_POOL_SIZE', 5)),
+            max_overflow=int(os.environ.get('DB_MAX_OVERFLOW', 10)),
+            pool_timeout=int(os.environ.get('DB_POOL_TIMEOUT', 30)),
+        )
+    statement_timeout = os.environ.get('DB_STATEMENT_TIMEOUT_MS')
+    if statement_timeout and url.startswith('postgresql'):
+        options['connect_args'] = {'options': f'-c statement_timeout={int(statement_timeout)}'}
+    return options
+
 
 class Config:
-    # Koneksi ke database SQLite
-    SECRET_KEY = secret_key
-    SQLALCHEMY_DATABASE_URI = 'sqlite:///attendance_system.db?timeout=60'
-    SQLALCHEMY_POOL_RECYCLE = 3600
+    SECRET_KEY = load_secret_key()
+    # Token bearer untuk API mobile (lihat app/tokens.py); kunci default sama dengan SECRET_KEY
+    JWT_SECRET_KEY = os.environ.get('JWT_SECRET_KEY') or SECRET_KEY
+    JWT_ACCESS_TOKEN_SECONDS = int(os.environ.get('JWT_ACCESS_TOKEN_SECONDS', 900))
+    JWT_REFRESH_TOKEN_SECONDS = int(os.environ.get('JWT_REFRESH_TOKEN_SECONDS', 30 * 24 * 3600))
+    JWT_CACHE_SIZE = int(os.environ.get('JWT_CACHE_SIZE', 4096))
+    # Koneksi database: SQLite lokal secara default, atau server database (mis. PostgreSQL) lewat DATABASE_URL
+    SQLALCHEMY_DATABASE_URI = database_url()
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options(SQLALCHEMY_DATABASE_URI)
     SQLALCHEMY_TRACK_MODIFICATIONS = False
 
+    # PRAGMA SQLite yang dipasang di setiap koneksi (lihat app/database.py)
+    SQLITE_PRAGMAS = {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'mmap_size': 268435456,  # 256 MB
+        'cache_size': -65536,  # 64 MB (nilai negatif = KiB)
+        'busy_timeout': 10000,
+        'temp_store': 'MEMORY',
+    }
+    # Jalankan write clock in/clock out/izin lewat satu thread penulis per proses
+    # (default: aktif hanya untuk SQLite)
+    SERIALIZE_WRITES = os.environ.get('SERIALIZE_WRITES', '1') == '1' if 'SERIALIZE_WRITES' in os.environ else None
+
+    # Bulk import karyawan: ukuran batch insert
+    BULK_IMPORT_BATCH_SIZE = int(os.environ.get('BULK_IMPORT_BATCH_SIZE', 500))
+
+    # Hashing password (lihat app/passwords.py). Hash dengan cost lain di-rehash saat login.
+    BCRYPT_LOG_ROUNDS = int(os.environ.get('BCRYPT_LOG_ROUNDS', 12))
+    # Jumlah proses bcrypt per worker web; 0 = hashing langsung di thread request.
+    # Default membagi core host ke semua worker web (WEB_CONCURRENCY, diisi gunicorn.conf.py)
+    # agar total proses bcrypt tidak melebihi jumlah CPU.
+    PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', os.environ.get(
+        'BULK_IMPORT_HASH_WORKERS', max(1, (os.cpu_count() or 1) // int(os.environ.get('WEB_CONCURRENCY', 1))))))
+    PASSWORD_HASH_MAX_PENDING = int(os.environ.get('PASSWORD_HASH_MAX_PENDING', 64))
+    PASSWORD_HASH_QUEUE_TIMEOUT = float(os.environ.get('PASSWORD_HASH_QUEUE_TIMEOUT', 5))
+
+    # Pipeline foto absensi di latar belakang (lihat app/photo_ingest.py)
+    PHOTO_INGEST_WORKERS = int(os.environ.get('PHOTO_INGEST_WORKERS', 4))
+    PHOTO_INGEST_QUEUE_SIZE = int(os.environ.get('PHOTO_INGEST_QUEUE_SIZE', 64))
+    PHOTO_SPOOL_FOLDER = os.environ.get('PHOTO_SPOOL_FOLDER')
+    PHOTO_STORAGE_ROOT = os.environ.get('PHOTO_STORAGE_ROOT')
+    PHOTO_THUMBNAIL_SIZE = (320, 320)
+    # Interval (detik) worker foto memeriksa spool yang ditinggal worker lain yang sudah berhenti
+    PHOTO_SPOOL_RECOVER_SECONDS = int(os.environ.get('PHOTO_SPOOL_RECOVER_SECONDS', 60))
+
+    # Geofence clock in: ukuran sel grid (derajat) dan interval muat ulang indeks
+    GEOFENCE_CELL_SIZE = float(os.environ.get('GEOFENCE_CELL_SIZE', 0.01))
+    GEOFENCE_REFRESH_SECONDS = int(os.environ.get('GEOFENCE_REFRESH_SECONDS', 60))
+
+    # Cache identitas untuk user_loader (jumlah entri dan umur dalam detik)
+    IDENTITY_CACHE_SIZE = int(os.environ.get('IDENTITY_CACHE_SIZE', 1024))
+    IDENTITY_CACHE_TTL = int(os.environ.get('IDENTITY_CACHE_TTL', 60))
+
+    # Instrumentasi request (lihat app/instrumentation.py) dan profiler sampling untuk request lambat
+    INSTRUMENTATION_ENABLED = os.environ.get('INSTRUMENTATION_ENABLED', '1') == '1'
+    PROFILE_SLOW_REQUESTS = os.environ.get('PROFILE_SLOW_REQUESTS', '0') == '1'
+    SLOW_REQUEST_SECONDS = float(os.environ.get('SLOW_REQUEST_SECONDS', 1.0))
+    PROFILE_INTERVAL_SECONDS = float(os.environ.get('PROFILE_INTERVAL_SECONDS', 0.005))
+    PROFILE_MAX_REPORTS = int(os.environ.get('PROFILE_MAX_REPORTS', 50))
+
+    # Rate limit login/lupa password (lihat app/rate_limit.py); dicek sebelum query database dan bcrypt
+    RATE_LIMIT_ENABLED = os.environ.get('RATE_LIMIT_ENABLED', '1') == '1'
+    # Kosong = counter per proses; redis://... = counter bersama lintas worker
+    RATE_LIMIT_STORAGE_URL = os.environ.get('RATE_LIMIT_STORAGE_URL')
+    RATE_LIMIT_MAX_KEYS = int(os.environ.get('RATE_LIMIT_MAX_KEYS', 100000))
+    # Jumlah reverse proxy di depan aplikasi; IP klien diambil dari X-Forwarded-For
+    RATE_LIMIT_PROXY_HOPS = int(os.environ.get('RATE_LIMIT_PROXY_HOPS', 0))
+    RATE_LIMITS = {
+        'login_ip': rate_limit('login_ip', (100, 60)),  # Login gagal per IP (satu NAT kantor = satu IP)
+        'login_email': rate_limit('login_email', (5, 900)),  # Login gagal per email sebelum dikunci
+        'forgot_ip': rate_limit('forgot_ip', (10, 3600)),
+        'forgot_email': rate_limit('forgot_email', (3, 3600)),
+    }
+
     # Menambahkan batas ukuran upload
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16 MB
 
@@ -25,13 +178,32 @@ class Config:
     # Konfigurasi SMTP untuk email
     smtp_server = 'smtp.gmail.com'
     smtp_port = 587
+    MAIL_SERVER = os.environ.get('MAIL_SERVER', smtp_server)
+    MAIL_PORT = int(os.environ.get('MAIL_PORT', smtp_port))
+    MAIL_USE_TLS = os.environ.get('MAIL_USE_TLS', '1') == '1'
+    MAIL_USE_SSL = os.environ.get('MAIL_USE_SSL', '0') == '1'
+    MAIL_USERNAME = os.environ.get('MAIL_USERNAME')
+    MAIL_PASSWORD = os.environ.get('MAIL_PASSWORD')
+    MAIL_DEFAULT_SENDER = os.environ.get('MAIL_DEFAULT_SENDER', MAIL_USERNAME or 'noreply@localhost')
+    MAIL_TIMEOUT = int(os.environ.get('MAIL_TIMEOUT', 30))
 
-    # Konfigurasi Logging
-    logging.basicConfig(level=logging.INFO,  # Atur level log yang diinginkan (INFO, ERROR, DEBUG, dsb)
-                        format='%(asctime)s - %(levelname)s - %(message)s',
-                        handlers=[
-                            logging.StreamHandler(),  # Output log ke konsol
-                            logging.FileHandler('app_config.log')  # Simpan log ke file app_config.log
-                        ])
+    # Outbox email di latar belakang (lihat app/mail_outbox.py)
+    MAIL_OUTBOX_WORKERS = int(os.environ.get('MAIL_OUTBOX_WORKERS', 2))
+    MAIL_OUTBOX_BATCH_SIZE = int(os.environ.get('MAIL_OUTBOX_BATCH_SIZE', 20))
+    MAIL_OUTBOX_MAX_ATTEMPTS = int(os.environ.get('MAIL_OUTBOX_MAX_ATTEMPTS', 6))
+    MAIL_OUTBOX_RETRY_SECONDS = int(os.environ.get('MAIL_OUTBOX_RETRY_SECONDS', 30))  # Backoff: 30s, 60s, 120s, ...
+    MAIL_OUTBOX_POLL_SECONDS = int(os.environ.get('MAIL_OUTBOX_POLL_SECONDS', 10))
+    MAIL_SMTP_IDLE_SECONDS = int(os.environ.get('MAIL_SMTP_IDLE_SECONDS', 60))  # Koneksi SMTP idle lebih lama ditutup
 
-    logging.info("Config loaded successfully")  # Log untuk menandakan konfigurasi telah dimuat
+    # Konfigurasi Logging (dipasang sekali oleh app.logging_setup.configure_logging)
+    LOG_FILE = os.environ.get('LOG_FILE', 'app.log')
+    LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO')
+    LOG_MAX_BYTES = int(os.environ.get('LOG_MAX_BYTES', 10 * 1024 * 1024))
+    LOG_BACKUP_COUNT = int(os.environ.get('LOG_BACKUP_COUNT', 5))
+    # Sampling log INFO bervolume tinggi: simpan 1 dari N record ('modul' atau 'modul:fungsi')
+    LOG_SAMPLE_RATES = {
+        'app.utils:get_attendance_for_today': 100,  # Dipanggil di setiap render template
+        'app.identity_cache:_load': 10,
+        'app.routes.admin_routes:admin_dashboard': 10,
+        'app.routes.employee_routes:home': 10,
+    }
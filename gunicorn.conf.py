@@ -0,0 +1,67 @@
+"""Profil server produksi (gunicorn) untuk aplikasi presensi.
+
+Jalankan dengan:
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+Semua nilai bisa diatur lewat environment variable:
+    PORT              port yang didengarkan (default 8000)
+    WEB_CONCURRENCY   jumlah proses worker (default 2 x CPU + 1)
+    WEB_THREADS       jumlah thread per worker (default 4)
+    WEB_WORKER_CLASS  "gthread" (default) atau "gevent"
+    WEB_WORKER_CONNECTIONS  request bersamaan per worker gevent (default 1000)
+    WEB_PRELOAD       "1" untuk mengimpor aplikasi sekali sebelum fork (default 1)
+    WEB_TIMEOUT       batas waktu request dalam detik (default 30)
+
+Hashing password berjalan di process pool per worker web. Jumlah workernya
+(PASSWORD_HASH_WORKERS) default-nya CPU // WEB_CONCURRENCY, minimal 1, jadi
+dengan default 2 x CPU + 1 worker web setiap worker memakai satu proses bcrypt.
+
+Mode gevent (gevent dan psycogreen ada di requirements.txt) untuk lonjakan clock in pagi dari
+aplikasi mobile: blueprint yang sama, tetapi setiap request berjalan di
+greenlet sehingga upload foto yang lambat, antrian penulis (write_queue) dan
+pool koneksi menunggu secara kooperatif. Satu proses dapat memegang ribuan
+request yang sedang berjalan, bukan hanya WEB_THREADS. Preload dimatikan di
+mode ini agar modul aplikasi (lock, thread latar belakang) baru diimpor
+setelah gevent mem-patch threading/socket di worker.
+
+Reload tanpa downtime: kirim SIGHUP ke proses master (`kill -HUP <pid>`);
+worker lama menyelesaikan request yang sedang berjalan dalam
+graceful_timeout detik sebelum diganti worker baru.
+"""
+import os
+import multiprocessing
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+# Diteruskan ke config.py untuk membagi CPU antar pool bcrypt semua worker
+os.environ['WEB_CONCURRENCY'] = str(workers)
+threads = int(os.environ.get('WEB_THREADS', 4))
+worker_class = os.environ.get('WEB_WORKER_CLASS', 'gthread')
+worker_connections = int(os.environ.get('WEB_WORKER_CONNECTIONS', 1000))
+preload_app = os.environ.get('WEB_PRELOAD', '1') == '1' and worker_class != 'gevent'
+timeout = int(os.environ.get('WEB_TIMEOUT', 30))
+graceful_timeout = int(os.environ.get('WEB_GRACEFUL_TIMEOUT', 30))
+keepalive = 5
+max_requests = int(os.environ.get('WEB_MAX_REQUESTS', 0))
+max_requests_jitter = int(os.environ.get('WEB_MAX_REQUESTS_JITTER', 0))
+accesslog = os.environ.get('WEB_ACCESS_LOG')  # Mis. "-" untuk stdout; default mati
+errorlog = '-'
+
+
+def post_fork(server, worker):
+    if worker_class == 'gevent':
+        # Driver PostgreSQL (psycopg2) hanya kooperatif jika di-patch; opsional
+        try:
+            from psycogreen.gevent import patch_psycopg
+        except ImportError:
+            pass
+        else:
+            patch_psycopg()
+
+    # Dengan preload, koneksi database yang mungkin dibuka master tidak boleh
+    # dipakai bersama oleh worker: buang pool tanpa menutup koneksi milik master.
+    if preload_app:
+        from wsgi import app
+        from app import db
+        with app.app_context():
+            db.engine.dispose(close=False)
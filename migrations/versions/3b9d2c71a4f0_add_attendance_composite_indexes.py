@@ -0,0 +1,30 @@
+"""Add composite indexes for attendance hot queries
+
+Revision ID: 3b9d2c71a4f0
+Revises: e1f27e60e755
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3b9d2c71a4f0'
+down_revision = 'e1f27e60e755'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Index untuk filter employee_id + date (absensi hari ini dan recap)
+    with op.batch_alter_table('attendance', schema=None) as batch_op:
+        batch_op.create_index('ix_attendance_employee_id_date', ['employee_id', 'date'], unique=False)
+        # Index untuk clock out: employee_id + status, urut berdasarkan id
+        batch_op.create_index('ix_attendance_employee_id_status_id', ['employee_id', 'status', 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('attendance', schema=None) as batch_op:
+        batch_op.drop_index('ix_attendance_employee_id_status_id')
+        batch_op.drop_index('ix_attendance_employee_id_date')
@@ -0,0 +1,42 @@
+"""Add attendance daily summary table
+
+Revision ID: 7c4e1a9d2b83
+Revises: 3b9d2c71a4f0
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7c4e1a9d2b83'
+down_revision = '3b9d2c71a4f0'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Tabel ringkasan per karyawan per hari; isi dengan `flask rebuild-daily-summary`
+    op.create_table('attendance_daily_summary',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('employee_id', sa.Integer(), nullable=False),
+        sa.Column('date', sa.Date(), nullable=False),
+        sa.Column('status', sa.Enum('ALPHA', 'CLOCK_IN', 'CLOCK_OUT', 'IJIN', name='attendancestatus', native_enum=False, length=20), nullable=False),
+        sa.Column('clock_in_time', sa.DateTime(), nullable=True),
+        sa.Column('clock_out_time', sa.DateTime(), nullable=True),
+        sa.Column('reason', sa.Text(), nullable=True),
+        sa.Column('record_count', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['employee_id'], ['employees.user_id'], ),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('employee_id', 'date', name='uq_attendance_daily_summary_employee_id_date')
+    )
+    with op.batch_alter_table('attendance_daily_summary', schema=None) as batch_op:
+        batch_op.create_index('ix_attendance_daily_summary_date_status', ['date', 'status'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('attendance_daily_summary', schema=None) as batch_op:
+        batch_op.drop_index('ix_attendance_daily_summary_date_status')
+
+    op.drop_table('attendance_daily_summary')
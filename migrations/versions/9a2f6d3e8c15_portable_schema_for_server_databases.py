@@ -0,0 +1,50 @@
+"""Portable schema for server databases (unique employees.user_id, non-native enum)
+
+Revision ID: 9a2f6d3e8c15
+Revises: 7c4e1a9d2b83
+Create Date: 2026-10-18 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9a2f6d3e8c15'
+down_revision = '7c4e1a9d2b83'
+branch_labels = None
+depends_on = None
+
+STATUS_VALUES = ('ALPHA', 'CLOCK_IN', 'CLOCK_OUT', 'IJIN')
+
+
+def upgrade():
+    # attendance.employee_id mereferensikan employees.user_id; PostgreSQL mewajibkan kolom tujuan FK unik
+    with op.batch_alter_table('employees', schema=None) as batch_op:
+        batch_op.create_unique_constraint('uq_employees_user_id', ['user_id'])
+
+    # Simpan status sebagai VARCHAR biasa agar sama di SQLite dan PostgreSQL
+    with op.batch_alter_table('attendance', schema=None) as batch_op:
+        batch_op.alter_column('status',
+                              existing_type=sa.Enum(*STATUS_VALUES, name='attendancestatus'),
+                              type_=sa.String(length=20),
+                              existing_nullable=False,
+                              postgresql_using='status::text')
+
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute('DROP TYPE IF EXISTS attendancestatus')
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        sa.Enum(*STATUS_VALUES, name='attendancestatus').create(op.get_bind(), checkfirst=True)
+
+    with op.batch_alter_table('attendance', schema=None) as batch_op:
+        batch_op.alter_column('status',
+                              existing_type=sa.String(length=20),
+                              type_=sa.Enum(*STATUS_VALUES, name='attendancestatus'),
+                              existing_nullable=False,
+                              postgresql_using='status::attendancestatus')
+
+    with op.batch_alter_table('employees', schema=None) as batch_op:
+        batch_op.drop_constraint('uq_employees_user_id', type_='unique')
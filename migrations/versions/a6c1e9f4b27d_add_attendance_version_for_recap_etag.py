@@ -0,0 +1,33 @@
+"""Add employees.attendance_version and attendance (employee_id, id) index for recap ETags
+
+Revision ID: a6c1e9f4b27d
+Revises: f3b8e2d6a174
+Create Date: 2026-10-18 16:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a6c1e9f4b27d'
+down_revision = 'f3b8e2d6a174'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('employees', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('attendance_version', sa.Integer(), nullable=False, server_default='0'))
+
+    # ETag rekap: ORDER BY id DESC LIMIT 1 per karyawan
+    with op.batch_alter_table('attendance', schema=None) as batch_op:
+        batch_op.create_index('ix_attendance_employee_id_id', ['employee_id', 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('attendance', schema=None) as batch_op:
+        batch_op.drop_index('ix_attendance_employee_id_id')
+
+    with op.batch_alter_table('employees', schema=None) as batch_op:
+        batch_op.drop_column('attendance_version')
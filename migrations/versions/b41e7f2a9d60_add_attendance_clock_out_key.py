@@ -0,0 +1,27 @@
+"""Add clock_out_key to attendance for idempotent clock out
+
+Revision ID: b41e7f2a9d60
+Revises: 9a2f6d3e8c15
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b41e7f2a9d60'
+down_revision = '9a2f6d3e8c15'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Menyimpan Idempotency-Key request clock out agar retry tidak menulis ulang
+    with op.batch_alter_table('attendance', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('clock_out_key', sa.String(length=64), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('attendance', schema=None) as batch_op:
+        batch_op.drop_column('clock_out_key')
@@ -0,0 +1,95 @@
+"""Unique attendance per employee per day (dedupe existing rows)
+
+Every row of a duplicated (employee_id, date) group is copied unchanged to
+attendance_duplicates before the group is merged, so deleted rows (e.g. an
+IJIN reason) can be reviewed and downgrade() puts them back.
+
+Revision ID: c5d8a1f4e273
+Revises: b41e7f2a9d60
+Create Date: 2026-10-18 13:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c5d8a1f4e273'
+down_revision = 'b41e7f2a9d60'
+branch_labels = None
+depends_on = None
+
+# Saat menggabungkan duplikat, status yang paling "maju" dipertahankan
+STATUS_PRIORITY = {'CLOCK_OUT': 3, 'IJIN': 2, 'CLOCK_IN': 1, 'ALPHA': 0}
+BACKUP_TABLE = 'attendance_duplicates'
+
+
+def _in_batches(ids, size=500):
+    for start in range(0, len(ids), size):
+        yield ids[start:start + size]
+
+
+def upgrade():
+    conn = op.get_bind()
+    attendance = sa.table('attendance',
+                          sa.column('id', sa.Integer), sa.column('employee_id', sa.Integer),
+                          sa.column('date', sa.DateTime), sa.column('status', sa.String),
+                          sa.column('time', sa.DateTime))
+
+    # Cari (employee_id, date) yang punya lebih dari satu baris
+    duplicate_keys = conn.execute(
+        sa.select(attendance.c.employee_id, attendance.c.date)
+        .group_by(attendance.c.employee_id, attendance.c.date)
+        .having(sa.func.count() > 1)
+    ).all()
+
+    groups = []
+    for employee_id, date in duplicate_keys:
+        groups.append(conn.execute(
+            sa.select(attendance.c.id, attendance.c.status, attendance.c.time)
+            .where(attendance.c.employee_id == employee_id, attendance.c.date == date)
+            .order_by(attendance.c.id)
+        ).all())
+
+    # Salin semua baris duplikat apa adanya sebelum digabung; tidak ada data yang hilang
+    if groups:
+        op.execute(f'CREATE TABLE {BACKUP_TABLE} AS SELECT * FROM attendance WHERE 1 = 0')
+        copy = sa.text(f'INSERT INTO {BACKUP_TABLE} SELECT * FROM attendance WHERE id IN :ids') \
+            .bindparams(sa.bindparam('ids', expanding=True))
+        for ids in _in_batches([row.id for rows in groups for row in rows]):
+            conn.execute(copy, {'ids': ids})
+
+    to_delete = []
+    for rows in groups:
+        # Pertahankan baris dengan status paling maju (id terkecil jika sama),
+        # dengan waktu clock in paling awal dari semua duplikat
+        keeper = max(rows, key=lambda row: (STATUS_PRIORITY.get(row.status, 0), -row.id))
+        earliest = min(row.time for row in rows)
+        conn.execute(attendance.update().where(attendance.c.id == keeper.id).values(time=earliest))
+        to_delete.extend(row.id for row in rows if row.id != keeper.id)
+
+    for ids in _in_batches(to_delete):
+        conn.execute(attendance.delete().where(attendance.c.id.in_(ids)))
+
+    # Unique constraint menggantikan index biasa (employee_id, date)
+    with op.batch_alter_table('attendance', schema=None) as batch_op:
+        batch_op.drop_index('ix_attendance_employee_id_date')
+        batch_op.create_unique_constraint('uq_attendance_employee_id_date', ['employee_id', 'date'])
+
+    # Catatan: jalankan `flask rebuild-daily-summary` setelah upgrade agar
+    # jumlah record di ringkasan harian sesuai dengan data yang sudah dibersihkan.
+    # Baris yang digabung tersimpan di attendance_duplicates untuk ditinjau.
+
+
+def downgrade():
+    with op.batch_alter_table('attendance', schema=None) as batch_op:
+        batch_op.drop_constraint('uq_attendance_employee_id_date', type_='unique')
+        batch_op.create_index('ix_attendance_employee_id_date', ['employee_id', 'date'], unique=False)
+
+    # Kembalikan baris duplikat yang dihapus dan waktu asli baris yang dipertahankan
+    if sa.inspect(op.get_bind()).has_table(BACKUP_TABLE):
+        op.execute(f'INSERT INTO attendance SELECT * FROM {BACKUP_TABLE} '
+                   f'WHERE id NOT IN (SELECT id FROM attendance)')
+        op.execute(f'UPDATE attendance SET time = (SELECT d.time FROM {BACKUP_TABLE} d WHERE d.id = attendance.id) '
+                   f'WHERE id IN (SELECT id FROM {BACKUP_TABLE})')
+        op.drop_table(BACKUP_TABLE)
@@ -0,0 +1,43 @@
+"""Cascade attendance_daily_summary rows when an employee is deleted
+
+Revision ID: f3b8e2d6a174
+Revises: d7a3c9e5b148
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f3b8e2d6a174'
+down_revision = 'd7a3c9e5b148'
+branch_labels = None
+depends_on = None
+
+FK_NAME = 'fk_attendance_daily_summary_employee_id_employees'
+# FK lama dibuat tanpa nama; di SQLite batch mode memberinya nama lewat konvensi ini agar bisa di-drop
+NAMING_CONVENTION = {'fk': 'fk_%(table_name)s_%(column_0_name)s_%(referred_table_name)s'}
+
+
+def _existing_fk_name():
+    for fk in sa.inspect(op.get_bind()).get_foreign_keys('attendance_daily_summary'):
+        if fk['constrained_columns'] == ['employee_id']:
+            return fk['name'] or FK_NAME
+    return None
+
+
+def upgrade():
+    name = _existing_fk_name()
+    with op.batch_alter_table('attendance_daily_summary', schema=None,
+                              naming_convention=NAMING_CONVENTION) as batch_op:
+        if name:
+            batch_op.drop_constraint(name, type_='foreignkey')
+        batch_op.create_foreign_key(FK_NAME, 'employees', ['employee_id'], ['user_id'], ondelete='CASCADE')
+
+
+def downgrade():
+    with op.batch_alter_table('attendance_daily_summary', schema=None,
+                              naming_convention=NAMING_CONVENTION) as batch_op:
+        batch_op.drop_constraint(FK_NAME, type_='foreignkey')
+        batch_op.create_foreign_key(FK_NAME, 'employees', ['employee_id'], ['user_id'])
@@ -1,3 +1,4 @@
+import os
 from app import create_app, db
 
 # Inisialisasi aplikasi Flask
@@ -9,4 +10,5 @@ def shutdown_session(exception=None):
     db.session.remove()  # Pastikan session dibersihkan setelah setiap request
 
 if __name__ == '__main__':
-    app.run(debug=True)
\ No newline at end of file
+    # Server development saja; untuk produksi gunakan gunicorn (lihat gunicorn.conf.py)
+    app.run(debug=os.environ.get('FLASK_DEBUG', '1') == '1')
\ No newline at end of file
@@ -1,13 +1,14 @@
-import sys
+"""Entry point WSGI produksi.
 
-# Tambahkan path ke folder aplikasi Anda
-path = '/home/bellanm123/absensi_app'  # Ganti 'username' dengan nama pengguna PythonAnywhere Anda
+    gunicorn -c gunicorn.conf.py wsgi:app
+"""
+from app import create_app, db
 
-if path not in sys.path:
-    sys.path.append(path)
+# Buat instance aplikasi
+app = create_app()
+application = app  # Nama yang dipakai PythonAnywhere dan server WSGI lain
 
-# Impor aplikasi Flask dari file yang sesuai
-from app import create_app  # Mengimpor fungsi create_app dari __init__.py
 
-# Buat instance aplikasi
-application = create_app()  # Memanggil fungsi create_app untuk membuat instance aplikasi
+@app.teardown_appcontext
+def shutdown_session(exception=None):
+    db.session.remove()  # Pastikan session dibersihkan setelah setiap request